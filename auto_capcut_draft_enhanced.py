@@ -10,30 +10,39 @@ CapCut 草稿自动生成器 - 增强版
 """
 
 import os
+import sys
 import json
-import uuid
-import glob
+import random
 import shutil
 import platform
 import logging
 from datetime import datetime
-from mutagen import File as MutagenFile
-# 尝试导入 PIL（读取图片尺寸）
-try:
-    from PIL import Image
-    PIL_AVAILABLE = True
-except ImportError:
-    PIL_AVAILABLE = False
-
-# 尝试导入 pydub（音频处理）
-try:
-    from pydub import AudioSegment
-    from pydub.silence import detect_nonsilent
-    PYDUB_AVAILABLE = True
-except ImportError:
-    PYDUB_AVAILABLE = False
-    print("⚠️  pydub 未安装，音频分段功能将不可用")
-    print("   安装命令: pip3 install pydub")
+from media_ingest import ingest_file, summarize_methods, IngestPipeline, INGEST_SKIP, INGEST_COPY
+from image_probe import probe_images
+from image_prescale import prescale_images, render_backdrops, PIL_AVAILABLE
+from draft_manifest import DraftManifest, file_fingerprint, MANIFEST_FILENAME
+from draft_ids import DraftIdFactory
+from draft_layout import make_policy
+from draft_builder import (
+    build_audio_material, build_image_material, build_local_material,
+    build_audio_segment, iter_image_segments, iter_audio_segments, build_track
+)
+from draft_materials import SegmentMaterialPool, DEFAULT_SHARED_KINDS
+from draft_animations import create_animation_materials, assign_intro_animations
+from effect_catalog import load_catalog
+from draft_writer import StreamedArray, write_draft_json
+from draft_validator import watch_draft
+from folder_scan import scan_folder
+from project_index import ProjectIndex
+from draft_metrics import DraftMetrics, profiled
+from lazy_imports import module_available
+
+# pydub（音频处理）：只检查是否安装，分段时才导入（导入时会探测 ffmpeg，拖慢启动）
+PYDUB_AVAILABLE = module_available("pydub")
+if not PYDUB_AVAILABLE:
+    # 输出到标准错误：draft_batch 在标准输出写 JSON 汇总
+    sys.stderr.write("⚠️  pydub 未安装，音频分段功能将不可用\n"
+                     "   安装命令: pip3 install pydub\n")
 
 # Whisper字幕功能已移除，建议使用CapCut内置识别
 
@@ -74,6 +83,65 @@ SHAKE_INTENSITY = 5.0       # 震动强度（0-10）
 # 背景填充配置
 ENABLE_CANVAS_BLUR = True   # 是否启用背景模糊填充
 CANVAS_BLUR_AMOUNT = 0.375  # 模糊强度（0-1，0.375 = 37.5%）
+# 背景模糊的实现方式
+# "live" = 每个图片片段引用 canvas_blur 材料，剪映预览/导出时逐帧实时计算高斯模糊
+# "prerendered" = 预先为每张图片渲染一张模糊背景（需要 Pillow，按内容哈希缓存在 cache/prescaled/），
+#                 作为静态图片放在图片下方的主轨道，预览/导出时不再实时模糊
+CANVAS_BLUR_LIVE = "live"
+CANVAS_BLUR_PRERENDERED = "prerendered"
+CANVAS_BLUR_MODE = CANVAS_BLUR_LIVE
+
+# 图片入场动画（动画目录见 effect_catalog.json 的 animation_groups.intro）
+# True = 除第一张外的图片随机加入场动画，相邻图片不重复（deterministic 模式下由素材文件夹名固定种子）
+ENABLE_INTRO_ANIMATIONS = False
+
+# 图片片段辅助材料共享配置
+# 列出的类型整份草稿只生成一份，所有图片片段引用同一个 ID；未列出的按片段生成
+# 可选: "speed", "placeholder", "canvas_blur", "sound_channel", "color", "loudness", "vocal"
+SHARED_SEGMENT_MATERIALS = DEFAULT_SHARED_KINDS
+
+# 素材导入配置
+# "link" = 同一文件系统时 reflink/硬链接（不占额外空间），跨设备才复制
+# "copy" = 始终复制（旧行为）
+MEDIA_INGEST_MODE = "link"
+# 并发导入的线程数（素材在网络盘上时可调大；1 = 逐个导入）
+INGEST_WORKERS = 4
+
+# 图片预缩放（需要 Pillow）
+# True = 大于画布的图片先缩小到画布内的尺寸再导入，剪映预览/拖动/导出时不再逐帧解码大图
+# 结果按源文件内容哈希缓存在 cache/prescaled/，同一张图片只处理一次
+PRESCALE_IMAGES = False
+PRESCALE_WORKERS = min(4, os.cpu_count() or 1)  # 并行缩放的进程数
+
+# 增量生成配置
+# True = 草稿名固定为素材文件夹名，再次生成时只处理变化的音频/图片，并复用原有 ID
+INCREMENTAL_DRAFTS = False
+
+# ID 生成模式
+# "random" = 每次生成随机 uuid4
+# "deterministic" = 由 素材文件夹名 + 材料角色 + 序号 推导 UUIDv5，相同输入生成相同 JSON
+DRAFT_ID_MODE = "random"
+
+# 图片分配策略（见 draft_layout.make_policy）
+# "pair" = 短音频(<1.5秒)配1张并跳过下一张，长音频配2张平分（默认）
+# "fixed:3" / "weighted:1.5" / "beats:/path/beats.txt"
+IMAGE_LAYOUT_POLICY = "pair"
+
+# 草稿完整性检查（生成后检查材料引用与时间线，线性时间，问题写入日志）
+VALIDATE_DRAFTS = True
+
+# 性能记录
+METRICS_FILE = os.path.join(LOG_FOLDER, "metrics.jsonl")  # 每个步骤的耗时、复制字节数、峰值内存（None = 不记录）
+DRAFT_PROFILER = None  # None / "cprofile" / "pyinstrument"：整个草稿生成过程的性能分析，保存到 logs/profiles/
+
+# 项目索引（cache/project_index_*.json，记录各项目的素材数量与草稿生成状态）
+# True = 启动时只检查修改时间有变化的文件夹；运行 `python3 project_index.py watch` 时直接使用索引
+USE_PROJECT_INDEX = True
+
+# 监听模式（python3 auto_capcut_draft_enhanced.py --daemon，见 draft_daemon.py）
+DAEMON_SETTLE_SECONDS = 30  # 项目内音频/图片连续这么多秒没有变化才开始生成（等待复制完成）
+DAEMON_POLL_SECONDS = 5     # 检查素材目录的间隔
+DAEMON_WORKERS = 2          # 同时生成的项目数
 
 # 字幕功能已移除 - 请使用CapCut内置"智能字幕"功能
 
@@ -81,17 +149,25 @@ CANVAS_BLUR_AMOUNT = 0.375  # 模糊强度（0-1，0.375 = 37.5%）
 # 日志系统
 # ============================================================================
 
-def setup_logger(folder_name):
-    """设置日志系统"""
-    log_filename = f"{folder_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
-    log_path = os.path.join(LOG_FOLDER, log_filename)
+def setup_logger(folder_name, log_path=None):
+    """
+    设置日志系统
+    
+    Args:
+        folder_name: 素材文件夹名（每个文件夹使用独立的 logger，批量并行时互不干扰）
+        log_path: 日志文件路径（None = logs/文件夹名_时间.log；已存在时追加写入）
+    """
+    if log_path is None:
+        log_filename = f"{folder_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
+        log_path = os.path.join(LOG_FOLDER, log_filename)
     
     # 创建 logger
-    logger = logging.getLogger('CapCutDraft')
+    logger = logging.getLogger(f'CapCutDraft.{folder_name}')
     logger.setLevel(logging.DEBUG)
+    logger.propagate = False
     
     # 清除现有的 handlers
-    logger.handlers = []
+    close_logger(logger)
     
     # 文件 handler（详细日志）
     file_handler = logging.FileHandler(log_path, encoding='utf-8')
@@ -117,10 +193,23 @@ def setup_logger(folder_name):
     return logger
 
 
+def close_logger(logger):
+    """关闭并移除 logger 的所有 handler（批量处理大量文件夹时释放日志文件句柄）"""
+    for handler in list(logger.handlers):
+        handler.close()
+        logger.removeHandler(handler)
+
+
 # ============================================================================
 # 工具函数
 # ============================================================================
 
+def read_audio_meta(path):
+    """mutagen.File(path)：mutagen 在第一次读取音频时长时才导入"""
+    from mutagen import File as MutagenFile
+    return MutagenFile(path)
+
+
 def db_to_linear(db):
     """
     将 dB 值转换为线性增益
@@ -135,17 +224,40 @@ def db_to_linear(db):
     return math.pow(10, db / 20)
 
 
+def get_project_index():
+    """素材根目录的项目索引（USE_PROJECT_INDEX 关闭时返回 None）"""
+    if not USE_PROJECT_INDEX:
+        return None
+    return ProjectIndex(MATERIAL_BASE_FOLDER)
+
+
+def record_project_result(folder_name, draft_folder, status="ok"):
+    """把项目的草稿生成结果写入项目索引（索引写入失败不影响草稿）"""
+    index = get_project_index()
+    if index is None:
+        return
+    try:
+        index.mark_processed(folder_name, draft_folder, status)
+        index.save()
+    except OSError as e:
+        logging.getLogger("CapCutDraft").warning(f"⚠️  项目索引写入失败: {e}")
+
+
 def get_available_folders():
     """获取所有可用的素材文件夹"""
     if not os.path.exists(MATERIAL_BASE_FOLDER):
         print(f"❌ 素材文件夹不存在: {MATERIAL_BASE_FOLDER}")
         return []
     
-    folders = []
-    for item in os.listdir(MATERIAL_BASE_FOLDER):
-        item_path = os.path.join(MATERIAL_BASE_FOLDER, item)
-        if os.path.isdir(item_path):
-            folders.append(item)
+    index = get_project_index()
+    if index is not None:
+        # 只重新扫描修改时间变化的文件夹（有监听进程时直接使用索引）
+        index.refresh()
+        index.save()
+        folders = index.folder_names()
+    else:
+        scan = scan_folder(MATERIAL_BASE_FOLDER)
+        folders = list(scan.folders) if scan else []
     
     folders.sort(reverse=True)
     return folders
@@ -157,19 +269,24 @@ def select_folder(folders):
     print("📁 可用的素材文件夹:")
     print("="*70)
     
+    index = get_project_index()
+    
     # 找到第一个有效的文件夹（有音频和图片）
     default_index = None
     for i, folder in enumerate(folders, 1):
-        folder_path = os.path.join(MATERIAL_BASE_FOLDER, folder)
+        entry = index.get(folder) if index is not None else None
         
-        # 统计文件数量
-        audio_count = len(glob.glob(os.path.join(folder_path, "*.mp3"))) + \
-                     len(glob.glob(os.path.join(folder_path, "*.wav"))) + \
-                     len(glob.glob(os.path.join(folder_path, "*.m4a")))
-        
-        image_count = len(glob.glob(os.path.join(folder_path, "*.png"))) + \
-                     len(glob.glob(os.path.join(folder_path, "*.jpg"))) + \
-                     len(glob.glob(os.path.join(folder_path, "*.jpeg")))
+        if entry is not None:
+            # 数量来自项目索引，不需要读取目录
+            audio_count = entry["audio_count"]
+            image_count = entry["image_count"]
+            last = entry.get("last_processed") or {}
+        else:
+            # 统计文件数量（一次目录读取，结果缓存给之后的 find_media_files）
+            scan = scan_folder(os.path.join(MATERIAL_BASE_FOLDER, folder))
+            audio_count = len(scan.audio_files) if scan else 0
+            image_count = len(scan.image_files) if scan else 0
+            last = {}
         
         is_valid = (audio_count > 0 and image_count > 0)
         status = "✅" if is_valid else "⚠️"
@@ -178,11 +295,14 @@ def select_folder(folders):
         if is_valid and default_index is None:
             default_index = i
         
-        # 标记默认选项
+        # 标记默认选项与已生成过草稿的项目
         default_marker = " ⭐" if i == default_index else ""
-        print(f"{status} {i:2d}. {folder:30s}  [🎵 {audio_count} 音频, 🖼️  {image_count} 图片]{default_marker}")
+        done_marker = " 📝" if last.get("status") == "ok" else ""
+        print(f"{status} {i:2d}. {folder:30s}  [🎵 {audio_count} 音频, 🖼️  {image_count} 图片]{done_marker}{default_marker}")
     
     print("\n0. 退出")
+    if index is not None:
+        print("📝 = 已生成过草稿")
     print("="*70)
     
     # 显示默认提示
@@ -217,24 +337,15 @@ def select_folder(folders):
 
 
 def find_media_files(folder_path):
-    """查找文件夹中的音频和图片文件"""
-    audio_files = []
-    image_files = []
-    
-    for ext in ['*.mp3', '*.wav', '*.m4a', '*.aac', '*.MP3', '*.WAV']:
-        audio_files.extend(glob.glob(os.path.join(folder_path, ext)))
-    
-    for ext in ['*.png', '*.jpg', '*.jpeg', '*.PNG', '*.JPG', '*.JPEG']:
-        image_files.extend(glob.glob(os.path.join(folder_path, ext)))
-    
-    audio_files.sort()
-    image_files.sort()
-    
-    return audio_files, image_files
+    """查找文件夹中的音频和图片文件（扩展名不区分大小写，均已排序）"""
+    scan = scan_folder(folder_path)
+    if scan is None:
+        return [], []
+    return list(scan.audio_files), list(scan.image_files)
 
 
-def get_template_draft(logger):
-    """获取模板草稿"""
+def get_template_draft(logger, exclude=None):
+    """获取模板草稿（exclude: 不能作为模板的草稿路径，例如正在增量更新的草稿本身）"""
     logger.debug("查找模板草稿...")
     
     if not os.path.exists(CAPCUT_DRAFTS_FOLDER):
@@ -243,7 +354,8 @@ def get_template_draft(logger):
     
     drafts = [d for d in os.listdir(CAPCUT_DRAFTS_FOLDER) 
               if os.path.isdir(os.path.join(CAPCUT_DRAFTS_FOLDER, d))
-              and not d.startswith('.')]
+              and not d.startswith('.')
+              and os.path.join(CAPCUT_DRAFTS_FOLDER, d) != exclude]
     
     if not drafts:
         logger.error("未找到可用的模板草稿")
@@ -273,8 +385,72 @@ def get_template_draft(logger):
 # 音频智能分段（核心功能）
 # ============================================================================
 
+# 分段模式：编号 → (最小静音长度ms, 静音阈值dB)
+SPLIT_MODES = {
+    "1": (400, -40),  # 保守
+    "2": (300, -35),  # 标准
+    "3": (200, -30),  # 激进（默认推荐）
+    "4": (150, -25),  # 极限
+}
+SPLIT_MODE_NAMES = {
+    "conservative": "1",
+    "standard": "2",
+    "aggressive": "3",
+    "extreme": "4",
+}
+SPLIT_MODE_OFF = "off"
+DEFAULT_SPLIT_MODE = "3"
+
+
+def normalize_split_mode(mode):
+    """
+    统一分段模式写法
+    
+    Args:
+        mode: "1"-"4"、模式名（conservative/standard/aggressive/extreme）、
+              "off" / "n" / False 表示不分段
+        
+    Returns:
+        "1"-"4" 或 SPLIT_MODE_OFF；无法识别时返回默认模式
+    """
+    if mode is False:
+        return SPLIT_MODE_OFF
+    mode = str(mode).strip().lower()
+    if mode in (SPLIT_MODE_OFF, "n", "no", "none", "false", "0"):
+        return SPLIT_MODE_OFF
+    mode = SPLIT_MODE_NAMES.get(mode, mode)
+    return mode if mode in SPLIT_MODES else DEFAULT_SPLIT_MODE
+
+
+def ask_split_mode():
+    """交互询问是否分段及分段模式"""
+    print("\n" + "-"*70)
+    print("🔇 是否启用音频智能分段？")
+    print("   - 自动检测并移除静音片段")
+    print("   - 在 CapCut 中每个片段独立，可手动调整")
+    print("-"*70)
+    use_split = input("启用分段？(y/n，默认: y): ").strip().lower()
+    
+    # 直接回车默认为 y
+    if use_split == '':
+        use_split = 'y'
+        print("✅ 使用默认选项: y")
+    
+    if use_split == 'n':
+        return SPLIT_MODE_OFF
+    
+    # 选择模式（优化后更激进）
+    print("\n分段模式（已优化：先加速 → 再消除静音）:")
+    print("  1. 保守 (>400ms, <-40dB) - 保留明显停顿")
+    print("  2. 标准 (>300ms, <-35dB) - 移除大部分间隙")
+    print("  3. 激进 (>200ms, <-30dB) - 最大化移除静音 ⭐ 推荐")
+    print("  4. 极限 (>150ms, <-25dB) - 删除所有细微间隙")
+    
+    return input("选择模式 (1-4，默认3): ").strip() or DEFAULT_SPLIT_MODE
+
 def split_audio_by_silence(audio_file, output_folder, logger, 
-                          min_silence_len=300, silence_thresh=-35):
+                          min_silence_len=300, silence_thresh=-35,
+                          filename_pattern="audio_segment_{index:02d}.mp3", metrics=None):
     """
     智能分段：检测音频中的静音，切分成多个独立片段
     
@@ -284,6 +460,8 @@ def split_audio_by_silence(audio_file, output_folder, logger,
         logger: 日志对象
         min_silence_len: 最小静音长度（毫秒）
         silence_thresh: 静音阈值（dB）
+        filename_pattern: 片段文件名模板（可直接写成最终文件名，避免二次复制）
+        metrics: DraftMetrics，记录加载 / 加速 / 检测 / 导出各阶段耗时
         
     Returns:
         分段音频文件列表，每个元素包含 (文件路径, 起始时间ms, 时长ms)
@@ -292,35 +470,41 @@ def split_audio_by_silence(audio_file, output_folder, logger,
         logger.warning("pydub 不可用，跳过音频分段")
         return [(audio_file, 0, None)]  # 返回原文件
     
+    metrics = metrics or DraftMetrics(None)
     logger.info(f"\n🔧 开始音频智能分段...")
     logger.debug(f"参数: min_silence={min_silence_len}ms, thresh={silence_thresh}dB")
     
     try:
         # 加载音频
         logger.debug("加载音频文件...")
-        audio = AudioSegment.from_file(audio_file)
+        with metrics.span("load"):
+            from pydub import AudioSegment
+            from pydub.silence import detect_nonsilent
+            audio = AudioSegment.from_file(audio_file)
         original_duration = len(audio) / 1000
         logger.debug(f"原始时长: {original_duration:.2f}秒")
         
         # 🚀 优化：先加速音频，再检测静音（可以移除更多细微间隙）
         logger.debug(f"步骤1: 将音频加速到 {AUDIO_SPEED}x...")
-        # 通过改变帧率实现变速（不改变音调）
-        audio_sped_up = audio._spawn(audio.raw_data, overrides={
-            "frame_rate": int(audio.frame_rate * AUDIO_SPEED)
-        })
-        # 重新设置为原始采样率（保持音调，实现变速）
-        audio_sped_up = audio_sped_up.set_frame_rate(audio.frame_rate)
+        with metrics.span("speed_up"):
+            # 通过改变帧率实现变速（不改变音调）
+            audio_sped_up = audio._spawn(audio.raw_data, overrides={
+                "frame_rate": int(audio.frame_rate * AUDIO_SPEED)
+            })
+            # 重新设置为原始采样率（保持音调，实现变速）
+            audio_sped_up = audio_sped_up.set_frame_rate(audio.frame_rate)
         sped_up_duration = len(audio_sped_up) / 1000
         logger.debug(f"加速后时长: {sped_up_duration:.2f}秒 (缩短了 {original_duration - sped_up_duration:.2f}秒)")
         
         # 检测非静音片段（在加速后的音频上检测，停顿更短，更容易移除）
         logger.debug("步骤2: 检测非静音片段（在加速后的音频上）...")
-        nonsilent_ranges = detect_nonsilent(
-            audio_sped_up,
-            min_silence_len=min_silence_len,
-            silence_thresh=silence_thresh,
-            seek_step=5  # 更精细的检测步长
-        )
+        with metrics.span("detect_silence"):
+            nonsilent_ranges = detect_nonsilent(
+                audio_sped_up,
+                min_silence_len=min_silence_len,
+                silence_thresh=silence_thresh,
+                seek_step=5  # 更精细的检测步长
+            )
         
         logger.info(f"✅ 检测到 {len(nonsilent_ranges)} 个音频片段")
         
@@ -333,21 +517,23 @@ def split_audio_by_silence(audio_file, output_folder, logger,
         segments = []
         total_duration = 0
         
-        for i, (start_ms, end_ms) in enumerate(nonsilent_ranges, 1):
-            # 从加速后的音频中提取片段
-            segment = audio_sped_up[start_ms:end_ms]
-            duration_ms = end_ms - start_ms
-            duration_sec = duration_ms / 1000
-            
-            # 保存片段
-            segment_filename = f"audio_segment_{i:02d}.mp3"
-            segment_path = os.path.join(output_folder, segment_filename)
-            segment.export(segment_path, format="mp3", bitrate="192k")
-            
-            segments.append((segment_path, start_ms, duration_ms))
-            total_duration += duration_sec
-            
-            logger.debug(f"片段 {i}: {start_ms/1000:.2f}s - {end_ms/1000:.2f}s (时长 {duration_sec:.2f}s)")
+        with metrics.span("export"):
+            for i, (start_ms, end_ms) in enumerate(nonsilent_ranges, 1):
+                # 从加速后的音频中提取片段
+                segment = audio_sped_up[start_ms:end_ms]
+                duration_ms = end_ms - start_ms
+                duration_sec = duration_ms / 1000
+                
+                # 保存片段
+                segment_filename = filename_pattern.format(index=i)
+                segment_path = os.path.join(output_folder, segment_filename)
+                segment.export(segment_path, format="mp3", bitrate="192k")
+                metrics.add_bytes(os.path.getsize(segment_path))
+                
+                segments.append((segment_path, start_ms, duration_ms))
+                total_duration += duration_sec
+                
+                logger.debug(f"片段 {i}: {start_ms/1000:.2f}s - {end_ms/1000:.2f}s (时长 {duration_sec:.2f}s)")
         
         removed_duration = original_duration - total_duration
         removed_percent = (removed_duration / original_duration) * 100
@@ -372,16 +558,104 @@ def split_audio_by_silence(audio_file, output_folder, logger,
 # CapCut 草稿创建
 # ============================================================================
 
-def create_capcut_draft(folder_name, audio_file, image_files, logger):
-    """创建 CapCut 草稿（支持多音频片段）"""
+def create_capcut_draft(folder_name, audio_file, image_files, logger, incremental=None,
+                        id_mode=None, layout_policy=None, split_mode=None,
+                        template=None, presplit_segments=None, draft_name=None):
+    """
+    创建 CapCut 草稿，并记录每个步骤的耗时（METRICS_FILE）与可选的性能分析（DRAFT_PROFILER）
+    
+    参数与返回值见 _build_capcut_draft
+    """
+    metrics = DraftMetrics(folder_name, METRICS_FILE)
+    profile_base = os.path.join(LOG_FOLDER, "profiles",
+                                f"{folder_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+    error = None
+    try:
+        with profiled(DRAFT_PROFILER, profile_base, logger), metrics.span("total"):
+            try:
+                return _build_capcut_draft(
+                    folder_name, audio_file, image_files, logger, incremental=incremental,
+                    id_mode=id_mode, layout_policy=layout_policy, split_mode=split_mode,
+                    template=template, presplit_segments=presplit_segments,
+                    draft_name=draft_name, metrics=metrics)
+            except BaseException as e:
+                error = type(e)
+                raise
+            finally:
+                metrics.end_step(error)
+    finally:
+        metrics.close(error)
+        if metrics.records:
+            logger.info(f"⏱️  耗时: {' | '.join(metrics.summary())} | 合计 {metrics.records[-1]['seconds']:.2f}s")
+        if not metrics.write():
+            logger.warning(f"⚠️  性能记录写入失败: {METRICS_FILE}")
+
+
+def resolve_draft_name(folder_name, incremental, logger=None):
+    """
+    决定草稿名：增量模式下固定为素材文件夹名（便于下次找到同一个草稿），否则加上时间
+    
+    同名草稿不是本工具生成的（没有增量清单）时不覆盖，改用带时间的草稿名并关闭增量
+    
+    Returns:
+        (草稿名, 是否增量)
+    """
+    draft_name = f"{folder_name}_{datetime.now().strftime('%H%M%S')}"
+    if not incremental:
+        return draft_name, False
+    fixed_folder = os.path.join(CAPCUT_DRAFTS_FOLDER, folder_name)
+    if os.path.exists(fixed_folder) and not os.path.exists(os.path.join(fixed_folder, MANIFEST_FILENAME)):
+        if logger:
+            logger.warning(f"⚠️  已有同名草稿 {folder_name}（非本工具生成），不覆盖，改为生成 {draft_name}")
+        return draft_name, False
+    return folder_name, True
+
+
+def _build_capcut_draft(folder_name, audio_file, image_files, logger, incremental=None,
+                        id_mode=None, layout_policy=None, split_mode=None,
+                        template=None, presplit_segments=None, draft_name=None, metrics=None):
+    """
+    创建 CapCut 草稿（支持多音频片段）
+    
+    Args:
+        folder_name: 素材文件夹名
+        audio_file: 音频文件
+        image_files: 图片文件列表
+        logger: 日志对象
+        incremental: 是否增量生成（None = 使用 INCREMENTAL_DRAFTS 配置）
+        id_mode: ID 生成模式 "random" / "deterministic"（None = 使用 DRAFT_ID_MODE 配置）
+        layout_policy: 图片分配策略（None = 使用 IMAGE_LAYOUT_POLICY 配置）
+        split_mode: 音频分段模式 "1"-"4" / 模式名 / "off"（None = 交互询问）
+        template: 模板草稿路径（None = 使用草稿目录中最近修改的草稿）
+        presplit_segments: 已按 split_mode 分好的音频片段 [(路径, 起始ms, 时长ms), ...]，
+                           批量模式在独立进程中预先分段时传入
+        draft_name: 草稿名（None = 由 resolve_draft_name 决定）；批量流水线预先决定，
+                    失败时据此清理写了一半的草稿
+        metrics: DraftMetrics，按步骤计时
+    """
+    metrics = metrics or DraftMetrics(folder_name)
+    if incremental is None:
+        incremental = INCREMENTAL_DRAFTS
     
     logger.info(f"\n{'='*70}")
     logger.info(f"🎬 开始创建 CapCut 草稿: {folder_name}")
     logger.info(f"{'='*70}")
     
+    if draft_name is None:
+        draft_name, incremental = resolve_draft_name(folder_name, incremental, logger)
+    draft_folder = os.path.join(CAPCUT_DRAFTS_FOLDER, draft_name)
+    metrics.draft = draft_name
+    
+    ids = DraftIdFactory(id_mode or DRAFT_ID_MODE, seed=folder_name)
+    manifest = DraftManifest.load(draft_folder, id_factory=ids) if incremental else None
+    reuse_draft = manifest is not None and not manifest.is_empty and os.path.isdir(draft_folder)
+    
     # 获取模板
     logger.debug("步骤 1/8: 获取模板草稿")
-    template_path = get_template_draft(logger)
+    metrics.step("step1_template")
+    template_path = template or (manifest.get("template_path") if reuse_draft else None)
+    if not template_path or not os.path.isdir(template_path):
+        template_path = get_template_draft(logger, exclude=draft_folder)
     if not template_path:
         return None
     
@@ -389,100 +663,212 @@ def create_capcut_draft(folder_name, audio_file, image_files, logger):
     
     # 创建草稿文件夹
     logger.debug("步骤 2/8: 创建草稿文件夹")
-    draft_name = f"{folder_name}_{datetime.now().strftime('%H%M%S')}"
-    draft_folder = os.path.join(CAPCUT_DRAFTS_FOLDER, draft_name)
-    
-    if os.path.exists(draft_folder):
-        logger.debug(f"删除已存在的草稿: {draft_folder}")
-        shutil.rmtree(draft_folder)
+    metrics.step("step2_draft_folder")
+    if reuse_draft:
+        logger.info(f"♻️  增量模式: 复用已有草稿 {draft_name}，只处理变化的素材")
+    else:
+        if os.path.exists(draft_folder):
+            logger.debug(f"删除已存在的草稿: {draft_folder}")
+            shutil.rmtree(draft_folder)
+        
+        logger.debug(f"复制模板到: {draft_folder}")
+        def copy_counted(src, dst):
+            metrics.add_bytes(os.path.getsize(src))
+            return shutil.copy2(src, dst)
+        shutil.copytree(template_path, draft_folder, copy_function=copy_counted)
+        logger.info(f"✅ 草稿文件夹创建完成")
     
-    logger.debug(f"复制模板到: {draft_folder}")
-    shutil.copytree(template_path, draft_folder)
-    logger.info(f"✅ 草稿文件夹创建完成")
+    # ID 生成：增量模式下按语义键复用上一次的 ID，新键交给 ID 工厂
+    new_id = manifest.id_for if manifest is not None else ids
     
     # 创建 media 文件夹
     logger.debug("步骤 3/8: 创建 media 文件夹")
+    metrics.step("step3_media_folder")
     media_folder = os.path.join(draft_folder, "Resources", "media")
-    audio_segments_folder = os.path.join(media_folder, "audio_segments")
-    os.makedirs(audio_segments_folder, exist_ok=True)
+    os.makedirs(media_folder, exist_ok=True)
     logger.debug(f"Media 文件夹: {media_folder}")
     
     # 音频智能分段
     logger.debug("步骤 4/8: 音频智能分段")
+    metrics.step("step4_split_audio")
     logger.info(f"\n🎵 处理音频: {os.path.basename(audio_file)}")
     
-    # 询问是否分段
+    # 分段模式：未指定时交互询问
     if PYDUB_AVAILABLE:
-        print("\n" + "-"*70)
-        print("🔇 是否启用音频智能分段？")
-        print("   - 自动检测并移除静音片段")
-        print("   - 在 CapCut 中每个片段独立，可手动调整")
-        print("-"*70)
-        use_split = input("启用分段？(y/n，默认: y): ").strip().lower()
-        
-        # 直接回车默认为 y
-        if use_split == '':
-            use_split = 'y'
-            print("✅ 使用默认选项: y")
+        if split_mode is None:
+            split_mode = ask_split_mode()
+        mode = normalize_split_mode(split_mode)
         
-        if use_split != 'n':
-            # 选择模式（优化后更激进）
-            print("\n分段模式（已优化：先加速 → 再消除静音）:")
-            print("  1. 保守 (>400ms, <-40dB) - 保留明显停顿")
-            print("  2. 标准 (>300ms, <-35dB) - 移除大部分间隙")
-            print("  3. 激进 (>200ms, <-30dB) - 最大化移除静音 ⭐ 推荐")
-            print("  4. 极限 (>150ms, <-25dB) - 删除所有细微间隙")
-            
-            mode = input("选择模式 (1-4，默认3): ").strip() or "3"
-            
-            params = {
-                "1": (400, -40),
-                "2": (300, -35),
-                "3": (200, -30),  # 默认推荐
-                "4": (150, -25)
-            }
-            
-            min_silence, thresh = params.get(mode, (200, -30))
+        split_params = None
+        if mode != SPLIT_MODE_OFF:
+            min_silence, thresh = SPLIT_MODES[mode]
+            split_params = [min_silence, thresh, AUDIO_SPEED]
             logger.info(f"使用模式: {mode} (min_silence={min_silence}ms, thresh={thresh}dB)")
             logger.info(f"⚡ 优化策略: 先加速到 {AUDIO_SPEED}x → 再检测静音 → 更彻底清理")
             
-            audio_segments = split_audio_by_silence(
-                audio_file, audio_segments_folder, logger,
-                min_silence_len=min_silence,
-                silence_thresh=thresh
-            )
+            reused_segments = manifest.reusable_audio_segments(audio_file, split_params) if reuse_draft else None
+            if reused_segments:
+                logger.info(f"♻️  音频与分段参数未变化，复用 {len(reused_segments)} 个已有片段")
+                audio_segments = reused_segments
+            elif presplit_segments is not None:
+                logger.info(f"✅ 使用预先分段的 {len(presplit_segments)} 个片段")
+                audio_segments = presplit_segments
+            else:
+                # 片段直接以最终文件名写入 media 文件夹，无需再复制
+                audio_segments = split_audio_by_silence(
+                    audio_file, media_folder, logger,
+                    min_silence_len=min_silence,
+                    silence_thresh=thresh,
+                    filename_pattern="audio_{index:02d}.mp3",
+                    metrics=metrics
+                )
         else:
             logger.info("跳过音频分段，使用原音频")
             audio_segments = [(audio_file, 0, None)]
     else:
         logger.warning("pydub 不可用，使用原音频")
+        split_params = None
         audio_segments = [(audio_file, 0, None)]
     
-    # 复制音频片段到 media 文件夹
-    logger.debug("步骤 5/8: 复制音频片段")
-    copied_audio_segments = []
-    for i, (segment_path, start_ms, duration_ms) in enumerate(audio_segments, 1):
-        dest_filename = f"audio_{i:02d}.mp3"
-        dest_path = os.path.join(media_folder, dest_filename)
-        shutil.copy2(segment_path, dest_path)
-        copied_audio_segments.append((dest_path, start_ms, duration_ms))
-        logger.debug(f"复制音频片段 {i}: {dest_filename}")
-    
-    logger.info(f"✅ 复制 {len(copied_audio_segments)} 个音频片段")
-    
-    # 复制图片
-    logger.debug("步骤 6/8: 复制图片文件")
-    copied_images = []
-    for i, img_file in enumerate(image_files, 1):
-        img_dest = os.path.join(media_folder, os.path.basename(img_file))
-        shutil.copy2(img_file, img_dest)
-        copied_images.append(img_dest)
-        logger.debug(f"复制图片 {i}: {os.path.basename(img_file)}")
-    
-    logger.info(f"✅ 复制 {len(copied_images)} 张图片")
+    # 图片预缩放：大于画布的图片换成缓存中缩小后的版本再导入
+    prescaled = {}
+    if PRESCALE_IMAGES:
+        metrics.step("prescale_images")
+        if PIL_AVAILABLE:
+            prescaled = prescale_images(image_files, (CANVAS_WIDTH, CANVAS_HEIGHT), workers=PRESCALE_WORKERS)
+            if prescaled:
+                cached_count = sum(1 for item in prescaled.values() if item.cached)
+                logger.info(f"🪄 预缩放 {len(prescaled)} 张图片到 {CANVAS_WIDTH}x{CANVAS_HEIGHT} 内"
+                            f"（缓存复用 {cached_count}）")
+        else:
+            logger.warning("⚠️  Pillow 未安装，跳过图片预缩放（pip install Pillow）")
+    
+    # 预渲染模糊背景：未安装 Pillow 时回退到实时模糊
+    prerender_blur = ENABLE_CANVAS_BLUR and CANVAS_BLUR_MODE == CANVAS_BLUR_PRERENDERED
+    if prerender_blur and not PIL_AVAILABLE:
+        logger.warning("⚠️  Pillow 未安装，背景模糊改为剪映实时计算（pip install Pillow）")
+        prerender_blur = False
+    
+    # 导入音频/图片与读取图片尺寸在有界线程池中并发执行（网络盘上各文件的延迟互相重叠）
+    with IngestPipeline(workers=INGEST_WORKERS) as pipeline:
+        # 读取图片尺寸只读源文件，与导入同时进行（只读文件头，结果按 路径+大小+修改时间 持久缓存）
+        image_meta_future = pipeline.run(probe_images, image_files)
+        
+        # 导入音频片段到 media 文件夹（分段结果已在 media 中，只有原音频需要导入）
+        logger.debug("步骤 5/8: 导入音频片段")
+        metrics.step("step5_import_audio")
+        copied_audio_segments = []
+        audio_imports = []
+        for i, (segment_path, start_ms, duration_ms) in enumerate(audio_segments, 1):
+            if os.path.dirname(os.path.abspath(segment_path)) == os.path.abspath(media_folder):
+                dest_path = segment_path
+            else:
+                ext = os.path.splitext(segment_path)[1] or ".mp3"
+                dest_path = os.path.join(media_folder, f"audio_{i:02d}{ext}")
+                audio_imports.append((i, dest_path, pipeline.submit(segment_path, dest_path, mode=MEDIA_INGEST_MODE)))
+            copied_audio_segments.append((dest_path, start_ms, duration_ms))
+        
+        if manifest is not None:
+            manifest.record_audio(audio_file, split_params, copied_audio_segments)
+        
+        # 导入图片（同一文件系统使用 reflink/硬链接，不重复占用空间）
+        logger.debug("步骤 6/8: 导入图片文件")
+        metrics.step("step6_import_images")
+        copied_images = []
+        image_imports = []
+        image_names = {os.path.basename(img_file) for img_file in image_files}
+        for img_file in image_files:
+            source = img_file
+            img_dest = os.path.join(media_folder, os.path.basename(img_file))
+            if img_file in prescaled:
+                # 保留原文件名，扩展名随缩放结果的格式（与其它图片重名时在原文件名后追加扩展名）
+                source = prescaled[img_file].path
+                ext = os.path.splitext(source)[1]
+                if not img_dest.lower().endswith(ext):
+                    renamed = os.path.splitext(img_dest)[0] + ext
+                    img_dest = img_dest + ext if os.path.basename(renamed) in image_names else renamed
+            if reuse_draft and manifest.image_unchanged(source, img_dest):
+                future = None
+            else:
+                future = pipeline.submit(source, img_dest, mode=MEDIA_INGEST_MODE)
+            if manifest is not None:
+                manifest.record_image(source, img_dest)
+            copied_images.append(img_dest)
+            image_imports.append((img_file, img_dest, future))
+        
+        # 模糊背景在进程池中渲染（从导入的图片渲染，预缩放后的图片更快），与导入同时进行
+        if prerender_blur:
+            image_sources = [prescaled[img].path if img in prescaled else img for img in image_files]
+            backdrops_future = pipeline.run(render_backdrops, image_sources, (CANVAS_WIDTH, CANVAS_HEIGHT),
+                                            CANVAS_BLUR_AMOUNT, workers=PRESCALE_WORKERS)
+        
+        # 等待导入完成（按提交顺序收集结果，日志与统计和逐个导入时一致）
+        metrics.step("wait_ingest")
+        audio_methods = []
+        for i, dest_path, future in audio_imports:
+            method = future.result()
+            if method == INGEST_COPY:
+                metrics.add_bytes(os.path.getsize(dest_path))
+            audio_methods.append(method)
+            logger.debug(f"导入音频片段 {i}: {os.path.basename(dest_path)} ({method})")
+        
+        logger.info(f"✅ 导入 {len(copied_audio_segments)} 个音频片段")
+        if audio_methods:
+            logger.debug(f"音频导入方式: {summarize_methods(audio_methods)}")
+        
+        image_methods = []
+        for i, (img_file, img_dest, future) in enumerate(image_imports, 1):
+            method = future.result() if future is not None else INGEST_SKIP
+            if method == INGEST_COPY:
+                metrics.add_bytes(os.path.getsize(img_dest))
+            image_methods.append(method)
+            logger.debug(f"导入图片 {i}: {os.path.basename(img_file)} ({method})")
+        
+        logger.info(f"✅ 导入 {len(copied_images)} 张图片（{summarize_methods(image_methods)}）")
+        
+        # 导入模糊背景（有图片渲染失败时整份草稿回退到实时模糊）
+        backdrop_paths = []
+        if prerender_blur:
+            metrics.step("render_backdrops")
+            rendered = backdrops_future.result()
+            if all(source in rendered for source in image_sources):
+                backdrop_imports = []
+                for img_dest, source in zip(copied_images, image_sources):
+                    backdrop = rendered[source]
+                    # 按完整文件名命名（a.jpg / a.png 的背景不会重名）
+                    backdrop_dest = f"{img_dest}_backdrop.jpg"
+                    if reuse_draft and manifest.image_unchanged(backdrop.path, backdrop_dest):
+                        future = None
+                    else:
+                        future = pipeline.submit(backdrop.path, backdrop_dest, mode=MEDIA_INGEST_MODE)
+                    if manifest is not None:
+                        manifest.record_image(backdrop.path, backdrop_dest)
+                    backdrop_paths.append(backdrop_dest)
+                    backdrop_imports.append(future)
+                for future in backdrop_imports:
+                    if future is not None:
+                        future.result()
+                cached_count = sum(1 for source in image_sources if rendered[source].cached)
+                logger.info(f"🌫️  预渲染 {len(backdrop_paths)} 张模糊背景（缓存复用 {cached_count}）")
+            else:
+                logger.warning("⚠️  部分模糊背景渲染失败，背景模糊改为剪映实时计算")
+                prerender_blur = False
+        
+        metrics.step("probe_images")
+        image_meta = image_meta_future.result()
+        for img_file, item in prescaled.items():
+            image_meta[img_file] = (item.width, item.height, item.format)
+    
+    # 增量模式：删除上一次生成、本次不再使用的音频片段和图片
+    if reuse_draft:
+        keep_paths = [path for path, _, _ in copied_audio_segments] + copied_images + backdrop_paths
+        for stale_path in manifest.stale_media_files(media_folder, keep_paths):
+            os.remove(stale_path)
+            logger.debug(f"删除不再使用的素材: {os.path.basename(stale_path)}")
     
     # 计算总时长
     logger.debug("步骤 7/8: 计算总时长")
+    metrics.step("step7_duration")
     total_duration_micro = 0
     for audio_path, _, duration_ms in copied_audio_segments:
         if duration_ms:
@@ -490,7 +876,7 @@ def create_capcut_draft(folder_name, audio_file, image_files, logger):
         else:
             # 如果没有 duration_ms，读取文件实际时长
             try:
-                audio_meta = MutagenFile(audio_path)
+                audio_meta = read_audio_meta(audio_path)
                 segment_duration_sec = audio_meta.info.length
                 total_duration_micro += int(segment_duration_sec * 1000000)
             except:
@@ -501,19 +887,22 @@ def create_capcut_draft(folder_name, audio_file, image_files, logger):
     
     # 修改草稿文件
     logger.debug("步骤 8/8: 生成草稿 JSON")
+    metrics.step("step8_draft_json")
     draft_info_path = os.path.join(draft_folder, "draft_info.json")
     
-    with open(draft_info_path, 'r', encoding='utf-8') as f:
+    # 始终以模板内容为基础（增量模式下草稿中的 JSON 已是上一次的生成结果）
+    with open(os.path.join(template_path, "draft_info.json"), 'r', encoding='utf-8') as f:
         draft = json.load(f)
     
     # 更新基本信息
     draft['draft_name'] = draft_name
     draft['draft_root_path'] = draft_folder
-    draft['id'] = str(uuid.uuid4()).upper()
+    draft['id'] = new_id("draft")
     draft['duration'] = total_duration_micro
     
     now_micro = int(datetime.now().timestamp() * 1000000)
-    draft['create_time'] = now_micro
+    create_time = manifest.get("create_time") if reuse_draft else None
+    draft['create_time'] = create_time or now_micro
     draft['update_time'] = now_micro
     
     # 9:16 竖屏画布（手机视频）
@@ -531,68 +920,32 @@ def create_capcut_draft(folder_name, audio_file, image_files, logger):
     shake_effect_id = None
     if ENABLE_SHAKE_EFFECT:
         logger.info(f"\n🎨 添加震动画面特效...")
-        shake_effect_id = str(uuid.uuid4()).upper()
+        shake_effect_id = new_id("effect:shake")
         
         # 确保 video_effects 列表存在（真实草稿中特效在这里，不是material_animations）
         if 'video_effects' not in draft['materials']:
             draft['materials']['video_effects'] = []
         
-        # 震动特效（UI范围0-100，公式：JSON = UI÷100）
-        shake_effect = {
-            "adjust_params": [
-                {
-                    "default_value": 0.5,
-                    "name": "effects_adjust_intensity",
-                    "value": SHAKE_INTENSITY / 100.0  # UI值5 → 0.05
-                },
-                {
-                    "default_value": 0.33,
-                    "name": "effects_adjust_speed",
-                    "value": SHAKE_SPEED / 100.0  # UI值2 → 0.02
-                }
-            ],
-            "algorithm_artifact_path": "",
-            "apply_target_type": 2,
-            "apply_time_range": None,
-            "bind_segment_id": "",
-            "category_id": "100000",
-            "category_name": "画面特效",
-            "common_keyframes": [],
-            "covering_relation_change": 0,
-            "disable_effect_faces": [],
-            "effect_id": "7399470393884527877",
-            "effect_mask": [],
-            "enable_mask": True,
-            "formula_id": "",
-            "id": shake_effect_id,
-            "item_effect_type": 0,
-            "name": "震动",
-            "path": "/Users/mac/Library/Containers/com.lemon.lvoverseas/Data/Movies/CapCut/User Data/Cache/effect/7399470393884527877/d11532bfbfbd6f9af59026c2c42f2570",
-            "platform": "all",
-            "render_index": 0,
-            "request_id": str(uuid.uuid4()).upper(),
-            "resource_id": "7399470393884527877",
-            "source_platform": 1,
-            "sub_type": 0,
-            "time_range": None,
-            "track_render_index": 0,
-            "transparent_params": "",
-            "type": "video_effect",
-            "value": 1.0,
-            "version": ""
-        }
+        # 震动特效（UI范围0-100，公式：JSON = UI÷100；资源信息见 effect_catalog.json）
+        shake_effect = load_catalog().effect(
+            "shake", shake_effect_id, new_id("effect:shake:request"),
+            effects_adjust_intensity=SHAKE_INTENSITY / 100.0,  # UI值5 → 0.05
+            effects_adjust_speed=SHAKE_SPEED / 100.0           # UI值2 → 0.02
+        )
         
         draft['materials']['video_effects'].append(shake_effect)
         logger.info(f"✅ 震动特效已添加到 video_effects（UI强度={SHAKE_INTENSITY:.0f}, 速度={SHAKE_SPEED:.0f} → JSON值={SHAKE_INTENSITY/100:.2f}, {SHAKE_SPEED/100:.2f}）")
         logger.debug(f"特效ID: {shake_effect_id}, 公式: JSON = UI ÷ 100")
     
     # 添加多个音频材料（每个片段独立）
+    # 材料与片段只记录精简信息，完整的 JSON 条目在写入文件时才逐个生成
     logger.debug("添加音频材料...")
     audio_material_ids = []
+    audio_records = []
     for i, (audio_path, _, duration_ms) in enumerate(copied_audio_segments, 1):
         # 获取精确时长
         try:
-            audio_meta = MutagenFile(audio_path)
+            audio_meta = read_audio_meta(audio_path)
             duration_micro = int(audio_meta.info.length * 1000000)
         except:
             if duration_ms:
@@ -600,22 +953,17 @@ def create_capcut_draft(folder_name, audio_file, image_files, logger):
             else:
                 duration_micro = 3000000
         
-        audio_id = str(uuid.uuid4()).upper()
-        audio_material = {
-            "app_id": 0,
-            "category_id": "",
-            "check_flag": 1,
-            "duration": duration_micro,
-            "id": audio_id,
-            "name": os.path.basename(audio_path),
-            "path": audio_path,
-            "type": "extract_music",
-            "wave_points": []
-        }
-        draft['materials']['audios'].append(audio_material)
+        audio_id = new_id(f"audio:{os.path.basename(audio_path)}:{file_fingerprint(audio_path)}")
+        audio_records.append((audio_id, new_id(f"audio_local:{audio_id}"), audio_path, duration_micro))
         audio_material_ids.append((audio_id, duration_micro))
         logger.debug(f"音频片段 {i}: {duration_micro/1000000:.2f}秒")
     
+    # 时间线按音频材料的实际时长排列（导出的 mp3 比分段时长略长），总时长以此为准
+    if audio_material_ids:
+        total_duration_micro = sum(d for _, d in audio_material_ids)
+        total_duration_sec = total_duration_micro / 1000000
+        draft['duration'] = total_duration_micro
+    
     # 添加开头音效（如果存在）
     intro_sound_id = None
     intro_sound_duration = 0
@@ -625,27 +973,16 @@ def create_capcut_draft(folder_name, audio_file, image_files, logger):
         logger.info(f"\n🔔 检测到开头音效: {INTRO_SOUND_FILE}")
         try:
             # 获取音效时长
-            sound_meta = MutagenFile(intro_sound_path)
+            sound_meta = read_audio_meta(intro_sound_path)
             intro_sound_duration = int(sound_meta.info.length * 1000000)
             
-            # 复制音效到 media 文件夹
+            # 导入音效到 media 文件夹
             sound_dest = os.path.join(media_folder, INTRO_SOUND_FILE)
-            shutil.copy2(intro_sound_path, sound_dest)
+            ingest_file(intro_sound_path, sound_dest, mode=MEDIA_INGEST_MODE)
             
             # 添加音效材料
-            intro_sound_id = str(uuid.uuid4()).upper()
-            sound_material = {
-                "app_id": 0,
-                "category_id": "",
-                "check_flag": 1,
-                "duration": intro_sound_duration,
-                "id": intro_sound_id,
-                "name": INTRO_SOUND_FILE,
-                "path": sound_dest,
-                "type": "extract_music",
-                "wave_points": []
-            }
-            draft['materials']['audios'].append(sound_material)
+            intro_sound_id = new_id(f"audio:intro:{file_fingerprint(intro_sound_path)}")
+            intro_sound_local_id = new_id(f"audio_local:{intro_sound_id}")
             
             logger.info(f"✅ 添加开头音效: {INTRO_SOUND_FILE} (时长 {intro_sound_duration/1000000:.2f}秒)")
             logger.debug(f"音效路径: {sound_dest}")
@@ -655,641 +992,132 @@ def create_capcut_draft(folder_name, audio_file, image_files, logger):
     else:
         logger.debug(f"未找到开头音效文件: {intro_sound_path}")
     
+    def iter_audio_materials():
+        for audio_id, local_id, audio_path, duration_micro in audio_records:
+            yield build_audio_material(audio_id, audio_path, os.path.basename(audio_path),
+                                       duration_micro, local_id)
+        if intro_sound_id:
+            yield build_audio_material(intro_sound_id, sound_dest, INTRO_SOUND_FILE,
+                                       intro_sound_duration, intro_sound_local_id)
+    
+    draft['materials']['audios'] = StreamedArray(iter_audio_materials())
+    
     # 添加图片材料
     logger.debug("添加图片材料...")
-    image_ids = []
-    for img_path in copied_images:
-        # 读取图片实际尺寸
+    image_records = []
+    for img_file, img_path in zip(image_files, copied_images):
+        # 图片实际尺寸
         img_width, img_height = 1920, 1080  # 默认值
-        if PIL_AVAILABLE:
-            try:
-                with Image.open(img_path) as img:
-                    img_width, img_height = img.size
-                    logger.debug(f"图片尺寸: {img_width}x{img_height}")
-            except Exception as e:
-                logger.warning(f"无法读取图片尺寸: {e}")
-        
-        img_id = str(uuid.uuid4()).upper()
-        local_material_id = str(uuid.uuid4()).upper()
+        meta = image_meta.get(img_file)
+        if meta:
+            img_width, img_height = meta[0], meta[1]
+            logger.debug(f"图片尺寸: {img_width}x{img_height} ({meta[2]})")
+        else:
+            logger.warning(f"无法读取图片尺寸: {os.path.basename(img_file)}")
         
-        image_material = {
-            "aigc_type": "none",
-            "category_id": "",
-            "category_name": "local",
-            "check_flag": 63487,
-            "crop": {
-                "lower_left_x": 0.0, "lower_left_y": 1.0,
-                "lower_right_x": 1.0, "lower_right_y": 1.0,
-                "upper_left_x": 0.0, "upper_left_y": 0.0,
-                "upper_right_x": 1.0, "upper_right_y": 0.0
-            },
-            "duration": 10800000000,
-            "extra_type_option": 0,
-            "file_Path": img_path,
-            "has_audio": False,
-            "height": img_height,
-            "width": img_width,
-            "id": img_id,
-            "intensifies_path": "",
-            "is_ai_generate": False,
-            "is_unified_beauty_mode": False,
-            "local_material_id": local_material_id,
-            "material_id": "",
-            "material_name": os.path.basename(img_path),
-            "material_url": "",
-            "matting": {
-                "flag": 0,
-                "has_use_quick_brush": False,
-                "has_use_quick_eraser": False,
-                "interactiveTime": [],
-                "path": "",
-                "strokes": []
-            },
-            "media_path": "",
-            "object_locked": None,
-            "origin_material_id": "",
-            "path": img_path,
-            "picture_from": "none",
-            "picture_set_category_id": "",
-            "picture_set_category_name": "",
-            "request_id": "",
-            "reverse_intensifies_path": "",
-            "reverse_path": "",
-            "source_platform": 0,
-            "stable": False,
-            "team_id": "",
-            "type": "photo",
-            "video_algorithm": {
-                "algorithms": [],
-                "deflicker": None,
-                "motion_blur_config": None,
-                "noise_reduction": None,
-                "path": "",
-                "quality_enhance": None,
-                "time_range": None
-            }
-        }
-        draft['materials']['videos'].append(image_material)
-        image_ids.append((img_id, local_material_id))
+        img_key = f"{os.path.basename(img_file)}:{file_fingerprint(img_file)}"
+        img_id = new_id(f"image:{img_key}")
+        local_material_id = new_id(f"image_local:{img_key}")
+        image_records.append((img_id, local_material_id, img_path, img_width, img_height))
     
-    # 添加背景模糊填充材料（如果启用）
-    canvas_blur_ids = []
-    if ENABLE_CANVAS_BLUR:
-        logger.info(f"\n🖼️  添加背景模糊填充...")
-        
-        # 确保 canvases 列表存在
-        if 'canvases' not in draft['materials']:
-            draft['materials']['canvases'] = []
-        
-        # 为每个图片创建一个canvas_blur
-        for i, (img_id, _) in enumerate(image_ids):
-            canvas_blur_id = str(uuid.uuid4()).upper()
-            canvas_blur = {
-                "album_image": "",
-                "blur": CANVAS_BLUR_AMOUNT,
-                "color": "",
-                "id": canvas_blur_id,
-                "image": "",
-                "image_id": "",
-                "image_name": "",
-                "source_platform": 0,
-                "team_id": "",
-                "type": "canvas_blur"
-            }
-            draft['materials']['canvases'].append(canvas_blur)
-            canvas_blur_ids.append(canvas_blur_id)
-            logger.debug(f"为图片 {i+1} 创建背景模糊: blur={CANVAS_BLUR_AMOUNT}")
-        
-        logger.info(f"✅ 创建了 {len(canvas_blur_ids)} 个背景模糊填充（模糊度: {CANVAS_BLUR_AMOUNT*100:.1f}%）")
-    
-    # 添加必要的默认材料（为每个片段创建独立的材料）
-    logger.info(f"\n🔧 创建默认材料（speeds, colors等）...")
-    default_materials_list = []
-    
-    # 为每个图片片段创建一套默认材料
-    for i in range(len(image_ids)):
-        # 1. Speed (速度控制)
-        speed_id = str(uuid.uuid4()).upper()
-        if 'speeds' not in draft['materials']:
-            draft['materials']['speeds'] = []
-        draft['materials']['speeds'].append({
-            "curve_speed": None,
-            "id": speed_id,
-            "mode": 0,
-            "speed": 1.0,
-            "type": "speed"
-        })
-        
-        # 2. Placeholder Info (占位符信息)
-        placeholder_id = str(uuid.uuid4()).upper()
-        if 'placeholder_infos' not in draft['materials']:
-            draft['materials']['placeholder_infos'] = []
-        draft['materials']['placeholder_infos'].append({
-            "error_path": "",
-            "error_text": "",
-            "id": placeholder_id,
-            "meta_type": "none",
-            "res_path": "",
-            "res_text": "",
-            "type": "placeholder_info"
-        })
-        
-        # 3. Sound Channel Mapping (音频通道映射)
-        sound_channel_id = str(uuid.uuid4()).upper()
-        if 'sound_channel_mappings' not in draft['materials']:
-            draft['materials']['sound_channel_mappings'] = []
-        draft['materials']['sound_channel_mappings'].append({
-            "audio_channel_mapping": 0,
-            "id": sound_channel_id,
-            "is_config_open": False,
-            "type": ""
-        })
-        
-        # 4. Material Color (材料颜色)
-        color_id = str(uuid.uuid4()).upper()
-        if 'material_colors' not in draft['materials']:
-            draft['materials']['material_colors'] = []
-        draft['materials']['material_colors'].append({
-            "gradient_angle": 90.0,
-            "gradient_colors": [],
-            "gradient_percents": [],
-            "height": 0.0,
-            "id": color_id,
-            "is_color_clip": False,
-            "is_gradient": False,
-            "solid_color": "",
-            "width": 0.0
-        })
-        
-        # 5. Loudness (响度)
-        loudness_id = str(uuid.uuid4()).upper()
-        if 'loudnesses' not in draft['materials']:
-            draft['materials']['loudnesses'] = []
-        draft['materials']['loudnesses'].append({
-            "enable": False,
-            "file_id": "",
-            "id": loudness_id,
-            "loudness_param": None,
-            "target_loudness": 0.0,
-            "time_range": None
-        })
-        
-        # 6. Vocal Separation (人声分离)
-        vocal_id = str(uuid.uuid4()).upper()
-        if 'vocal_separations' not in draft['materials']:
-            draft['materials']['vocal_separations'] = []
-        draft['materials']['vocal_separations'].append({
-            "choice": 0,
-            "enter_from": "",
-            "final_algorithm": "",
-            "id": vocal_id,
-            "production_path": "",
-            "removed_sounds": [],
-            "time_range": None,
-            "type": "vocal_separation"
-        })
-        
-        # 保存这一套材料的ID（顺序很重要）
-        default_materials_list.append({
-            "speed_id": speed_id,
-            "placeholder_id": placeholder_id,
-            "sound_channel_id": sound_channel_id,
-            "color_id": color_id,
-            "loudness_id": loudness_id,
-            "vocal_id": vocal_id
-        })
-    
-    logger.info(f"✅ 创建了 {len(default_materials_list)} 套默认材料")
-    
-    # 添加本地素材列表（显示在左侧素材库）
+    # 预渲染的模糊背景：每张图片一个画布大小的图片材料（不加入左侧素材库）
+    backdrop_ids = [new_id(f"backdrop:{record[0]}") for record in image_records] if prerender_blur else []
+    
+    def iter_video_materials():
+        for record in image_records:
+            yield build_image_material(*record)
+        for backdrop_id, backdrop_path in zip(backdrop_ids, backdrop_paths):
+            yield build_image_material(backdrop_id, "", backdrop_path, CANVAS_WIDTH, CANVAS_HEIGHT)
+    
+    draft['materials']['videos'] = StreamedArray(iter_video_materials())
+    
+    # 添加本地素材列表（显示在左侧素材库）：图片 → 音频 → 开头音效
     logger.debug("创建本地素材列表...")
-    local_materials = []
-    
-    # 添加所有图片到本地素材
-    for img_id, local_material_id in image_ids:
-        # 找到对应的素材信息
-        img_material = next((m for m in draft['materials']['videos'] if m['id'] == img_id), None)
-        if img_material:
-            local_material = {
-                "create_time": now_micro,
-                "duration": img_material['duration'],
-                "extra_info": "",
-                "file_Path": img_material['path'],
-                "file_name": img_material['material_name'],
-                "file_size": os.path.getsize(img_material['path']) if os.path.exists(img_material['path']) else 0,
-                "height": img_material['height'],
-                "width": img_material['width'],
-                "id": local_material_id,
-                "import_time": now_micro,
-                "import_time_ms": now_micro,
-                "item_source": 1,
-                "md5": "",
-                "metetype": "photo",
-                "roughcut_time_range": {
-                    "duration": -1,
-                    "start": -1
-                },
-                "sub_time_range": {
-                    "duration": -1,
-                    "start": -1
-                },
-                "type": 0
-            }
-            local_materials.append(local_material)
-    
-    # 添加所有音频到本地素材
-    for audio_id, duration_micro in audio_material_ids:
-        audio_material = next((m for m in draft['materials']['audios'] if m['id'] == audio_id), None)
-        if audio_material:
-            local_material_id = str(uuid.uuid4()).upper()
-            local_material = {
-                "create_time": now_micro,
-                "duration": duration_micro,
-                "extra_info": "",
-                "file_Path": audio_material['path'],
-                "file_name": audio_material['name'],
-                "file_size": os.path.getsize(audio_material['path']) if os.path.exists(audio_material['path']) else 0,
-                "height": 0,
-                "width": 0,
-                "id": local_material_id,
-                "import_time": now_micro,
-                "import_time_ms": now_micro,
-                "item_source": 1,
-                "md5": "",
-                "metetype": "music",
-                "roughcut_time_range": {
-                    "duration": -1,
-                    "start": -1
-                },
-                "sub_time_range": {
-                    "duration": -1,
-                    "start": -1
-                },
-                "type": 1
-            }
-            local_materials.append(local_material)
-            # 更新音频材料的 local_material_id
-            audio_material['local_material_id'] = local_material_id
-    
-    # 添加开头音效到本地素材（如果存在）
-    if intro_sound_id:
-        sound_material = next((m for m in draft['materials']['audios'] if m['id'] == intro_sound_id), None)
-        if sound_material:
-            local_material_id = str(uuid.uuid4()).upper()
-            local_material = {
-                "create_time": now_micro,
-                "duration": intro_sound_duration,
-                "extra_info": "",
-                "file_Path": sound_material['path'],
-                "file_name": sound_material['name'],
-                "file_size": os.path.getsize(sound_material['path']) if os.path.exists(sound_material['path']) else 0,
-                "height": 0,
-                "width": 0,
-                "id": local_material_id,
-                "import_time": now_micro,
-                "import_time_ms": now_micro,
-                "item_source": 1,
-                "md5": "",
-                "metetype": "music",
-                "roughcut_time_range": {
-                    "duration": -1,
-                    "start": -1
-                },
-                "sub_time_range": {
-                    "duration": -1,
-                    "start": -1
-                },
-                "type": 1
-            }
-            local_materials.append(local_material)
-            sound_material['local_material_id'] = local_material_id
-            logger.debug(f"添加音效到本地素材: {INTRO_SOUND_FILE}")
+    
+    def iter_local_materials():
+        for _, local_id, img_path, img_width, img_height in image_records:
+            yield build_local_material(local_id, img_path, os.path.basename(img_path), 10800000000,
+                                       now_micro, img_width, img_height, metetype="photo")
+        for _, local_id, audio_path, duration_micro in audio_records:
+            yield build_local_material(local_id, audio_path, os.path.basename(audio_path),
+                                       duration_micro, now_micro)
+        if intro_sound_id:
+            yield build_local_material(intro_sound_local_id, sound_dest, INTRO_SOUND_FILE,
+                                       intro_sound_duration, now_micro)
     
     # 将本地素材列表添加到草稿
     if 'materials' not in draft:
         draft['materials'] = {}
-    draft['materials']['local_materials'] = local_materials
-    logger.debug(f"本地素材列表: {len(local_materials)} 个（{len(image_ids)} 图片 + {len(audio_material_ids)} 音频）")
+    draft['materials']['local_materials'] = StreamedArray(iter_local_materials())
+    local_material_count = len(image_records) + len(audio_records) + (1 if intro_sound_id else 0)
+    logger.debug(f"本地素材列表: {local_material_count} 个（{len(image_records)} 图片 + {len(audio_material_ids)} 音频）")
     
     # 清空轨道
     draft['tracks'] = []
     
-    # 创建视频轨道（智能分配图片到音频）
+    # 创建视频轨道（布局引擎一次性计算图片分配，这里只负责生成 JSON）
     logger.debug("创建视频轨道（智能图片分配）...")
+    policy = make_policy(layout_policy or IMAGE_LAYOUT_POLICY)
     logger.info(f"\n🎨 智能图片分配策略:")
-    logger.info(f"  • 短音频 (<1.5秒) → 配 1 张图片，跳过下一张")
-    logger.info(f"  • 长音频 (≥1.5秒) → 配 2 张图片，平均分配")
-    
-    video_segments = []
-    current_time = 0
-    image_index = 0  # 当前使用的图片索引
-    
-    # 遍历每个音频段，智能分配图片
-    canvas_blur_index = 0  # 跟踪当前使用的canvas_blur索引
-    default_material_index = 0  # 跟踪当前使用的默认材料索引
-    for audio_idx, (audio_id, duration_micro) in enumerate(audio_material_ids):
-        audio_duration_sec = duration_micro / 1000000
-        
-        logger.debug(f"\n音频段 {audio_idx + 1}: 时长 {audio_duration_sec:.2f}秒")
-        
-        # 判断音频时长
-        if audio_duration_sec < 1.5:
-            # 短音频：只配一张图片，跳过下一张图片
-            if image_index < len(image_ids):
-                img_id, local_material_id = image_ids[image_index]
-                segment = {
-                    "caption_info": None,
-                    "cartoon": False,
-                    "clip": {
-                        "alpha": 1.0,
-                        "flip": {"horizontal": False, "vertical": False},
-                        "rotation": 0.0,
-                        "scale": {"x": 1.0, "y": 1.0},
-                        "transform": {"x": 0.0, "y": 0.0}
-                    },
-                    "common_keyframes": [],
-                    "enable_adjust": True,
-                    "enable_color_curves": True,
-                    "enable_color_match_adjust": False,
-                    "enable_color_wheels": True,
-                    "enable_lut": True,
-                    "enable_smart_color_adjust": False,
-                    "extra_material_refs": [],
-                    "group_id": "",
-                    "hdr_settings": {"intensity": 1.0, "mode": 1, "nits": 1000},
-                    "id": str(uuid.uuid4()).upper(),
-                    "intensifies_audio": False,
-                    "is_placeholder": False,
-                    "is_tone_modify": False,
-                    "keyframe_refs": [],
-                    "last_nonzero_volume": 1.0,
-                    "material_id": img_id,
-                    "render_index": len(video_segments) + 1,
-                    "responsive_layout": {
-                        "enable": False,
-                        "horizontal_pos_layout": 0,
-                        "size_layout": 0,
-                        "target_follow": "",
-                        "vertical_pos_layout": 0
-                    },
-                    "reverse": False,
-                    "source_timerange": {"start": 0, "duration": duration_micro},
-                    "speed": 1.0,
-                    "target_timerange": {"start": current_time, "duration": duration_micro},
-                    "template_id": "",
-                    "template_scene": "default",
-                    "track_attribute": 0,
-                    "track_render_index": 1,
-                    "uniform_scale": {"on": True, "value": 1.0},
-                    "visible": True,
-                    "volume": 1.0
-                }
-                # 按顺序添加所有材料到extra_material_refs（固定8个，顺序很重要）
-                if default_material_index < len(default_materials_list):
-                    mats = default_materials_list[default_material_index]
-                    # 1. Speed
-                    segment["extra_material_refs"].append(mats["speed_id"])
-                    # 2. Placeholder
-                    segment["extra_material_refs"].append(mats["placeholder_id"])
-                    # 3. Canvas (如果启用背景模糊)
-                    if ENABLE_CANVAS_BLUR and canvas_blur_index < len(canvas_blur_ids):
-                        segment["extra_material_refs"].append(canvas_blur_ids[canvas_blur_index])
-                        canvas_blur_index += 1
-                    # 4. Material Animation (空，保留位置)
-                    # 5. Sound Channel
-                    segment["extra_material_refs"].append(mats["sound_channel_id"])
-                    # 6. Color
-                    segment["extra_material_refs"].append(mats["color_id"])
-                    # 7. Loudness
-                    segment["extra_material_refs"].append(mats["loudness_id"])
-                    # 8. Vocal Separation
-                    segment["extra_material_refs"].append(mats["vocal_id"])
-                    default_material_index += 1
-                video_segments.append(segment)
-                logger.debug(f"  短音频配1张图片: 图片{image_index + 1} (时长{audio_duration_sec:.2f}秒)")
-                
-                # 跳过下一张图片（增加视觉节奏感）
-                if image_index + 1 < len(image_ids):
-                    logger.debug(f"  ⏭️  跳过图片{image_index + 2}（优化视觉节奏）")
-                image_index += 2
-            else:
-                logger.warning(f"  警告: 音频段 {audio_idx + 1} 没有足够的图片")
-        
-        else:
-            # 长音频：配两张图片，平均分配时间
-            if image_index + 1 < len(image_ids):
-                half_duration = duration_micro // 2
-                remaining_duration = duration_micro - half_duration
-                
-                # 第一张图片（前半段）
-                first_img_id, first_local_id = image_ids[image_index]
-                first_segment = {
-                    "caption_info": None,
-                    "cartoon": False,
-                    "clip": {
-                        "alpha": 1.0,
-                        "flip": {"horizontal": False, "vertical": False},
-                        "rotation": 0.0,
-                        "scale": {"x": 1.0, "y": 1.0},
-                        "transform": {"x": 0.0, "y": 0.0}
-                    },
-                    "common_keyframes": [],
-                    "enable_adjust": True,
-                    "enable_color_curves": True,
-                    "enable_color_match_adjust": False,
-                    "enable_color_wheels": True,
-                    "enable_lut": True,
-                    "enable_smart_color_adjust": False,
-                    "extra_material_refs": [],
-                    "group_id": "",
-                    "hdr_settings": {"intensity": 1.0, "mode": 1, "nits": 1000},
-                    "id": str(uuid.uuid4()).upper(),
-                    "intensifies_audio": False,
-                    "is_placeholder": False,
-                    "is_tone_modify": False,
-                    "keyframe_refs": [],
-                    "last_nonzero_volume": 1.0,
-                    "material_id": first_img_id,
-                    "render_index": len(video_segments) + 1,
-                    "responsive_layout": {
-                        "enable": False,
-                        "horizontal_pos_layout": 0,
-                        "size_layout": 0,
-                        "target_follow": "",
-                        "vertical_pos_layout": 0
-                    },
-                    "reverse": False,
-                    "source_timerange": {"start": 0, "duration": half_duration},
-                    "speed": 1.0,
-                    "target_timerange": {"start": current_time, "duration": half_duration},
-                    "template_id": "",
-                    "template_scene": "default",
-                    "track_attribute": 0,
-                    "track_render_index": 1,
-                    "uniform_scale": {"on": True, "value": 1.0},
-                    "visible": True,
-                    "volume": 1.0
-                }
-                # 按顺序添加所有材料到extra_material_refs（第一张图片，固定8个）
-                if default_material_index < len(default_materials_list):
-                    mats = default_materials_list[default_material_index]
-                    first_segment["extra_material_refs"].append(mats["speed_id"])
-                    first_segment["extra_material_refs"].append(mats["placeholder_id"])
-                    if ENABLE_CANVAS_BLUR and canvas_blur_index < len(canvas_blur_ids):
-                        first_segment["extra_material_refs"].append(canvas_blur_ids[canvas_blur_index])
-                        canvas_blur_index += 1
-                    # Material Animation (空，保留位置)
-                    first_segment["extra_material_refs"].append(mats["sound_channel_id"])
-                    first_segment["extra_material_refs"].append(mats["color_id"])
-                    first_segment["extra_material_refs"].append(mats["loudness_id"])
-                    first_segment["extra_material_refs"].append(mats["vocal_id"])
-                    default_material_index += 1
-                
-                # 第二张图片（后半段）
-                second_img_id, second_local_id = image_ids[image_index + 1]
-                second_segment = {
-                    "caption_info": None,
-                    "cartoon": False,
-                    "clip": {
-                        "alpha": 1.0,
-                        "flip": {"horizontal": False, "vertical": False},
-                        "rotation": 0.0,
-                        "scale": {"x": 1.0, "y": 1.0},
-                        "transform": {"x": 0.0, "y": 0.0}
-                    },
-                    "common_keyframes": [],
-                    "enable_adjust": True,
-                    "enable_color_curves": True,
-                    "enable_color_match_adjust": False,
-                    "enable_color_wheels": True,
-                    "enable_lut": True,
-                    "enable_smart_color_adjust": False,
-                    "extra_material_refs": [],
-                    "group_id": "",
-                    "hdr_settings": {"intensity": 1.0, "mode": 1, "nits": 1000},
-                    "id": str(uuid.uuid4()).upper(),
-                    "intensifies_audio": False,
-                    "is_placeholder": False,
-                    "is_tone_modify": False,
-                    "keyframe_refs": [],
-                    "last_nonzero_volume": 1.0,
-                    "material_id": second_img_id,
-                    "render_index": len(video_segments) + 2,
-                    "responsive_layout": {
-                        "enable": False,
-                        "horizontal_pos_layout": 0,
-                        "size_layout": 0,
-                        "target_follow": "",
-                        "vertical_pos_layout": 0
-                    },
-                    "reverse": False,
-                    "source_timerange": {"start": 0, "duration": remaining_duration},
-                    "speed": 1.0,
-                    "target_timerange": {"start": current_time + half_duration, "duration": remaining_duration},
-                    "template_id": "",
-                    "template_scene": "default",
-                    "track_attribute": 0,
-                    "track_render_index": 1,
-                    "uniform_scale": {"on": True, "value": 1.0},
-                    "visible": True,
-                    "volume": 1.0
-                }
-                # 按顺序添加所有材料到extra_material_refs（第二张图片，固定8个）
-                if default_material_index < len(default_materials_list):
-                    mats = default_materials_list[default_material_index]
-                    second_segment["extra_material_refs"].append(mats["speed_id"])
-                    second_segment["extra_material_refs"].append(mats["placeholder_id"])
-                    if ENABLE_CANVAS_BLUR and canvas_blur_index < len(canvas_blur_ids):
-                        second_segment["extra_material_refs"].append(canvas_blur_ids[canvas_blur_index])
-                        canvas_blur_index += 1
-                    # Material Animation (空，保留位置)
-                    second_segment["extra_material_refs"].append(mats["sound_channel_id"])
-                    second_segment["extra_material_refs"].append(mats["color_id"])
-                    second_segment["extra_material_refs"].append(mats["loudness_id"])
-                    second_segment["extra_material_refs"].append(mats["vocal_id"])
-                    default_material_index += 1
-                
-                video_segments.append(first_segment)
-                video_segments.append(second_segment)
-                
-                logger.debug(f"  长音频配2张图片: 图片{image_index + 1}({half_duration/1000000:.2f}s) + 图片{image_index + 2}({remaining_duration/1000000:.2f}s)")
-                image_index += 2
-            
-            elif image_index < len(image_ids):
-                # 只剩一张图片了，用完整时长
-                img_id, local_material_id = image_ids[image_index]
-                segment = {
-                    "caption_info": None,
-                    "cartoon": False,
-                    "clip": {
-                        "alpha": 1.0,
-                        "flip": {"horizontal": False, "vertical": False},
-                        "rotation": 0.0,
-                        "scale": {"x": 1.0, "y": 1.0},
-                        "transform": {"x": 0.0, "y": 0.0}
-                    },
-                    "common_keyframes": [],
-                    "enable_adjust": True,
-                    "enable_color_curves": True,
-                    "enable_color_match_adjust": False,
-                    "enable_color_wheels": True,
-                    "enable_lut": True,
-                    "enable_smart_color_adjust": False,
-                    "extra_material_refs": [],
-                    "group_id": "",
-                    "hdr_settings": {"intensity": 1.0, "mode": 1, "nits": 1000},
-                    "id": str(uuid.uuid4()).upper(),
-                    "intensifies_audio": False,
-                    "is_placeholder": False,
-                    "is_tone_modify": False,
-                    "keyframe_refs": [],
-                    "last_nonzero_volume": 1.0,
-                    "material_id": img_id,
-                    "render_index": len(video_segments) + 1,
-                    "responsive_layout": {
-                        "enable": False,
-                        "horizontal_pos_layout": 0,
-                        "size_layout": 0,
-                        "target_follow": "",
-                        "vertical_pos_layout": 0
-                    },
-                    "reverse": False,
-                    "source_timerange": {"start": 0, "duration": duration_micro},
-                    "speed": 1.0,
-                    "target_timerange": {"start": current_time, "duration": duration_micro},
-                    "template_id": "",
-                    "template_scene": "default",
-                    "track_attribute": 0,
-                    "track_render_index": 1,
-                    "uniform_scale": {"on": True, "value": 1.0},
-                    "visible": True,
-                    "volume": 1.0
-                }
-                # 按顺序添加所有材料到extra_material_refs（剩余一张图片，固定8个）
-                if default_material_index < len(default_materials_list):
-                    mats = default_materials_list[default_material_index]
-                    segment["extra_material_refs"].append(mats["speed_id"])
-                    segment["extra_material_refs"].append(mats["placeholder_id"])
-                    if ENABLE_CANVAS_BLUR and canvas_blur_index < len(canvas_blur_ids):
-                        segment["extra_material_refs"].append(canvas_blur_ids[canvas_blur_index])
-                        canvas_blur_index += 1
-                    # Material Animation (空，保留位置)
-                    segment["extra_material_refs"].append(mats["sound_channel_id"])
-                    segment["extra_material_refs"].append(mats["color_id"])
-                    segment["extra_material_refs"].append(mats["loudness_id"])
-                    segment["extra_material_refs"].append(mats["vocal_id"])
-                    default_material_index += 1
-                video_segments.append(segment)
-                logger.debug(f"  长音频配1张图片: 图片{image_index + 1}（剩余最后一张）")
-                image_index += 1
-            else:
-                logger.warning(f"  警告: 音频段 {audio_idx + 1} 没有足够的图片")
-        
-        current_time += duration_micro
+    for line in policy.describe():
+        logger.info(f"  • {line}")
+    
+    layout = policy.layout([d for _, d in audio_material_ids], len(image_records))
+    segment_count = len(layout)
+    
+    # 图片片段的辅助材料（speed、canvas_blur 等）：可共享的类型整份草稿共享一份
+    segment_materials = SegmentMaterialPool(
+        new_id,
+        shared_kinds=SHARED_SEGMENT_MATERIALS,
+        canvas_blur=CANVAS_BLUR_AMOUNT if ENABLE_CANVAS_BLUR and not prerender_blur else None
+    )
+    segment_materials.attach(draft['materials'], segment_count, wrap=StreamedArray)
+    
+    # 预渲染背景片段有自己的一组辅助材料：speed、color 等按片段原地修改，不能与图片片段共用
+    backdrop_materials = None
+    if prerender_blur:
+        backdrop_materials = SegmentMaterialPool(new_id, shared_kinds=SHARED_SEGMENT_MATERIALS,
+                                                 key_prefix="backdrop:")
+        backdrop_materials.attach(draft['materials'], segment_count, wrap=StreamedArray)
+    
+    # 入场动画：每种动画一个材料，所有片段共用；整段序列一次生成
+    animation_refs = [None] * segment_count
+    if ENABLE_INTRO_ANIMATIONS:
+        animations = create_animation_materials(new_id)
+        draft['materials'].setdefault('material_animations', []).extend(animations)
+        rng = random.Random(f"animations:{folder_name}") if ids.deterministic else None
+        animation_refs = [animation and animation['id']
+                          for animation in assign_intro_animations(animations, segment_count, rng)]
+        logger.info(f"🎞️  入场动画: {len(animations)} 种，{sum(1 for ref in animation_refs if ref)} 个片段")
+    
+    def video_segment_refs(k):
+        # 按顺序添加所有材料到extra_material_refs（固定顺序，顺序很重要，动画在最后）
+        refs = segment_materials.segment_refs(k)
+        if animation_refs[k]:
+            refs.append(animation_refs[k])
+        return refs
+    
+    if logger.isEnabledFor(logging.DEBUG):
+        for audio_idx, img_idx, start, duration in layout.placements():
+            logger.debug(f"  音频段 {audio_idx + 1} → 图片{img_idx + 1} "
+                         f"({start/1000000:.2f}s + {duration/1000000:.2f}s)")
+    
+    for audio_idx in layout.empty_segments:
+        logger.warning(f"  警告: 音频段 {audio_idx + 1} 没有足够的图片")
+    
+    shared_kinds = [k for k in SHARED_SEGMENT_MATERIALS if segment_materials.created.get(k)]
+    logger.info(f"\n🔧 辅助材料: {segment_count} 个图片片段共 {segment_materials.total_created} 个"
+                f"（共享: {', '.join(shared_kinds) or '无'}）")
+    if prerender_blur:
+        logger.info(f"🖼️  背景模糊填充: 模糊度 {CANVAS_BLUR_AMOUNT*100:.1f}%（预渲染背景轨道，"
+                    f"背景片段辅助材料 {backdrop_materials.total_created} 个）")
+    elif ENABLE_CANVAS_BLUR:
+        logger.info(f"🖼️  背景模糊填充: 模糊度 {CANVAS_BLUR_AMOUNT*100:.1f}%")
     
     # 统计图片使用情况
-    used_images = len(video_segments)
-    total_images = len(image_ids)
+    used_images = segment_count
+    total_images = len(image_records)
+    image_index = layout.images_consumed
     unused_images = total_images - image_index
     
     logger.info(f"\n📊 图片分配统计:")
@@ -1300,15 +1128,26 @@ def create_capcut_draft(folder_name, audio_file, image_files, logger):
         logger.info(f"  未使用: {unused_images} 张（可添加更多音频或减少图片）")
     logger.info(f"  跳过图片: {image_index - used_images} 张（短音频优化）")
     
-    video_track = {
-        "attribute": 0,
-        "flag": 0,
-        "id": str(uuid.uuid4()).upper(),
-        "type": "video",
-        "segments": video_segments
-    }
+    # 预渲染模糊背景：主轨道放背景图片（与图片片段时间相同），图片放在上方的轨道
+    if prerender_blur:
+        backdrop_track = build_track(new_id("track:backdrop"), "video", StreamedArray(iter_image_segments(
+            layout,
+            backdrop_ids,
+            segment_id=lambda k, backdrop_id: new_id(f"backdrop_segment:{k}:{backdrop_id}"),
+            extra_refs=backdrop_materials.segment_refs,
+            track_render_index=0
+        )))
+        draft['tracks'].append(backdrop_track)
+        logger.debug(f"背景轨道: {segment_count} 个片段")
+    
+    video_track = build_track(new_id("track:video"), "video", StreamedArray(iter_image_segments(
+        layout,
+        [record[0] for record in image_records],
+        segment_id=lambda k, img_id: new_id(f"video_segment:{k}:{img_id}"),
+        extra_refs=video_segment_refs
+    )))
     draft['tracks'].append(video_track)
-    logger.debug(f"视频轨道: {len(video_segments)} 个片段")
+    logger.debug(f"视频轨道: {segment_count} 个片段")
     
     # 创建音频轨道（多个独立片段）
     logger.debug("创建音频轨道...")
@@ -1318,32 +1157,14 @@ def create_capcut_draft(folder_name, audio_file, image_files, logger):
     logger.info(f"🔊 音频增益: +{AUDIO_VOLUME_DB}dB (线性值: {volume_linear:.2f})")
     logger.info(f"⚡ 音频已预先加速到 {AUDIO_SPEED}x（无需在 CapCut 中再次调速）")
     
-    audio_segments_json = []
-    current_time = 0
-    
-    for i, (audio_id, duration_micro) in enumerate(audio_material_ids):
-        # 音频已经在导出时加速，这里直接使用实际时长
-        segment = {
-            "id": str(uuid.uuid4()).upper(),
-            "material_id": audio_id,
-            "target_timerange": {"start": current_time, "duration": duration_micro},
-            "source_timerange": {"start": 0, "duration": duration_micro},
-            "volume": volume_linear,
-            "visible": True
-        }
-        audio_segments_json.append(segment)
-        current_time += duration_micro
-        logger.debug(f"音频轨道片段 {i+1}: {duration_micro/1000000:.2f}s (已包含 {AUDIO_SPEED}x 加速)")
-    
-    audio_track = {
-        "attribute": 0,
-        "flag": 0,
-        "id": str(uuid.uuid4()).upper(),
-        "type": "audio",
-        "segments": audio_segments_json
-    }
+    # 音频已经在导出时加速，这里直接使用实际时长
+    audio_track = build_track(new_id("track:audio"), "audio", StreamedArray(iter_audio_segments(
+        audio_material_ids,
+        segment_id=lambda i, audio_id: new_id(f"audio_segment:{i}:{audio_id}"),
+        volume=volume_linear
+    )))
     draft['tracks'].append(audio_track)
-    logger.debug(f"主音频轨道: {len(audio_segments_json)} 个片段")
+    logger.debug(f"主音频轨道: {len(audio_material_ids)} 个片段（均已包含 {AUDIO_SPEED}x 加速）")
     
     # ============================================================================
     # 字幕功能已移除 - 请在CapCut中使用"智能字幕"功能
@@ -1354,22 +1175,9 @@ def create_capcut_draft(folder_name, audio_file, image_files, logger):
     if intro_sound_id:
         logger.debug("创建音效轨道...")
         
-        sound_segment = {
-            "id": str(uuid.uuid4()).upper(),
-            "material_id": intro_sound_id,
-            "target_timerange": {"start": 0, "duration": intro_sound_duration},
-            "source_timerange": {"start": 0, "duration": intro_sound_duration},
-            "volume": INTRO_SOUND_VOLUME,
-            "visible": True
-        }
-        
-        sound_track = {
-            "attribute": 0,
-            "flag": 0,
-            "id": str(uuid.uuid4()).upper(),
-            "type": "audio",
-            "segments": [sound_segment]
-        }
+        sound_segment = build_audio_segment(new_id("segment:intro_sound"), intro_sound_id,
+                                            0, intro_sound_duration, INTRO_SOUND_VOLUME)
+        sound_track = build_track(new_id("track:intro_sound"), "audio", [sound_segment])
         draft['tracks'].append(sound_track)
         
         logger.info(f"🔔 创建音效轨道: 开头位置 (0-{intro_sound_duration/1000000:.2f}秒)")
@@ -1401,7 +1209,7 @@ def create_capcut_draft(folder_name, audio_file, image_files, logger):
             "extra_material_refs": [],
             "group_id": "",
             "hdr_settings": None,
-            "id": str(uuid.uuid4()).upper(),
+            "id": new_id("segment:effect"),
             "intensifies_audio": False,
             "is_loop": False,
             "is_placeholder": False,
@@ -1435,28 +1243,40 @@ def create_capcut_draft(folder_name, audio_file, image_files, logger):
             "volume": 1.0
         }
         
-        effect_track = {
-            "attribute": 0,
-            "flag": 0,
-            "id": str(uuid.uuid4()).upper(),
-            "is_default_name": True,
-            "name": "",
-            "type": "effect",
-            "segments": [effect_segment]
-        }
+        effect_track = build_track(new_id("track:effect"), "effect", [effect_segment], name="")
         
         draft['tracks'].append(effect_track)
         logger.info(f"✅ 特效轨道已创建（震动覆盖整个视频：{total_duration_sec:.2f}秒）")
     
     # 字幕功能已移除
     
-    # 保存草稿
-    logger.debug("保存草稿文件...")
-    with open(draft_info_path, 'w', encoding='utf-8') as f:
-        json.dump(draft, f, ensure_ascii=False, indent=2)
+    # 完整性检查：材料引用、时间线连续性、总时长
+    # 写入时边写边检查（只保留材料 ID），不再把写好的 JSON 整个读回内存
+    checker = watch_draft(draft, source=draft_info_path, wrap=StreamedArray) if VALIDATE_DRAFTS else None
     
-    with open(os.path.join(draft_folder, "draft_info.json.bak"), 'w', encoding='utf-8') as f:
-        json.dump(draft, f, ensure_ascii=False, indent=2)
+    # 保存草稿（材料与片段在写入过程中逐个生成，备份直接复制写好的文件）
+    logger.debug("保存草稿文件...")
+    write_draft_json(draft_info_path, draft,
+                     backup_path=os.path.join(draft_folder, "draft_info.json.bak"))
+    metrics.add_bytes(2 * os.path.getsize(draft_info_path))  # 草稿 + 备份
+    
+    if checker is not None:
+        metrics.step("validate")
+        report = checker.finish()
+        if report.ok:
+            logger.info(f"\n🔍 草稿检查 {report.summary()}")
+        else:
+            logger.warning(f"\n🔍 草稿检查 {report.summary()}")
+        for line in report.lines():
+            logger.warning(line)
+    
+    # 保存增量清单（输入指纹 + ID 映射）
+    if manifest is not None:
+        manifest.set("template_path", template_path)
+        manifest.set("draft_name", draft_name)
+        manifest.set("create_time", draft['create_time'])
+        manifest.save()
+        logger.debug(f"增量清单已保存: {manifest.path}（复用 {manifest.reused_ids} 个 ID）")
     
     # 音频已经在导出时加速，这里的 total_duration_sec 就是最终时长
     logger.info(f"\n{'='*70}")
@@ -1471,13 +1291,16 @@ def create_capcut_draft(folder_name, audio_file, image_files, logger):
     logger.info(f"🎵 音频片段: {len(audio_material_ids)} 个（独立可调）")
     if intro_sound_id:
         logger.info(f"🔔 开头音效: {INTRO_SOUND_FILE} ({intro_sound_duration/1000000:.2f}秒)")
-    logger.info(f"🖼️  图片片段: {len(video_segments)} 个（智能分配）")
+    logger.info(f"🖼️  图片片段: {segment_count} 个（智能分配）")
     if shake_effect_id:
         logger.info(f"🎨 画面特效: 震动 (整个片段持续)")
     if ENABLE_CANVAS_BLUR:
-        logger.info(f"🖼️  背景模糊: 已启用 (模糊度={CANVAS_BLUR_AMOUNT*100:.1f}%)")
+        blur_mode = "预渲染" if prerender_blur else "实时"
+        logger.info(f"🖼️  背景模糊: 已启用 (模糊度={CANVAS_BLUR_AMOUNT*100:.1f}%，{blur_mode})")
+    if ENABLE_INTRO_ANIMATIONS:
+        logger.info(f"🎞️  入场动画: 已启用（相邻图片不重复）")
     logger.info(f"📝 字幕功能: 请在CapCut中使用「智能字幕」")
-    logger.info(f"📦 素材库: {len(local_materials)} 个素材（显示在左侧）")
+    logger.info(f"📦 素材库: {local_material_count} 个素材（显示在左侧）")
     logger.info(f"📝 日志文件: {logger.handlers[0].baseFilename}")
     
     return draft_folder
@@ -1588,6 +1411,8 @@ def main():
         draft_folder = create_capcut_draft(selected_folder, audio_file, image_files, logger)
         
         if draft_folder:
+            record_project_result(selected_folder, draft_folder)
+            
             print("\n" + "="*70)
             print("🎉 完成！")
             print("="*70)
@@ -1629,6 +1454,14 @@ def main():
 
 
 if __name__ == "__main__":
+    if "--profile-imports" in sys.argv[1:]:
+        # 启动耗时报告：在新进程中导入本模块，列出最慢的导入
+        from lazy_imports import print_import_profile
+        sys.exit(print_import_profile("auto_capcut_draft_enhanced"))
+    if "--daemon" in sys.argv[1:]:
+        # 监听模式：无交互，项目文件夹落地后自动生成草稿
+        import draft_daemon
+        sys.exit(draft_daemon.main([arg for arg in sys.argv[1:] if arg != "--daemon"]))
     try:
         main()
     except KeyboardInterrupt:
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+图片入场动画调度
+功能：
+1. create_animation_materials(): 按动画目录（effect_catalog 的入场动画组）为草稿创建动画材料，
+   每种动画一份，所有片段共用
+2. schedule_animations(): 一次生成整段动画序列，相邻片段不重复，可设种子
+3. assign_intro_animations(): 给每个图片片段分配动画（zidongjianji 与 create_capcut_draft 共用）
+
+序列算法：第一个动画均匀随机，之后每个在上一个的序号上加 1..k-1 的随机偏移再对 k 取模，
+相当于在"除上一个外"的动画中均匀选择。随机数一次取出，累加取模在安装 numpy 时向量化计算；
+两种实现结果相同，deterministic 模式下的草稿不受是否安装 numpy 影响。
+"""
+
+import random
+import itertools
+
+from lazy_imports import lazy_import
+from effect_catalog import load_catalog
+
+# numpy（向量化累加）：延迟导入，第一次调度时才加载
+np = lazy_import("numpy")
+NUMPY_AVAILABLE = np is not None
+
+# 入场动画组（effect_catalog.json 的 animation_groups）
+INTRO_GROUP = "intro"
+
+
+def create_animation_materials(new_id, group=INTRO_GROUP):
+    """
+    为动画组中的每种动画创建一个材料（所有片段引用同一个 ID）
+
+    Args:
+        new_id: ID 生成函数，参数为角色名（DraftIdFactory 或 manifest.id_for）
+        group: 动画组名
+
+    Returns:
+        材料列表（顺序与目录一致），调用方追加到 draft['materials']['material_animations']
+    """
+    catalog = load_catalog()
+    materials = []
+    for effect_id in catalog.animation_group(group):
+        request_id = new_id(f"animation_request:{effect_id}").lower()
+        materials.append(catalog.animation(effect_id, new_id(f"animation:{effect_id}"), request_id))
+    return materials
+
+
+def schedule_animations(count, choices, rng=None):
+    """
+    一次生成 count 个动画序号（0 ~ choices-1），相邻两个不相同
+
+    Args:
+        count: 片段数
+        choices: 可选动画数
+        rng: random.Random（None = 全局随机数）；固定种子时结果固定
+
+    Returns:
+        序号列表；只有一种动画时全部为 0
+    """
+    if count <= 0 or choices <= 0:
+        return []
+    if choices == 1:
+        return [0] * count
+    rng = rng or random
+    first = rng.randrange(choices)
+    offsets = rng.choices(range(1, choices), k=count - 1)
+    if NUMPY_AVAILABLE:
+        steps = np.cumsum(np.asarray([first] + offsets, dtype=np.int64))
+        return (steps % choices).tolist()
+    return [step % choices for step in itertools.accumulate([first] + offsets)]
+
+
+def assign_intro_animations(materials, segment_count, rng=None, skip_first=True):
+    """
+    给图片片段分配入场动画
+
+    Args:
+        materials: create_animation_materials() 的结果
+        segment_count: 图片片段数
+        rng: 随机数（见 schedule_animations）
+        skip_first: 第一个片段不加动画
+
+    Returns:
+        长度为 segment_count 的列表，元素为动画材料或 None（不加动画）
+    """
+    skipped = 1 if skip_first else 0
+    order = schedule_animations(segment_count - skipped, len(materials), rng)
+    return [None] * min(skipped, segment_count) + [materials[i] for i in order]
@@ -0,0 +1,553 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+CapCut 草稿批量生成（无交互）
+功能：
+1. 命令行参数或配置文件（JSON / TOML / YAML）指定素材文件夹通配符、分段模式、输出位置
+2. 依次处理所有匹配的项目，全程不调用 input()，可在 cron / 无界面服务器上运行
+3. 结束时输出 JSON 汇总（每个项目的状态、草稿路径、耗时），有失败项目时退出码为 1
+4. --workers > 1 或设置 --timeout 时使用两阶段流水线进程池（见 draft_pool）：
+   音频分段（CPU）与素材导入（I/O）在不同进程中重叠进行，每个项目有超时，互不影响
+
+用法：
+    python3 draft_batch.py --folders "2025-10-*" --split-mode 3
+    python3 draft_batch.py --config batch.toml --summary summary.json
+    python3 draft_batch.py --folders "*" --workers 4 --timeout 600
+
+配置文件示例（TOML）：
+    material_base = "/Users/mac/YouTube/00批量出图"
+    drafts_folder = "~/Movies/CapCut/User Data/Projects/com.lveditor.draft"
+    folders = ["2025-10-*", "特别篇"]
+    split_mode = "aggressive"
+    incremental = true
+
+    [settings]            # 覆盖 auto_capcut_draft_enhanced 配置区域中的常量
+    AUDIO_VOLUME_DB = 12.0
+"""
+
+import os
+import sys
+import json
+import glob
+import time
+import shutil
+import logging
+import argparse
+import traceback
+from datetime import datetime
+
+import auto_capcut_draft_enhanced as enhanced
+from draft_manifest import DraftManifest, MANIFEST_FILENAME
+from draft_metrics import DraftMetrics, PROFILER_CPROFILE, PROFILER_PYINSTRUMENT
+from draft_pool import run_pipeline, RESULT_OK, RESULT_TIMEOUT, STAGE_CPU
+from lazy_imports import module_available
+
+# TOML（Python 3.11+ 内置 tomllib，旧版本可安装 tomli）
+try:
+    import tomllib
+    TOML_AVAILABLE = True
+except ImportError:
+    try:
+        import tomli as tomllib
+        TOML_AVAILABLE = True
+    except ImportError:
+        TOML_AVAILABLE = False
+
+# YAML（可选）：读取 .yaml 配置时才导入，流水线子进程不需要
+YAML_AVAILABLE = module_available("yaml")
+
+# 退出码
+EXIT_OK = 0
+EXIT_FAILED = 1       # 有项目失败
+EXIT_CONFIG_ERROR = 2  # 参数或配置文件错误
+
+# 项目状态
+STATUS_OK = "ok"
+STATUS_FAILED = "failed"
+STATUS_SKIPPED = "skipped"
+STATUS_TIMEOUT = "timeout"
+
+# 预先分段的临时目录（位于草稿目录中，隐藏文件夹不会被当作模板；与草稿同一文件系统，导入时可硬链接）
+STAGING_FOLDER_NAME = ".auto_capcut_staging"
+
+# 配置项默认值（命令行参数 > 配置文件 > 默认值）
+DEFAULT_OPTIONS = {
+    "material_base": None,   # None = 使用 MATERIAL_BASE_FOLDER
+    "drafts_folder": None,   # None = 使用 CAPCUT_DRAFTS_FOLDER
+    "folders": ["*"],
+    "split_mode": enhanced.DEFAULT_SPLIT_MODE,
+    "incremental": None,
+    "id_mode": None,
+    "layout_policy": None,
+    "template": None,        # None = 开始时草稿目录中最近修改的草稿（整批共用，避免把刚生成的草稿当模板）
+    "workers": 1,            # 音频分段并发进程数
+    "io_workers": None,      # 素材导入并发进程数（None = 与 workers 相同）
+    "timeout": None,         # 每个项目的超时秒数
+    "profile": None,         # None / "cprofile" / "pyinstrument"（覆盖 DRAFT_PROFILER）
+    "settings": {},
+    "summary": "-",
+}
+
+
+class ConfigError(Exception):
+    """参数或配置文件错误"""
+
+
+def load_config_file(path):
+    """
+    读取配置文件，按扩展名选择格式
+
+    Args:
+        path: .json / .toml / .yaml / .yml 文件
+
+    Returns:
+        配置字典
+    """
+    ext = os.path.splitext(path)[1].lower()
+    try:
+        if ext == ".json":
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        elif ext == ".toml":
+            if not TOML_AVAILABLE:
+                raise ConfigError("读取 TOML 需要 Python 3.11+ 或 pip3 install tomli")
+            with open(path, 'rb') as f:
+                data = tomllib.load(f)
+        elif ext in (".yaml", ".yml"):
+            if not YAML_AVAILABLE:
+                raise ConfigError("读取 YAML 需要 pip3 install pyyaml")
+            import yaml
+            with open(path, 'r', encoding='utf-8') as f:
+                data = yaml.safe_load(f) or {}
+        else:
+            raise ConfigError(f"不支持的配置文件格式: {ext}（可选 .json / .toml / .yaml）")
+    except ConfigError:
+        raise
+    except Exception as e:
+        raise ConfigError(f"无法读取配置文件 {path}: {e}")
+
+    if not isinstance(data, dict):
+        raise ConfigError(f"配置文件内容必须是键值表: {path}")
+    unknown = set(data) - set(DEFAULT_OPTIONS)
+    if unknown:
+        raise ConfigError(f"未知的配置项: {', '.join(sorted(unknown))}")
+    return data
+
+
+def build_options(args):
+    """合并默认值、配置文件与命令行参数"""
+    options = dict(DEFAULT_OPTIONS)
+    if args.config:
+        options.update(load_config_file(args.config))
+    for key in DEFAULT_OPTIONS:
+        value = getattr(args, key, None)
+        if value is not None:
+            options[key] = value
+    if isinstance(options["folders"], str):
+        options["folders"] = [options["folders"]]
+    return options
+
+
+def apply_settings(settings):
+    """用配置文件中的 settings 覆盖配置区域的常量（只允许已存在的大写常量）"""
+    for name, value in (settings or {}).items():
+        if not name.isupper() or not hasattr(enhanced, name):
+            raise ConfigError(f"未知的配置常量: {name}")
+        setattr(enhanced, name, value)
+
+
+def apply_options(options):
+    """把配置写入 auto_capcut_draft_enhanced 的模块常量（主进程与每个子进程各调用一次）"""
+    apply_settings(options["settings"])
+    if options["material_base"]:
+        enhanced.MATERIAL_BASE_FOLDER = os.path.expanduser(options["material_base"])
+    if options["drafts_folder"]:
+        enhanced.CAPCUT_DRAFTS_FOLDER = os.path.expanduser(options["drafts_folder"])
+    if options["profile"]:
+        enhanced.DRAFT_PROFILER = options["profile"]
+
+
+def resolve_project_folders(patterns, material_base):
+    """
+    按通配符查找项目文件夹
+
+    Args:
+        patterns: 通配符列表，相对路径基于素材根目录
+        material_base: 素材根目录
+
+    Returns:
+        去重并排序后的文件夹绝对路径列表
+    """
+    found = []
+    seen = set()
+    for pattern in patterns:
+        pattern = os.path.expanduser(pattern)
+        if not os.path.isabs(pattern):
+            pattern = os.path.join(material_base, pattern)
+        for path in sorted(glob.glob(pattern)):
+            path = os.path.abspath(path)
+            if os.path.isdir(path) and path not in seen:
+                seen.add(path)
+                found.append(path)
+    return found
+
+
+def process_project(folder_path, options, log_path=None, presplit_segments=None, draft_name=None):
+    """
+    无交互地处理单个项目
+
+    Args:
+        folder_path: 项目文件夹
+        options: 合并后的配置
+        log_path: 日志文件路径（None = 新建）
+        presplit_segments: 流水线 CPU 阶段预先分好的音频片段
+        draft_name: 流水线预先决定的草稿名（None = 自动命名）
+
+    Returns:
+        汇总字典（folder / status / draft_folder / seconds / error ...）
+    """
+    folder_name = os.path.basename(folder_path)
+    result = {
+        "folder": folder_name,
+        "path": folder_path,
+        "status": STATUS_FAILED,
+        "draft_folder": None,
+        "audio": None,
+        "images": 0,
+        "seconds": 0.0,
+        "log": None,
+        "error": None,
+    }
+    started = time.time()
+
+    audio_files, image_files = enhanced.find_media_files(folder_path)
+    result["images"] = len(image_files)
+    if not audio_files or not image_files:
+        result["status"] = STATUS_SKIPPED
+        result["error"] = "没有音频文件" if not audio_files else "没有图片文件"
+        return result
+
+    logger = enhanced.setup_logger(folder_name, log_path=log_path)
+    result["log"] = logger.handlers[0].baseFilename
+    result["audio"] = os.path.basename(audio_files[0])
+    try:
+        draft_folder = enhanced.create_capcut_draft(
+            folder_name, audio_files[0], image_files, logger,
+            incremental=options["incremental"],
+            id_mode=options["id_mode"],
+            layout_policy=options["layout_policy"],
+            split_mode=options["split_mode"],
+            template=options["template"],
+            presplit_segments=presplit_segments,
+            draft_name=draft_name,
+        )
+        if draft_folder:
+            result["status"] = STATUS_OK
+            result["draft_folder"] = draft_folder
+        else:
+            result["error"] = "草稿创建失败（详见日志）"
+    except Exception as e:
+        logger.error(f"创建草稿失败: {e}", exc_info=True)
+        result["error"] = f"{type(e).__name__}: {e}"
+    finally:
+        result["seconds"] = round(time.time() - started, 3)
+        enhanced.close_logger(logger)
+    return result
+
+
+def run_project_safely(folder_path, options):
+    """逐个处理模式：单个项目的意外错误不影响其余项目"""
+    try:
+        return process_project(folder_path, options)
+    except Exception as e:
+        return {
+            "folder": os.path.basename(folder_path),
+            "path": folder_path,
+            "status": STATUS_FAILED,
+            "error": f"{type(e).__name__}: {e}",
+            "traceback": traceback.format_exc(),
+        }
+
+
+# ============================================================================
+# 流水线阶段（在子进程中运行）
+# ============================================================================
+
+def split_project_audio(folder_path, audio_file, options, staging_dir, log_path):
+    """
+    CPU 阶段：把项目音频分段到临时目录
+
+    Returns:
+        [(片段路径, 起始ms, 时长ms), ...]；不需要分段（关闭分段 / 增量模式可复用）时返回 None
+    """
+    apply_options(options)
+    mode = enhanced.normalize_split_mode(options["split_mode"])
+    if mode == enhanced.SPLIT_MODE_OFF or not enhanced.PYDUB_AVAILABLE:
+        return None
+
+    folder_name = os.path.basename(folder_path)
+    min_silence, thresh = enhanced.SPLIT_MODES[mode]
+    incremental = options["incremental"]
+    if incremental is None:
+        incremental = enhanced.INCREMENTAL_DRAFTS
+    if incremental:
+        manifest = DraftManifest.load(os.path.join(enhanced.CAPCUT_DRAFTS_FOLDER, folder_name))
+        split_params = [min_silence, thresh, enhanced.AUDIO_SPEED]
+        if manifest.reusable_audio_segments(audio_file, split_params):
+            return None
+
+    logger = enhanced.setup_logger(folder_name, log_path=log_path)
+    metrics = DraftMetrics(folder_name, enhanced.METRICS_FILE)
+    try:
+        with metrics.span("presplit_audio"):
+            return enhanced.split_audio_by_silence(
+                audio_file, staging_dir, logger,
+                min_silence_len=min_silence,
+                silence_thresh=thresh,
+                filename_pattern="audio_{index:02d}.mp3",
+                metrics=metrics
+            )
+    finally:
+        metrics.write()
+        enhanced.close_logger(logger)
+
+
+def build_project_draft(folder_path, options, log_path, draft_name, presplit_segments):
+    """I/O 阶段：复制模板、导入素材、写出草稿 JSON"""
+    apply_options(options)
+    return process_project(folder_path, options, log_path=log_path,
+                           presplit_segments=presplit_segments, draft_name=draft_name)
+
+
+def discard_partial_draft(draft_folder, existed):
+    """
+    删除 I/O 阶段超时或失败时写了一半的草稿，避免剪映草稿列表中出现打不开的草稿
+
+    只删除本次新建的草稿，或本工具生成的草稿（有增量清单，下次运行会完整重建）
+
+    Returns:
+        是否删除
+    """
+    if not os.path.isdir(draft_folder):
+        return False
+    if existed and not os.path.exists(os.path.join(draft_folder, MANIFEST_FILENAME)):
+        return False
+    shutil.rmtree(draft_folder, ignore_errors=True)
+    return True
+
+
+def run_projects_pipelined(projects, options):
+    """
+    用两阶段流水线进程池处理项目
+
+    Returns:
+        按 projects 顺序排列的汇总列表
+    """
+    staging_root = os.path.join(enhanced.CAPCUT_DRAFTS_FOLDER, STAGING_FOLDER_NAME)
+    workers = max(1, int(options["workers"] or 1))
+    io_workers = max(1, int(options["io_workers"] or workers))
+    timeout = options["timeout"]
+
+    results = {}
+    tasks = []
+    staging_dirs = {}
+    draft_folders = {}
+    for folder_path in projects:
+        folder_name = os.path.basename(folder_path)
+        audio_files, image_files = enhanced.find_media_files(folder_path)
+        if not audio_files or not image_files:
+            # 没有素材的项目直接在主进程中得到 skipped 结果
+            results[folder_path] = process_project(folder_path, options)
+            continue
+
+        log_path = os.path.join(
+            enhanced.LOG_FOLDER, f"{folder_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log")
+        # 草稿名在主进程中决定：I/O 阶段被终止时才知道要清理哪个草稿
+        incremental = options["incremental"]
+        if incremental is None:
+            incremental = enhanced.INCREMENTAL_DRAFTS
+        draft_name, incremental = enhanced.resolve_draft_name(
+            folder_name, incremental, logging.getLogger("CapCutDraft.batch"))
+        project_options = dict(options, incremental=incremental)
+        draft_folder = os.path.join(enhanced.CAPCUT_DRAFTS_FOLDER, draft_name)
+        draft_folders[folder_path] = (draft_folder, os.path.exists(draft_folder))
+        cpu_args = None
+        if enhanced.normalize_split_mode(options["split_mode"]) != enhanced.SPLIT_MODE_OFF:
+            staging_dirs[folder_path] = os.path.join(staging_root, folder_name)
+            cpu_args = (folder_path, audio_files[0], project_options, staging_dirs[folder_path], log_path)
+        tasks.append((folder_path, cpu_args, (folder_path, project_options, log_path, draft_name)))
+
+    def on_finish(folder_path, status, stage, value):
+        staging_dir = staging_dirs.get(folder_path)
+        if staging_dir:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+        if status == RESULT_OK:
+            results[folder_path] = value
+        else:
+            results[folder_path] = {
+                "folder": os.path.basename(folder_path),
+                "path": folder_path,
+                "status": STATUS_TIMEOUT if status == RESULT_TIMEOUT else STATUS_FAILED,
+                "stage": "audio" if stage == STAGE_CPU else "draft",
+                "error": value,
+            }
+        if stage != STAGE_CPU and results[folder_path]["status"] in (STATUS_FAILED, STATUS_TIMEOUT):
+            draft_folder, existed = draft_folders[folder_path]
+            if discard_partial_draft(draft_folder, existed):
+                results[folder_path]["discarded_draft"] = draft_folder
+        sys.stderr.write(f"[{len(results)}/{len(projects)}] {os.path.basename(folder_path)}: "
+                         f"{results[folder_path]['status']}\n")
+
+    try:
+        run_pipeline(tasks, split_project_audio, build_project_draft,
+                     cpu_workers=workers, io_workers=io_workers, timeout=timeout,
+                     on_finish=on_finish)
+    finally:
+        # 只清理本次创建的临时目录：监听模式下多个流水线共用 staging_root
+        for staging_dir in staging_dirs.values():
+            shutil.rmtree(staging_dir, ignore_errors=True)
+        try:
+            os.rmdir(staging_root)
+        except OSError:
+            pass
+    return [results[folder_path] for folder_path in projects]
+
+
+def resolve_template(options):
+    """整批共用一个模板：未指定时取开始时草稿目录中最近修改的草稿"""
+    if options["template"]:
+        template = os.path.expanduser(options["template"])
+        if not os.path.isdir(template):
+            raise ConfigError(f"模板草稿不存在: {template}")
+        return template
+
+    logger = logging.getLogger("CapCutDraft.batch")
+    if not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        logger.addHandler(handler)
+        logger.propagate = False
+    template = enhanced.get_template_draft(logger)
+    if not template:
+        raise ConfigError(f"草稿目录中没有可用的模板草稿: {enhanced.CAPCUT_DRAFTS_FOLDER}")
+    return template
+
+
+def record_results(results, material_base):
+    """把素材根目录下项目的生成结果写入项目索引（在主进程中统一写，避免子进程互相覆盖）"""
+    index = enhanced.get_project_index()
+    if index is None:
+        return
+    base = os.path.abspath(material_base)
+    for result in results:
+        if result["status"] == STATUS_SKIPPED:
+            continue
+        if os.path.dirname(os.path.abspath(result["path"])) != base:
+            continue
+        index.mark_processed(result["folder"], result.get("draft_folder"), result["status"])
+    try:
+        index.save()
+    except OSError as e:
+        sys.stderr.write(f"⚠️  项目索引写入失败: {e}\n")
+
+
+def run_batch(options):
+    """
+    按合并后的配置处理所有项目
+
+    Returns:
+        汇总字典
+    """
+    apply_options(options)
+
+    material_base = enhanced.MATERIAL_BASE_FOLDER
+    if not os.path.isdir(material_base):
+        raise ConfigError(f"素材文件夹不存在: {material_base}")
+
+    started_at = datetime.now()
+    options = dict(options, template=resolve_template(options))
+    projects = resolve_project_folders(options["folders"], material_base)
+    if (options["workers"] or 1) > 1 or options["timeout"]:
+        results = run_projects_pipelined(projects, options)
+    else:
+        results = [run_project_safely(folder_path, options) for folder_path in projects]
+    record_results(results, material_base)
+
+    counts = {status: sum(1 for r in results if r["status"] == status)
+              for status in (STATUS_OK, STATUS_FAILED, STATUS_TIMEOUT, STATUS_SKIPPED)}
+    return {
+        "started_at": started_at.isoformat(timespec="seconds"),
+        "finished_at": datetime.now().isoformat(timespec="seconds"),
+        "material_base": material_base,
+        "drafts_folder": enhanced.CAPCUT_DRAFTS_FOLDER,
+        "split_mode": enhanced.normalize_split_mode(options["split_mode"]),
+        "template": options["template"],
+        "total": len(results),
+        "counts": counts,
+        "projects": results,
+    }
+
+
+def write_summary(summary, target):
+    """写出 JSON 汇总："-" 表示标准输出（日志输出在标准错误，不会混在一起）"""
+    text = json.dumps(summary, ensure_ascii=False, indent=2)
+    if target == "-":
+        sys.stdout.write(text + "\n")
+        sys.stdout.flush()
+        return
+    tmp_path = target + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text + "\n")
+    os.replace(tmp_path, target)
+
+
+def build_parser(description="CapCut 草稿批量生成（无交互，适合 cron）"):
+    """命令行参数（draft_daemon 在此基础上增加监听参数）"""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--config", help="配置文件（.json / .toml / .yaml）")
+    parser.add_argument("--folders", nargs="+", metavar="GLOB",
+                        help="项目文件夹通配符，相对路径基于素材根目录（默认: *）")
+    parser.add_argument("--material-base", dest="material_base", help="素材根目录")
+    parser.add_argument("--drafts-folder", dest="drafts_folder", help="CapCut 草稿目录（输出位置）")
+    parser.add_argument("--split-mode", dest="split_mode",
+                        help="分段模式: 1-4 / conservative / standard / aggressive / extreme / off（默认: 3）")
+    parser.add_argument("--incremental", action="store_true", default=None,
+                        help="增量生成（草稿名固定为文件夹名）")
+    parser.add_argument("--id-mode", dest="id_mode", choices=("random", "deterministic"),
+                        help="ID 生成模式")
+    parser.add_argument("--layout-policy", dest="layout_policy",
+                        help="图片分配策略（pair / fixed:3 / weighted:1.5 / beats:路径）")
+    parser.add_argument("--template", help="模板草稿文件夹（默认: 开始时最近修改的草稿）")
+    parser.add_argument("--workers", type=int, help="音频分段并发进程数（默认: 1，即逐个处理）")
+    parser.add_argument("--io-workers", dest="io_workers", type=int,
+                        help="素材导入并发进程数（默认与 --workers 相同）")
+    parser.add_argument("--timeout", type=float, help="每个项目的超时秒数（超时的项目被终止并记为 timeout）")
+    parser.add_argument("--profile", choices=(PROFILER_CPROFILE, PROFILER_PYINSTRUMENT),
+                        help="性能分析每个草稿的生成过程，结果保存到 logs/profiles/")
+    parser.add_argument("--summary", help="JSON 汇总输出文件（默认 - 即标准输出）")
+    return parser
+
+
+def parse_args(argv=None):
+    return build_parser().parse_args(argv)
+
+
+def main(argv=None):
+    """命令行入口，返回退出码"""
+    args = parse_args(argv)
+    try:
+        options = build_options(args)
+        summary = run_batch(options)
+    except ConfigError as e:
+        sys.stderr.write(f"❌ {e}\n")
+        return EXIT_CONFIG_ERROR
+
+    write_summary(summary, options["summary"])
+    counts = summary["counts"]
+    sys.stderr.write(f"\n📊 批量完成: {counts[STATUS_OK]} 成功, {counts[STATUS_FAILED]} 失败, "
+                     f"{counts[STATUS_TIMEOUT]} 超时, {counts[STATUS_SKIPPED]} 跳过\n")
+    return EXIT_FAILED if counts[STATUS_FAILED] or counts[STATUS_TIMEOUT] else EXIT_OK
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,428 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+草稿构建核心（auto_capcut_draft_enhanced 与 zidongjianji 共用）
+功能：
+1. 材料：音频、图片、本地素材库条目
+2. 片段：图片片段、音频片段；按布局引擎（draft_layout）的结果一次生成整条图片轨道
+3. 轨道
+4. 两种字段集（profile）：
+   - PROFILE_CAPCUT: CapCut 国际版精简字段（auto_capcut_draft_enhanced，draft_info.json）
+   - PROFILE_JIANYING: 剪映专业版完整字段（zidongjianji，draft_content.json）
+
+与其它模块配合：
+    布局 draft_layout / 辅助材料 draft_materials / ID draft_ids / 动画 draft_animations /
+    特效 effect_catalog / 写入 draft_writer / 素材导入 media_ingest / 检查 draft_validator
+
+时间单位统一为微秒。
+"""
+
+import os
+
+PROFILE_CAPCUT = "capcut"
+PROFILE_JIANYING = "jianying"
+
+# 草稿 JSON 的缩进（draft_writer.write_draft_json 的 indent）：
+# CapCut 版保持原有的 indent=2 格式；剪映版与剪映自己保存的一样用紧凑格式（无缩进，体积小约三分之一）
+PROFILE_JSON_INDENT = {PROFILE_CAPCUT: 2, PROFILE_JIANYING: None}
+
+# 图片材料的时长（图片没有时长，剪映固定使用 3 小时）
+IMAGE_MATERIAL_DURATION = 10800000000
+
+
+# ============================================================================
+# 材料
+# ============================================================================
+
+def build_audio_material(material_id, path, name, duration, local_material_id="",
+                         profile=PROFILE_CAPCUT):
+    """生成音频材料（materials.audios）"""
+    if profile == PROFILE_JIANYING:
+        return {
+            "app_id": 0,
+            "category_id": "",
+            "category_name": "",
+            "check_flag": 1,
+            "copyright_limit_type": "none",
+            "duration": duration,
+            "effect_id": "",
+            "formula_id": "",
+            "id": material_id,
+            "intensifies_path": "",
+            "is_ai_clone_tone": False,
+            "is_text_edit_overdub": False,
+            "is_ugc": False,
+            "local_material_id": local_material_id,
+            "music_id": "",
+            "name": name,
+            "path": path,
+            "query": "",
+            "request_id": "",
+            "resource_id": "",
+            "search_id": "",
+            "source_from": "",
+            "source_platform": 0,
+            "team_id": "",
+            "text_id": "",
+            "tone_category_id": "",
+            "tone_category_name": "",
+            "tone_effect_id": "",
+            "tone_effect_name": "",
+            "tone_platform": "",
+            "tone_second_category_id": "",
+            "tone_second_category_name": "",
+            "tone_speaker": "",
+            "tone_type": "",
+            "type": "extract_music",
+            "video_id": "",
+            "wave_points": []
+        }
+    return {
+        "app_id": 0,
+        "category_id": "",
+        "check_flag": 1,
+        "duration": duration,
+        "id": material_id,
+        "name": name,
+        "path": path,
+        "type": "extract_music",
+        "wave_points": [],
+        "local_material_id": local_material_id
+    }
+
+
+def _crop():
+    return {
+        "lower_left_x": 0.0, "lower_left_y": 1.0,
+        "lower_right_x": 1.0, "lower_right_y": 1.0,
+        "upper_left_x": 0.0, "upper_left_y": 0.0,
+        "upper_right_x": 1.0, "upper_right_y": 0.0
+    }
+
+
+def _matting():
+    return {
+        "flag": 0,
+        "has_use_quick_brush": False,
+        "has_use_quick_eraser": False,
+        "interactiveTime": [],
+        "path": "",
+        "strokes": []
+    }
+
+
+def build_image_material(material_id, local_material_id, path, width, height,
+                         profile=PROFILE_CAPCUT):
+    """生成图片材料（materials.videos）"""
+    if profile == PROFILE_JIANYING:
+        return {
+            "aigc_type": "none",
+            "audio_fade": None,
+            "cartoon_path": "",
+            "category_id": "",
+            "category_name": "",
+            "check_flag": 63487,
+            "crop": _crop(),
+            "crop_ratio": "free",
+            "crop_scale": 1.0,
+            "duration": IMAGE_MATERIAL_DURATION,
+            "extra_type_option": 0,
+            "formula_id": "",
+            "freeze": None,
+            "has_audio": False,
+            "height": height,
+            "id": material_id,
+            "intensifies_audio_path": "",
+            "intensifies_path": "",
+            "is_ai_generate_content": False,
+            "is_copyright": False,
+            "is_text_edit_overdub": False,
+            "is_unified_beauty_mode": False,
+            "local_id": "",
+            "local_material_id": local_material_id,
+            "material_id": "",
+            "material_name": os.path.basename(path),
+            "material_url": "",
+            "matting": _matting(),
+            "media_path": "",
+            "object_locked": None,
+            "origin_material_id": "",
+            "path": path,
+            "picture_from": "none",
+            "picture_set_category_id": "",
+            "picture_set_category_name": "",
+            "request_id": "",
+            "reverse_intensifies_path": "",
+            "reverse_path": "",
+            "smart_motion": None,
+            "source": 0,
+            "source_platform": 0,
+            "stable": {
+                "matrix_path": "",
+                "stable_level": 0,
+                "time_range": {"duration": 0, "start": 0}
+            },
+            "team_id": "",
+            "type": "photo",
+            "video_algorithm": {
+                "algorithms": [],
+                "complement_frame_config": None,
+                "deflicker": None,
+                "gameplay_configs": [],
+                "motion_blur_config": None,
+                "noise_reduction": None,
+                "path": "",
+                "quality_enhance": None,
+                "time_range": None
+            },
+            "width": width
+        }
+    return {
+        "aigc_type": "none",
+        "category_id": "",
+        "category_name": "local",
+        "check_flag": 63487,
+        "crop": _crop(),
+        "duration": IMAGE_MATERIAL_DURATION,
+        "extra_type_option": 0,
+        "file_Path": path,
+        "has_audio": False,
+        "height": height,
+        "width": width,
+        "id": material_id,
+        "intensifies_path": "",
+        "is_ai_generate": False,
+        "is_unified_beauty_mode": False,
+        "local_material_id": local_material_id,
+        "material_id": "",
+        "material_name": os.path.basename(path),
+        "material_url": "",
+        "matting": _matting(),
+        "media_path": "",
+        "object_locked": None,
+        "origin_material_id": "",
+        "path": path,
+        "picture_from": "none",
+        "picture_set_category_id": "",
+        "picture_set_category_name": "",
+        "request_id": "",
+        "reverse_intensifies_path": "",
+        "reverse_path": "",
+        "source_platform": 0,
+        "stable": False,
+        "team_id": "",
+        "type": "photo",
+        "video_algorithm": {
+            "algorithms": [],
+            "deflicker": None,
+            "motion_blur_config": None,
+            "noise_reduction": None,
+            "path": "",
+            "quality_enhance": None,
+            "time_range": None
+        }
+    }
+
+
+def build_local_material(local_material_id, path, name, duration, now_micro,
+                         width=0, height=0, metetype="music"):
+    """生成本地素材库条目（materials.local_materials，显示在左侧素材库）"""
+    return {
+        "create_time": now_micro,
+        "duration": duration,
+        "extra_info": "",
+        "file_Path": path,
+        "file_name": name,
+        "file_size": os.path.getsize(path) if os.path.exists(path) else 0,
+        "height": height,
+        "width": width,
+        "id": local_material_id,
+        "import_time": now_micro,
+        "import_time_ms": now_micro,
+        "item_source": 1,
+        "md5": "",
+        "metetype": metetype,
+        "roughcut_time_range": {
+            "duration": -1,
+            "start": -1
+        },
+        "sub_time_range": {
+            "duration": -1,
+            "start": -1
+        },
+        "type": 0 if metetype == "photo" else 1
+    }
+
+
+# ============================================================================
+# 片段与轨道
+# ============================================================================
+
+def _responsive_layout():
+    return {
+        "enable": False,
+        "horizontal_pos_layout": 0,
+        "size_layout": 0,
+        "target_follow": "",
+        "vertical_pos_layout": 0
+    }
+
+
+def build_image_segment(segment_id, material_id, start, duration, render_index,
+                        extra_material_refs, track_render_index=1):
+    """生成视频轨道上的图片片段（track_render_index: 轨道的叠放层级，越大越靠上）"""
+    return {
+        "caption_info": None,
+        "cartoon": False,
+        "clip": {
+            "alpha": 1.0,
+            "flip": {"horizontal": False, "vertical": False},
+            "rotation": 0.0,
+            "scale": {"x": 1.0, "y": 1.0},
+            "transform": {"x": 0.0, "y": 0.0}
+        },
+        "common_keyframes": [],
+        "enable_adjust": True,
+        "enable_color_curves": True,
+        "enable_color_match_adjust": False,
+        "enable_color_wheels": True,
+        "enable_lut": True,
+        "enable_smart_color_adjust": False,
+        "extra_material_refs": extra_material_refs,
+        "group_id": "",
+        "hdr_settings": {"intensity": 1.0, "mode": 1, "nits": 1000},
+        "id": segment_id,
+        "intensifies_audio": False,
+        "is_placeholder": False,
+        "is_tone_modify": False,
+        "keyframe_refs": [],
+        "last_nonzero_volume": 1.0,
+        "material_id": material_id,
+        "render_index": render_index,
+        "responsive_layout": _responsive_layout(),
+        "reverse": False,
+        "source_timerange": {"start": 0, "duration": duration},
+        "speed": 1.0,
+        "target_timerange": {"start": start, "duration": duration},
+        "template_id": "",
+        "template_scene": "default",
+        "track_attribute": 0,
+        "track_render_index": track_render_index,
+        "uniform_scale": {"on": True, "value": 1.0},
+        "visible": True,
+        "volume": 1.0
+    }
+
+
+def build_audio_segment(segment_id, material_id, start, duration, volume,
+                        render_index=0, extra_material_refs=None, profile=PROFILE_CAPCUT):
+    """生成音频轨道上的片段（CapCut 精简字段只含时间范围与音量）"""
+    if profile == PROFILE_JIANYING:
+        return {
+            "caption_info": None,
+            "cartoon": False,
+            "clip": None,
+            "common_keyframes": [],
+            "enable_adjust": False,
+            "enable_color_curves": True,
+            "enable_color_match_adjust": False,
+            "enable_color_wheels": True,
+            "enable_lut": False,
+            "enable_smart_color_adjust": False,
+            "extra_material_refs": extra_material_refs or [],
+            "group_id": "",
+            "hdr_settings": None,
+            "id": segment_id,
+            "intensifies_audio": False,
+            "is_placeholder": False,
+            "is_tone_modify": False,
+            "keyframe_refs": [],
+            "last_nonzero_volume": 1.0,
+            "material_id": material_id,
+            "render_index": render_index,
+            "responsive_layout": _responsive_layout(),
+            "reverse": False,
+            "source_timerange": {"start": 0, "duration": duration},
+            "speed": 1.0,
+            "target_timerange": {"start": start, "duration": duration},
+            "template_id": "",
+            "template_scene": "default",
+            "track_attribute": 0,
+            "track_render_index": 0,
+            "uniform_scale": None,
+            "visible": True,
+            "volume": volume
+        }
+    return {
+        "id": segment_id,
+        "material_id": material_id,
+        "target_timerange": {"start": start, "duration": duration},
+        "source_timerange": {"start": 0, "duration": duration},
+        "volume": volume,
+        "visible": True
+    }
+
+
+def iter_image_segments(layout, material_ids, segment_id, extra_refs, track_render_index=1):
+    """
+    按布局结果逐个生成图片片段
+
+    Args:
+        layout: draft_layout 的 TimelineLayout
+        material_ids: 图片材料 ID 列表（按图片序号）
+        segment_id: segment_id(k, material_id) → 第 k 个片段的 ID
+        extra_refs: extra_refs(k) → 第 k 个片段的 extra_material_refs（按固定顺序）
+        track_render_index: 轨道的叠放层级
+    """
+    for k, (_, img_idx, start, duration) in enumerate(layout.placements()):
+        material_id = material_ids[img_idx]
+        yield build_image_segment(
+            segment_id=segment_id(k, material_id),
+            material_id=material_id,
+            start=start,
+            duration=duration,
+            render_index=k + 1,
+            extra_material_refs=extra_refs(k),
+            track_render_index=track_render_index
+        )
+
+
+def iter_audio_segments(audio_materials, segment_id, volume, extra_refs=None,
+                        profile=PROFILE_CAPCUT):
+    """
+    音频片段首尾相接排列
+
+    Args:
+        audio_materials: [(材料 ID, 时长), ...]
+        segment_id: segment_id(i, material_id) → 第 i 个片段的 ID
+        volume: 音量（线性值）
+        extra_refs: extra_refs(i) → extra_material_refs（None = 不引用辅助材料）
+    """
+    current_time = 0
+    for i, (material_id, duration) in enumerate(audio_materials):
+        yield build_audio_segment(
+            segment_id(i, material_id), material_id, current_time, duration, volume,
+            render_index=i,
+            extra_material_refs=extra_refs(i) if extra_refs else None,
+            profile=profile
+        )
+        current_time += duration
+
+
+def build_track(track_id, track_type, segments, name=None):
+    """生成轨道；name 不为 None 时带上剪映的 is_default_name / name 字段"""
+    track = {"attribute": 0, "flag": 0, "id": track_id}
+    if name is not None:
+        track["is_default_name"] = not name
+        track["name"] = name
+    track["type"] = track_type
+    track["segments"] = segments
+    return track
+
+
+def find_track(draft, track_type, flag=0):
+    """模板中第一个指定类型（和 flag）的轨道；没有时返回 None"""
+    for track in draft['tracks']:
+        if track['type'] == track_type and track.get('flag', 0) == flag:
+            return track
+    return None
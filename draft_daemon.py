@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+素材目录监听：项目文件夹落地后自动生成草稿
+功能：
+1. 常驻运行，定期刷新项目索引（见 project_index），找出有音频和图片、还没有生成过草稿的项目
+2. 去抖：项目内音频/图片的文件名、大小、修改时间连续 DAEMON_SETTLE_SECONDS 秒不变，才认为复制完成
+3. 有界并发：最多 DAEMON_WORKERS 个项目同时生成，每个项目走 draft_batch 的流水线（独立子进程，可设超时）
+4. 结果写入项目索引（状态文件）：重启后不会重复生成；失败的项目在素材变化后才重试；
+   开始生成前重新读入索引中其他进程（project_index watch、批量生成）记录的结果，已完成的项目跳过
+5. 首次启动时已有的项目记为 existing 不处理（--backlog 则一并生成）
+
+用法：
+    python3 auto_capcut_draft_enhanced.py --daemon
+    python3 draft_daemon.py --split-mode 3 --workers 2 --settle 30 --timeout 900
+"""
+
+import os
+import sys
+import time
+import signal
+import fnmatch
+import logging
+import threading
+
+import draft_batch
+from draft_batch import ConfigError, STATUS_OK, STATUS_SKIPPED
+import auto_capcut_draft_enhanced as enhanced
+from folder_scan import scan_folder
+from project_index import ProjectIndex, HEARTBEAT_INTERVAL
+
+# 首次启动时已有项目的状态（不生成草稿，素材变化后才会处理）
+STATUS_EXISTING = "existing"
+
+
+def setup_daemon_logger():
+    """监听进程日志：输出到标准错误，带时间"""
+    logger = logging.getLogger("CapCutDraft.daemon")
+    if not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter('%(asctime)s %(message)s', datefmt='%H:%M:%S'))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+    return logger
+
+
+def media_signature(folder_path):
+    """
+    项目内音频/图片的 (路径, 大小, 修改时间)
+
+    复制中的文件会不断变大，但不一定改变文件夹本身的修改时间，所以逐个文件 stat。
+
+    Returns:
+        元组；文件夹不存在或文件正在被替换时返回 None
+    """
+    scan = scan_folder(folder_path)
+    if scan is None:
+        return None
+    signature = []
+    for path in scan.audio_files + scan.image_files:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        signature.append((path, st.st_size, st.st_mtime_ns))
+    return tuple(signature)
+
+
+def needs_draft(entry):
+    """索引条目是否需要生成草稿：从未处理过，或上次失败后素材有变化"""
+    if not entry or not entry["audio_count"] or not entry["image_count"]:
+        return False
+    last = entry.get("last_processed")
+    if not last:
+        return True
+    if last.get("status") == STATUS_OK:
+        return False
+    return last.get("source_mtime_ns") != entry.get("mtime_ns")
+
+
+class DraftDaemon:
+    """
+    监听素材根目录并自动生成草稿
+
+    Args:
+        options: draft_batch 合并后的配置（template 已确定）
+        settle: 去抖秒数
+        poll: 检查间隔秒数
+        workers: 同时生成的项目数
+    """
+
+    def __init__(self, options, settle, poll, workers, logger):
+        self.options = options
+        self.settle = settle
+        self.poll = poll
+        self.workers = max(1, workers)
+        self.logger = logger
+        self.index = ProjectIndex(enhanced.MATERIAL_BASE_FOLDER)
+        self.stop_event = threading.Event()
+        self.settling = {}   # 项目名 -> (素材签名, 签名首次出现的时间)
+        self.queue = []      # 已稳定、等待生成的项目名（按发现顺序）
+        self.running = {}    # 项目名 -> 线程
+
+    def mark_existing(self):
+        """首次启动：把已有的待处理项目记为 existing"""
+        names = [name for name, entry in self.index.projects.items() if needs_draft(entry)]
+        for name in names:
+            self.index.mark_processed(name, None, STATUS_EXISTING)
+        self.index.data["daemon_started"] = int(time.time())
+        self.index.save()
+        if names:
+            self.logger.info(f"📋 首次启动：{len(names)} 个已有项目不处理（使用 --backlog 可一并生成）")
+
+    def _matches(self, name):
+        return any(fnmatch.fnmatch(name, pattern) for pattern in self.options["folders"])
+
+    def scan(self):
+        """刷新索引，更新去抖状态，把已稳定的项目加入队列"""
+        self.index.refresh(force=True)
+        self.index.sync()
+        now = time.monotonic()
+        candidates = set()
+        for name, entry in list(self.index.projects.items()):
+            if name in self.running or name in self.queue:
+                continue
+            if self._matches(name) and needs_draft(entry):
+                candidates.add(name)
+
+        for name in list(self.settling):
+            if name not in candidates:
+                del self.settling[name]
+        for name in sorted(candidates):
+            signature = media_signature(os.path.join(enhanced.MATERIAL_BASE_FOLDER, name))
+            if signature is None:
+                self.settling.pop(name, None)
+                continue
+            previous = self.settling.get(name)
+            if previous is None or previous[0] != signature:
+                if previous is None:
+                    self.logger.info(f"📥 发现新项目: {name}，等待素材稳定 {self.settle:.0f} 秒")
+                self.settling[name] = (signature, now)
+            elif now - previous[1] >= self.settle:
+                del self.settling[name]
+                self.queue.append(name)
+                self.logger.info(f"⏳ 加入队列: {name}")
+
+    def dispatch(self):
+        """在并发上限内启动排队的项目"""
+        for name, thread in list(self.running.items()):
+            if not thread.is_alive():
+                thread.join()
+                del self.running[name]
+        if self.queue:
+            self.index.sync()
+        while self.queue and len(self.running) < self.workers and not self.stop_event.is_set():
+            name = self.queue.pop(0)
+            if not needs_draft(self.index.get(name)):
+                # 排队期间其他进程已经生成（或记为 existing）
+                self.logger.info(f"⏭️  已有草稿，跳过: {name}")
+                continue
+            thread = threading.Thread(target=self._build, args=(name,), daemon=True)
+            self.running[name] = thread
+            thread.start()
+            self.logger.info(f"🎬 开始生成: {name}（进行中 {len(self.running)}/{self.workers}）")
+
+    def _build(self, name):
+        """工作线程：用 draft_batch 流水线生成一个项目（独立子进程，超时终止）"""
+        folder_path = os.path.join(enhanced.MATERIAL_BASE_FOLDER, name)
+        try:
+            result = draft_batch.run_projects_pipelined([folder_path], self.options)[0]
+        except Exception as e:
+            result = {"folder": name, "path": folder_path, "status": draft_batch.STATUS_FAILED,
+                      "error": f"{type(e).__name__}: {e}"}
+
+        status = result["status"]
+        if status == STATUS_OK:
+            self.logger.info(f"✅ 完成: {name} → {result.get('draft_folder')}（{result.get('seconds', 0):.1f} 秒）")
+        elif self.stop_event.is_set():
+            # 退出时被中断的项目不记录，下次启动重新生成
+            self.logger.info(f"⏹️  已中断: {name}")
+            return
+        else:
+            error = (result.get("error") or "").strip().splitlines()
+            self.logger.error(f"❌ {status}: {name}: {error[0] if error else ''}")
+        if status != STATUS_SKIPPED:
+            self.index.mark_processed(name, result.get("draft_folder"), status)
+            self.index.save()
+
+    def run(self):
+        """主循环，直到 stop_event 置位；返回时所有进行中的项目已结束"""
+        last_heartbeat = 0
+        try:
+            while not self.stop_event.is_set():
+                self.scan()
+                self.dispatch()
+                # 心跳：监听期间启动主程序直接使用索引
+                if time.time() - last_heartbeat >= HEARTBEAT_INTERVAL:
+                    self.index.save(heartbeat=True)
+                    last_heartbeat = time.time()
+                else:
+                    self.index.save()
+                self.stop_event.wait(self.poll)
+        finally:
+            self.stop_event.set()
+            if self.running:
+                self.logger.info(f"👋 正在等待 {len(self.running)} 个进行中的项目结束...")
+            for thread in self.running.values():
+                thread.join()
+            self.index.release()
+
+
+def parse_args(argv=None):
+    parser = draft_batch.build_parser("CapCut 草稿监听模式：素材文件夹复制完成后自动生成草稿")
+    parser.add_argument("--settle", type=float,
+                        help=f"素材稳定多少秒后开始生成（默认: {enhanced.DAEMON_SETTLE_SECONDS}）")
+    parser.add_argument("--poll", type=float,
+                        help=f"检查素材目录的间隔秒数（默认: {enhanced.DAEMON_POLL_SECONDS}）")
+    parser.add_argument("--backlog", action="store_true",
+                        help="首次启动时也为已有的、还没有草稿的项目生成草稿")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """命令行入口，返回退出码"""
+    args = parse_args(argv)
+    logger = setup_daemon_logger()
+    try:
+        options = draft_batch.build_options(args)
+        draft_batch.apply_options(options)
+        if not os.path.isdir(enhanced.MATERIAL_BASE_FOLDER):
+            raise ConfigError(f"素材文件夹不存在: {enhanced.MATERIAL_BASE_FOLDER}")
+        # 模板在启动时确定，之后生成的草稿不会被当作模板
+        options = dict(options, template=draft_batch.resolve_template(options))
+    except ConfigError as e:
+        sys.stderr.write(f"❌ {e}\n")
+        return draft_batch.EXIT_CONFIG_ERROR
+
+    workers = args.workers or enhanced.DAEMON_WORKERS
+    daemon = DraftDaemon(
+        # 每个项目内部不再并行，并发由监听进程的队列控制
+        dict(options, workers=1, io_workers=1),
+        settle=enhanced.DAEMON_SETTLE_SECONDS if args.settle is None else args.settle,
+        poll=enhanced.DAEMON_POLL_SECONDS if args.poll is None else args.poll,
+        workers=workers,
+        logger=logger,
+    )
+    daemon.index.refresh(force=True)
+    if "daemon_started" not in daemon.index.data:
+        if args.backlog:
+            daemon.index.data["daemon_started"] = int(time.time())
+        else:
+            daemon.mark_existing()
+
+    signal.signal(signal.SIGTERM, lambda signum, frame: daemon.stop_event.set())
+    logger.info(f"👀 监听 {enhanced.MATERIAL_BASE_FOLDER}（并发 {daemon.workers}，"
+                f"稳定 {daemon.settle:.0f} 秒，模板 {os.path.basename(options['template'])}），Ctrl+C 退出")
+    try:
+        daemon.run()
+    except KeyboardInterrupt:
+        pass
+    logger.info("👋 已退出")
+    return draft_batch.EXIT_OK
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+草稿 ID 生成
+功能：
+1. random 模式：与原来一致，每个 ID 都是 uuid4（同一个键在一次生成中返回同一个 ID）
+2. deterministic 模式：由 种子（项目名）+ 材料角色 + 序号 推导 UUIDv5
+   相同输入两次生成的 JSON 完全一致，便于构建缓存与 diff 增量更新
+3. deterministic 模式不调用系统随机数，只做一次 SHA-1，数千个 ID 也很快
+"""
+
+import uuid
+import hashlib
+
+ID_MODE_RANDOM = "random"
+ID_MODE_DETERMINISTIC = "deterministic"
+ID_MODES = (ID_MODE_RANDOM, ID_MODE_DETERMINISTIC)
+
+# 所有确定性 ID 的根命名空间
+_ROOT_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, "auto_capcut/draft")
+
+
+def random_id(key=None):
+    """uuid4，大写（CapCut 草稿中的格式）"""
+    return str(uuid.uuid4()).upper()
+
+
+class DraftIdFactory:
+    """
+    草稿 ID 工厂
+
+    用法：
+        ids = DraftIdFactory("deterministic", seed="项目名")
+        ids("image:0")        # 按语义键生成
+        ids.next("segment")   # 按角色自动编号：segment:0, segment:1, ...
+    """
+
+    def __init__(self, mode=ID_MODE_RANDOM, seed=""):
+        if mode not in ID_MODES:
+            raise ValueError(f"未知的 ID 模式: {mode}（可选: {', '.join(ID_MODES)}）")
+        self.mode = mode
+        self.seed = seed
+        self._counters = {}
+        self._random_ids = {}
+        # 预先计算 SHA-1(命名空间)，每个 ID 只需 copy + update，
+        # 结果与 uuid.uuid5(namespace, key) 完全相同
+        namespace = uuid.uuid5(_ROOT_NAMESPACE, str(seed))
+        self._hasher = hashlib.sha1(namespace.bytes)
+
+    @property
+    def deterministic(self):
+        return self.mode == ID_MODE_DETERMINISTIC
+
+    def __call__(self, key):
+        """按语义键生成 ID（random 模式下键只用于保证同一个键得到同一个 ID）"""
+        if self.mode == ID_MODE_RANDOM:
+            material_id = self._random_ids.get(key)
+            if material_id is None:
+                material_id = self._random_ids[key] = random_id()
+            return material_id
+        hasher = self._hasher.copy()
+        hasher.update(key.encode("utf-8"))
+        digest = bytearray(hasher.digest()[:16])
+        # 设置 version=5 与 RFC 4122 variant 位（等价于 uuid.UUID(..., version=5)，但省去对象构造）
+        digest[6] = (digest[6] & 0x0F) | 0x50
+        digest[8] = (digest[8] & 0x3F) | 0x80
+        h = digest.hex().upper()
+        return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+
+    def next(self, role):
+        """按角色自动编号生成 ID，键为 "角色:序号" """
+        index = self._counters.get(role, 0)
+        self._counters[role] = index + 1
+        return self(f"{role}:{index}")
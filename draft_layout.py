@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+时间线布局引擎（图片 → 音频片段分配）
+功能：
+1. 输入音频片段时长数组，一次性计算每个图片片段的 (音频段, 图片序号, 起点, 时长)
+2. 分配策略可插拔：
+   - PairSplitPolicy: 短音频(<1.5秒)配1张并跳过下一张，长音频配2张平分（原有规则）
+   - FixedCountPolicy: 每段音频固定 N 张图片平分
+   - DurationWeightedPolicy: 按时长分配图片数（每 N 秒一张）
+   - BeatAlignedPolicy: 在节拍点处切换图片
+3. 安装 numpy 时整段向量化计算（首次计算时才导入），否则回退到等价的纯 Python 实现
+4. JSON 生成只需遍历结果，2000 段音频的布局在毫秒级完成
+
+时间单位统一为微秒（与 CapCut 草稿一致）。
+"""
+
+from lazy_imports import lazy_import
+
+# numpy（向量化计算）：延迟导入，第一次计算布局时才加载
+np = lazy_import("numpy")
+NUMPY_AVAILABLE = np is not None
+
+
+class TimelineLayout:
+    """
+    布局结果（按时间顺序排列的图片片段）
+
+    Attributes:
+        segment_index: 每个图片片段所属的音频段序号
+        image_index: 每个图片片段使用的图片序号
+        start: 起点（微秒）
+        duration: 时长（微秒）
+        images_consumed: 分配过程消耗到的图片位置（含被跳过的图片）
+        empty_segments: 没有分到图片的音频段序号
+    """
+
+    def __init__(self, segment_index, image_index, start, duration,
+                 images_consumed, empty_segments):
+        self.segment_index = segment_index
+        self.image_index = image_index
+        self.start = start
+        self.duration = duration
+        self.images_consumed = images_consumed
+        self.empty_segments = empty_segments
+
+    def __len__(self):
+        return len(self.start)
+
+    def placements(self):
+        """逐个返回 (音频段序号, 图片序号, 起点, 时长)，均为 Python int"""
+        columns = (self.segment_index, self.image_index, self.start, self.duration)
+        if NUMPY_AVAILABLE and isinstance(self.start, np.ndarray):
+            columns = tuple(c.tolist() for c in columns)
+        return zip(*columns)
+
+
+def _segment_starts(durations):
+    """音频段起点（前缀和）"""
+    starts = []
+    current = 0
+    for d in durations:
+        starts.append(current)
+        current += d
+    return starts
+
+
+# ============================================================================
+# 通用分配：每段 counts[i] 张图片平分时长，消耗 consumption[i] 个图片位置
+# ============================================================================
+
+def _allocate_equal_numpy(durations, counts, consumption, image_count):
+    d = np.asarray(durations, dtype=np.int64)
+    counts = np.asarray(counts, dtype=np.int64)
+    consumption = np.asarray(consumption, dtype=np.int64)
+
+    seg_starts = np.concatenate(([0], np.cumsum(d)[:-1])) if len(d) else d
+    first_image = np.concatenate(([0], np.cumsum(consumption)[:-1])) if len(d) else d
+    available = np.clip(image_count - first_image, 0, None)
+    placed = np.minimum(counts, available)
+
+    total = int(placed.sum())
+    seg_idx = np.repeat(np.arange(len(d)), placed)
+    offsets = np.repeat(np.cumsum(placed) - placed, placed)
+    sub = np.arange(total) - offsets
+    n = placed[seg_idx]
+    seg_d = d[seg_idx]
+
+    # 第 j 张图片的边界 = d * j // n（最后一张补齐余数，与原来的 half / remaining 一致）
+    lo = seg_d * sub // n
+    hi = seg_d * (sub + 1) // n
+    image_index = first_image[seg_idx] + sub
+
+    consumed_end = np.where(placed == counts, first_image + consumption, first_image + placed)
+    images_consumed = int(consumed_end[placed > 0].max()) if total else 0
+    empty = np.nonzero(placed == 0)[0].tolist()
+
+    return TimelineLayout(seg_idx, image_index, seg_starts[seg_idx] + lo, hi - lo,
+                          images_consumed, empty)
+
+
+def _allocate_equal_python(durations, counts, consumption, image_count):
+    seg_index, image_index, start, duration = [], [], [], []
+    images_consumed = 0
+    empty = []
+    first = 0
+    for i, (seg_start, d) in enumerate(zip(_segment_starts(durations), durations)):
+        placed = min(counts[i], max(image_count - first, 0))
+        if placed == 0:
+            empty.append(i)
+        for j in range(placed):
+            lo = d * j // placed
+            hi = d * (j + 1) // placed
+            seg_index.append(i)
+            image_index.append(first + j)
+            start.append(seg_start + lo)
+            duration.append(hi - lo)
+        if placed:
+            images_consumed = first + (consumption[i] if placed == counts[i] else placed)
+        first += consumption[i]
+    return TimelineLayout(seg_index, image_index, start, duration, images_consumed, empty)
+
+
+def allocate_equal(durations, counts, consumption, image_count):
+    """
+    通用分配：第 i 段音频平分给 counts[i] 张图片，并消耗 consumption[i] 个图片位置
+
+    图片不足时按剩余数量截断（剩 1 张就用 1 张占满整段）。
+    """
+    if NUMPY_AVAILABLE:
+        return _allocate_equal_numpy(durations, counts, consumption, image_count)
+    return _allocate_equal_python(list(durations), list(counts), list(consumption), image_count)
+
+
+# ============================================================================
+# 分配策略
+# ============================================================================
+
+class PairSplitPolicy:
+    """
+    原有规则：
+    - 短音频 (< threshold) → 1 张图片，跳过下一张（增加视觉节奏感）
+    - 长音频 (≥ threshold) → 2 张图片平分；只剩 1 张时用 1 张占满
+    """
+
+    name = "pair"
+
+    def __init__(self, threshold_micro=1500000):
+        self.threshold_micro = threshold_micro
+
+    def describe(self):
+        seconds = self.threshold_micro / 1000000
+        return [
+            f"短音频 (<{seconds:g}秒) → 配 1 张图片，跳过下一张",
+            f"长音频 (≥{seconds:g}秒) → 配 2 张图片，平均分配",
+        ]
+
+    def layout(self, durations, image_count):
+        if NUMPY_AVAILABLE:
+            d = np.asarray(durations, dtype=np.int64)
+            counts = np.where(d < self.threshold_micro, 1, 2)
+            consumption = np.full(len(d), 2, dtype=np.int64)
+        else:
+            counts = [1 if d < self.threshold_micro else 2 for d in durations]
+            consumption = [2] * len(durations)
+        return allocate_equal(durations, counts, consumption, image_count)
+
+
+class FixedCountPolicy:
+    """每段音频固定 N 张图片，平分时长"""
+
+    name = "fixed"
+
+    def __init__(self, images_per_segment=2):
+        if images_per_segment < 1:
+            raise ValueError("images_per_segment 必须 ≥ 1")
+        self.images_per_segment = images_per_segment
+
+    def describe(self):
+        return [f"每段音频 → 配 {self.images_per_segment} 张图片，平均分配"]
+
+    def layout(self, durations, image_count):
+        counts = [self.images_per_segment] * len(durations)
+        return allocate_equal(durations, counts, counts, image_count)
+
+
+class DurationWeightedPolicy:
+    """按时长分配：每 seconds_per_image 秒一张图片（至少 1 张，最多 max_per_segment 张）"""
+
+    name = "weighted"
+
+    def __init__(self, seconds_per_image=1.5, max_per_segment=6):
+        if seconds_per_image <= 0:
+            raise ValueError("seconds_per_image 必须 > 0")
+        self.micro_per_image = int(seconds_per_image * 1000000)
+        self.max_per_segment = max_per_segment
+
+    def describe(self):
+        return [f"按时长分配 → 每 {self.micro_per_image / 1000000:g} 秒 1 张图片"
+                f"（每段最多 {self.max_per_segment} 张）"]
+
+    def layout(self, durations, image_count):
+        if NUMPY_AVAILABLE:
+            d = np.asarray(durations, dtype=np.int64)
+            counts = np.clip(-(-d // self.micro_per_image), 1, self.max_per_segment)
+        else:
+            counts = [min(max(-(-d // self.micro_per_image), 1), self.max_per_segment)
+                      for d in durations]
+        return allocate_equal(durations, counts, counts, image_count)
+
+
+class BeatAlignedPolicy:
+    """
+    节拍对齐：每段音频从起点开始，在落入该段内的节拍点处切换到下一张图片
+
+    Args:
+        beat_times_micro: 时间线上的节拍点（微秒）
+        min_gap_micro: 距离片段边界太近的节拍点会被忽略，避免出现极短的图片
+    """
+
+    name = "beats"
+
+    def __init__(self, beat_times_micro, min_gap_micro=200000):
+        self.beats = sorted(int(b) for b in beat_times_micro)
+        self.min_gap_micro = min_gap_micro
+
+    def describe(self):
+        return [f"节拍对齐 → 在 {len(self.beats)} 个节拍点处切换图片"]
+
+    def _cuts_python(self, durations):
+        import bisect
+        cuts = []
+        for seg_start, d in zip(_segment_starts(durations), durations):
+            lo = bisect.bisect_right(self.beats, seg_start + self.min_gap_micro)
+            hi = bisect.bisect_left(self.beats, seg_start + d - self.min_gap_micro)
+            cuts.append([b - seg_start for b in self.beats[lo:hi]])
+        return cuts
+
+    def layout(self, durations, image_count):
+        durations = list(durations)
+        cuts = self._cuts_python(durations)
+        seg_index, image_index, start, duration = [], [], [], []
+        empty = []
+        first = 0
+        images_consumed = 0
+        for i, (seg_start, d) in enumerate(zip(_segment_starts(durations), durations)):
+            bounds = [0] + cuts[i] + [d]
+            wanted = len(bounds) - 1
+            placed = min(wanted, max(image_count - first, 0))
+            if placed == 0:
+                empty.append(i)
+            for j in range(placed):
+                lo = bounds[j]
+                hi = bounds[j + 1] if j < placed - 1 else d  # 图片不足时最后一张补满
+                seg_index.append(i)
+                image_index.append(first + j)
+                start.append(seg_start + lo)
+                duration.append(hi - lo)
+            first += wanted
+            if placed:
+                images_consumed = first if placed == wanted else first - wanted + placed
+        return TimelineLayout(seg_index, image_index, start, duration, images_consumed, empty)
+
+
+def load_beat_times(path):
+    """读取节拍文件：每行一个时间点（秒），忽略空行和 # 注释"""
+    beats = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.split('#', 1)[0].strip()
+            if line:
+                beats.append(int(float(line) * 1000000))
+    return beats
+
+
+def make_policy(spec):
+    """
+    根据配置字符串创建分配策略
+
+    支持:
+        "pair"                    原有规则（默认）
+        "pair:1.5"                自定义长短音频分界（秒）
+        "fixed:3"                 每段 3 张
+        "weighted:1.5"            每 1.5 秒 1 张
+        "beats:/path/beats.txt"   按节拍文件切换
+    """
+    if not isinstance(spec, str):
+        return spec  # 已是策略对象
+    name, _, arg = spec.partition(":")
+    name = name.strip().lower()
+    if name == "pair":
+        return PairSplitPolicy(int(float(arg) * 1000000)) if arg else PairSplitPolicy()
+    if name == "fixed":
+        return FixedCountPolicy(int(arg) if arg else 2)
+    if name == "weighted":
+        return DurationWeightedPolicy(float(arg) if arg else 1.5)
+    if name == "beats":
+        if not arg:
+            raise ValueError("beats 策略需要节拍文件路径，例如 beats:/path/beats.txt")
+        return BeatAlignedPolicy(load_beat_times(arg))
+    raise ValueError(f"未知的图片分配策略: {spec}")
+
+
+def layout_timeline(durations, image_count, policy="pair"):
+    """
+    计算图片在时间线上的布局
+
+    Args:
+        durations: 音频片段时长列表（微秒）
+        image_count: 可用图片数量
+        policy: 策略对象或配置字符串（见 make_policy）
+
+    Returns:
+        TimelineLayout
+    """
+    return make_policy(policy).layout(durations, image_count)
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+草稿增量清单（manifest）
+功能：
+1. 记录生成草稿时的输入指纹（音频、分段参数、每张图片）
+2. 记录每个材料 / 片段 / 轨道的 ID，增量重建时原样复用，CapCut 缓存保持有效
+3. 判断哪些音频片段、图片需要重新处理
+"""
+
+import os
+import json
+
+from draft_ids import random_id
+
+MANIFEST_FILENAME = "auto_capcut_manifest.json"
+MANIFEST_VERSION = 1
+
+
+def file_fingerprint(path):
+    """
+    文件指纹：大小 + 修改时间（纳秒）
+
+    不读取文件内容，替换图片或重新导出音频都会改变指纹。
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return f"{st.st_size}-{st.st_mtime_ns}"
+
+
+class DraftManifest:
+    """
+    单个草稿的增量清单
+
+    ids 以语义键（如 "image:xxx.png:<指纹>"）保存上一次生成的 ID：
+    键相同则复用旧 ID，键变化（输入变化）则生成新 ID。
+    本次未用到的键在保存时自动丢弃。
+    """
+
+    def __init__(self, draft_folder, data=None, id_factory=None):
+        """
+        Args:
+            draft_folder: 草稿文件夹
+            data: 上一次保存的清单内容
+            id_factory: 新键的 ID 生成函数 f(key)，默认 uuid4（可传入 DraftIdFactory）
+        """
+        self.draft_folder = draft_folder
+        self.path = os.path.join(draft_folder, MANIFEST_FILENAME)
+        self.previous = data or {}
+        self.data = {
+            "version": MANIFEST_VERSION,
+            "audio": {},
+            "images": {},
+            "ids": {},
+        }
+        self._previous_ids = self.previous.get("ids", {})
+        self._id_factory = id_factory or random_id
+        self.reused_ids = 0
+
+    @classmethod
+    def load(cls, draft_folder, id_factory=None):
+        """读取草稿文件夹中的清单，不存在或版本不符时返回空清单"""
+        path = os.path.join(draft_folder, MANIFEST_FILENAME)
+        data = None
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                data = None
+        if data and data.get("version") != MANIFEST_VERSION:
+            data = None
+        return cls(draft_folder, data, id_factory=id_factory)
+
+    @property
+    def is_empty(self):
+        return not self.previous
+
+    def get(self, key, default=None):
+        """读取上一次记录的值"""
+        return self.previous.get(key, default)
+
+    def set(self, key, value):
+        """记录本次生成的值"""
+        self.data[key] = value
+
+    def id_for(self, key):
+        """
+        按语义键取得 ID：上一次存在则复用，否则生成新 ID
+
+        Args:
+            key: 语义键，需由输入唯一决定
+
+        Returns:
+            ID 字符串
+        """
+        if key in self.data["ids"]:
+            return self.data["ids"][key]
+        old_id = self._previous_ids.get(key)
+        if old_id:
+            self.reused_ids += 1
+            new_id = old_id
+        else:
+            new_id = self._id_factory(key)
+        self.data["ids"][key] = new_id
+        return new_id
+
+    # ------------------------------------------------------------------
+    # 音频
+    # ------------------------------------------------------------------
+
+    def reusable_audio_segments(self, audio_file, split_params):
+        """
+        若音频源文件与分段参数都没有变化，且片段文件仍在，返回上次的分段结果
+
+        Returns:
+            [(片段路径, 起始ms, 时长ms), ...] 或 None
+        """
+        previous = self.previous.get("audio") or {}
+        if (previous.get("source") != os.path.abspath(audio_file)
+                or previous.get("fingerprint") != file_fingerprint(audio_file)
+                or previous.get("split_params") != split_params):
+            return None
+
+        segments = []
+        for item in previous.get("segments", []):
+            path = os.path.join(self.draft_folder, item["path"])
+            if file_fingerprint(path) != item.get("fingerprint"):
+                return None
+            segments.append((path, item["start_ms"], item["duration_ms"]))
+        return segments or None
+
+    def record_audio(self, audio_file, split_params, segments):
+        """记录本次的音频输入与分段结果"""
+        self.data["audio"] = {
+            "source": os.path.abspath(audio_file),
+            "fingerprint": file_fingerprint(audio_file),
+            "split_params": split_params,
+            "segments": [
+                {
+                    "path": os.path.relpath(path, self.draft_folder),
+                    "fingerprint": file_fingerprint(path),
+                    "start_ms": start_ms,
+                    "duration_ms": duration_ms,
+                }
+                for path, start_ms, duration_ms in segments
+            ],
+        }
+
+    # ------------------------------------------------------------------
+    # 图片
+    # ------------------------------------------------------------------
+
+    def image_unchanged(self, image_file, dest_path):
+        """
+        图片源文件未变化且草稿中的副本仍在
+
+        按草稿中的文件名记录；image_file 为实际导入的文件（预缩放时为缓存中的缩放结果）
+        """
+        previous = (self.previous.get("images") or {}).get(os.path.basename(dest_path))
+        return (previous is not None
+                and previous == file_fingerprint(image_file)
+                and os.path.exists(dest_path))
+
+    def record_image(self, image_file, dest_path=None):
+        self.data["images"][os.path.basename(dest_path or image_file)] = file_fingerprint(image_file)
+
+    def stale_media_files(self, media_folder, keep_paths):
+        """
+        上一次生成、但本次不再使用的 media 文件
+
+        Args:
+            media_folder: 草稿的 Resources/media 文件夹
+            keep_paths: 本次使用的文件路径集合
+        """
+        keep = {os.path.abspath(p) for p in keep_paths}
+        stale = []
+        previous_audio = (self.previous.get("audio") or {}).get("segments", [])
+        candidates = [os.path.join(self.draft_folder, item["path"]) for item in previous_audio]
+        candidates += [os.path.join(media_folder, name) for name in (self.previous.get("images") or {})]
+        for path in candidates:
+            if os.path.abspath(path) not in keep and os.path.exists(path):
+                stale.append(path)
+        return stale
+
+    def save(self):
+        """写入清单（临时文件 + 替换）"""
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+图片片段的辅助材料池
+功能：
+1. 每个图片片段在 extra_material_refs 中引用一组辅助材料
+   （speed / placeholder_info / canvas_blur / canvas_color / sound_channel_mapping / material_color / loudness / vocal_separation）
+2. 这些材料除 ID 外内容完全相同：可共享的类型整份草稿只生成一份，所有片段引用同一个 ID
+3. 不可共享的类型仍按片段生成最精简的条目：CapCut 会直接修改片段引用的材料的类型
+   （speed = 调速，canvas_blur = 背景画布，color = 背景颜色），共享时改一个片段会改到所有片段
+"""
+
+import itertools
+
+# 辅助材料类型：名称 → (materials 中的列表名, 生成函数)
+# 顺序即 extra_material_refs 中的顺序（顺序很重要）
+SEGMENT_MATERIAL_ORDER = (
+    "speed",
+    "placeholder",
+    "canvas_blur",
+    "canvas_color",
+    "sound_channel",
+    "color",
+    "loudness",
+    "vocal",
+)
+
+# auto_capcut_draft_enhanced 图片片段默认引用的类型（canvas_blur 只在启用背景模糊时生成）
+DEFAULT_SEGMENT_KINDS = ("speed", "placeholder", "canvas_blur", "sound_channel", "color", "loudness", "vocal")
+
+# 剪映专业版（zidongjianji）图片片段、音频片段引用的类型
+JIANYING_VIDEO_KINDS = ("speed", "placeholder", "canvas_color", "sound_channel", "vocal")
+JIANYING_AUDIO_KINDS = ("speed", "placeholder", "sound_channel", "vocal")
+
+# 默认可共享的辅助材料（整份草稿只生成一份）
+# speed / canvas_blur / color 在 CapCut 中按片段原地修改，始终按片段生成
+DEFAULT_SHARED_KINDS = (
+    "placeholder",
+    "sound_channel",
+    "loudness",
+    "vocal",
+)
+
+
+def _speed(material_id, **_):
+    return {
+        "curve_speed": None,
+        "id": material_id,
+        "mode": 0,
+        "speed": 1.0,
+        "type": "speed"
+    }
+
+
+def _placeholder(material_id, **_):
+    return {
+        "error_path": "",
+        "error_text": "",
+        "id": material_id,
+        "meta_type": "none",
+        "res_path": "",
+        "res_text": "",
+        "type": "placeholder_info"
+    }
+
+
+def _canvas_blur(material_id, blur=0.375, **_):
+    return {
+        "album_image": "",
+        "blur": blur,
+        "color": "",
+        "id": material_id,
+        "image": "",
+        "image_id": "",
+        "image_name": "",
+        "source_platform": 0,
+        "team_id": "",
+        "type": "canvas_blur"
+    }
+
+
+def _canvas_color(material_id, **_):
+    return {
+        "album_image": "",
+        "blur": 0.0,
+        "color": "",
+        "id": material_id,
+        "image": "",
+        "image_id": "",
+        "image_name": "",
+        "source_platform": 0,
+        "team_id": "",
+        "type": "canvas_color"
+    }
+
+
+def _sound_channel(material_id, **_):
+    return {
+        "audio_channel_mapping": 0,
+        "id": material_id,
+        "is_config_open": False,
+        "type": ""
+    }
+
+
+def _color(material_id, **_):
+    return {
+        "gradient_angle": 90.0,
+        "gradient_colors": [],
+        "gradient_percents": [],
+        "height": 0.0,
+        "id": material_id,
+        "is_color_clip": False,
+        "is_gradient": False,
+        "solid_color": "",
+        "width": 0.0
+    }
+
+
+def _loudness(material_id, **_):
+    return {
+        "enable": False,
+        "file_id": "",
+        "id": material_id,
+        "loudness_param": None,
+        "target_loudness": 0.0,
+        "time_range": None
+    }
+
+
+def _vocal(material_id, **_):
+    return {
+        "choice": 0,
+        "enter_from": "",
+        "final_algorithm": "",
+        "id": material_id,
+        "production_path": "",
+        "removed_sounds": [],
+        "time_range": None,
+        "type": "vocal_separation"
+    }
+
+
+_KINDS = {
+    "speed": ("speeds", _speed),
+    "placeholder": ("placeholder_infos", _placeholder),
+    "canvas_blur": ("canvases", _canvas_blur),
+    "canvas_color": ("canvases", _canvas_color),
+    "sound_channel": ("sound_channel_mappings", _sound_channel),
+    "color": ("material_colors", _color),
+    "loudness": ("loudnesses", _loudness),
+    "vocal": ("vocal_separations", _vocal),
+}
+
+
+class SegmentMaterialPool:
+    """
+    图片片段辅助材料池
+
+    片段引用与材料条目分开生成：segment_refs 只返回 ID，
+    attach 把材料列表以生成器形式挂到 draft['materials']，写入 JSON 时才展开。
+    new_id 需要对同一个键返回同一个 ID（DraftIdFactory / DraftManifest.id_for 均满足）。
+
+    Args:
+        new_id: ID 生成函数 f(key)
+        shared_kinds: 可共享的材料类型
+        canvas_blur: 背景模糊强度，None 表示不启用背景模糊
+        kinds: 片段引用的类型（按 SEGMENT_MATERIAL_ORDER 排列）
+        key_prefix: 语义键前缀，同一份草稿有多个池（如图片片段、音频片段）时区分各自的材料
+    """
+
+    def __init__(self, new_id, shared_kinds=DEFAULT_SHARED_KINDS, canvas_blur=None,
+                 kinds=DEFAULT_SEGMENT_KINDS, key_prefix=""):
+        self.new_id = new_id
+        self.shared_kinds = set(shared_kinds)
+        self.canvas_blur = canvas_blur
+        self.key_prefix = key_prefix
+        self.kinds = [kind for kind in SEGMENT_MATERIAL_ORDER
+                      if kind in kinds and (kind != "canvas_blur" or canvas_blur is not None)]
+        self.created = {kind: 0 for kind in _KINDS}
+
+    def _key(self, kind, index):
+        suffix = "shared" if kind in self.shared_kinds else index
+        return f"{self.key_prefix}{kind}:{suffix}"
+
+    def ref(self, kind, index):
+        """第 index 个片段的某类辅助材料 ID"""
+        return self.new_id(self._key(kind, index))
+
+    def segment_refs(self, index):
+        """第 index 个图片片段的 extra_material_refs（按固定顺序）"""
+        return [self.new_id(self._key(kind, index)) for kind in self.kinds]
+
+    def _iter_materials(self, kind, segment_count):
+        _, factory = _KINDS[kind]
+        indexes = range(min(segment_count, 1)) if kind in self.shared_kinds else range(segment_count)
+        for index in indexes:
+            yield factory(self.ref(kind, index), blur=self.canvas_blur)
+
+    def attach(self, materials, segment_count, wrap=list):
+        """
+        把 segment_count 个片段用到的辅助材料追加到 draft['materials']
+
+        Args:
+            materials: draft['materials']
+            segment_count: 图片片段数量
+            wrap: 材料序列的包装方式，默认 list 直接展开；
+                  传入 draft_writer.StreamedArray 则写入 JSON 时才逐个生成
+        """
+        for kind in self.kinds:
+            list_name, _ = _KINDS[kind]
+            existing = materials.get(list_name) or []
+            self.created[kind] = min(segment_count, 1) if kind in self.shared_kinds else segment_count
+            materials[list_name] = wrap(itertools.chain(existing, self._iter_materials(kind, segment_count)))
+
+    @property
+    def total_created(self):
+        return sum(self.created.values())
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+草稿生成的分阶段计时与性能分析
+功能：
+1. span() 上下文管理器记录每个阶段的耗时、CPU 时间、复制字节数和进程峰值内存（RSS）
+2. 阶段可嵌套（如 步骤4 音频分段 / 检测静音），复制的字节数同时计入所有外层阶段
+3. 结束时每个阶段写一行 JSON 到 logs/metrics.jsonl（多个进程同时追加也不会交错）
+4. 可选 cProfile / pyinstrument 性能分析，结果保存到 logs/profiles/
+"""
+
+import os
+import sys
+import json
+import time
+import contextlib
+from datetime import datetime
+
+from lazy_imports import module_available
+
+# 峰值内存（Windows 没有 resource 模块）
+try:
+    import resource
+    RESOURCE_AVAILABLE = True
+except ImportError:
+    RESOURCE_AVAILABLE = False
+
+# pyinstrument（采样分析器，可选）：开启性能分析时才导入
+PYINSTRUMENT_AVAILABLE = module_available("pyinstrument")
+
+# 支持的分析器
+PROFILER_CPROFILE = "cprofile"
+PROFILER_PYINSTRUMENT = "pyinstrument"
+
+
+def peak_rss_mb():
+    """进程启动以来的峰值内存（MB）；不支持时返回 None"""
+    if not RESOURCE_AVAILABLE:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS 单位为字节，Linux 为 KB
+    if sys.platform == "darwin":
+        return round(peak / 1024 / 1024, 1)
+    return round(peak / 1024, 1)
+
+
+class _Span:
+    """一个计时阶段"""
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+        self.bytes = 0
+        self.seconds = 0.0
+        self.cpu_seconds = 0.0
+
+    def __enter__(self):
+        self.metrics._stack.append(self)
+        self.path = "/".join(span.name for span in self.metrics._stack)
+        self._rss_start = peak_rss_mb()
+        self._cpu_start = time.process_time()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.seconds = time.perf_counter() - self._start
+        self.cpu_seconds = time.process_time() - self._cpu_start
+        rss = peak_rss_mb()
+        self.metrics._stack.remove(self)
+        self.metrics.records.append({
+            "span": self.path,
+            "seconds": round(self.seconds, 4),
+            "cpu_seconds": round(self.cpu_seconds, 4),
+            "bytes_copied": self.bytes,
+            "peak_rss_mb": rss,
+            "rss_growth_mb": None if rss is None else round(rss - self._rss_start, 1),
+            "error": exc_type.__name__ if exc_type else None,
+        })
+        return False
+
+
+class DraftMetrics:
+    """
+    一次草稿生成的计时记录
+
+    Args:
+        folder: 素材文件夹名
+        path: JSONL 文件路径（None = 只在内存中记录，不写文件）
+    """
+
+    def __init__(self, folder, path=None):
+        self.folder = folder
+        self.draft = None
+        self.path = path
+        self.records = []
+        self._stack = []
+        self._step = None
+
+    def span(self, name):
+        """计时阶段（上下文管理器）"""
+        return _Span(self, name)
+
+    def step(self, name):
+        """
+        顺序步骤：进入新步骤时结束上一个步骤
+
+        用于 "步骤 1/8" ~ "步骤 8/8" 这类线性流程，不必把每一步的代码缩进到 with 块中；
+        最后一个步骤在 end_step() 或 close() 时结束。
+        """
+        self.end_step()
+        self._step = self.span(name)
+        self._step.__enter__()
+
+    def end_step(self, exc_type=None):
+        if self._step is not None:
+            step, self._step = self._step, None
+            step.__exit__(exc_type, None, None)
+
+    def add_bytes(self, count):
+        """复制/写入的字节数，计入所有正在进行的阶段"""
+        for span in self._stack:
+            span.bytes += count
+
+    def close(self, exc_type=None):
+        """结束所有未结束的阶段（异常退出时也会调用）"""
+        self.end_step(exc_type)
+        while self._stack:
+            self._stack[-1].__exit__(exc_type, None, None)
+
+    def summary(self, depth=1):
+        """'步骤名 秒数' 列表（只含前 depth 层，用于日志）"""
+        return [f"{r['span'].split('/')[-1]} {r['seconds']:.2f}s" for r in self.records
+                if r["span"].count("/") == depth]
+
+    def write(self):
+        """
+        追加写入 JSONL（每个阶段一行，单次 write 追加，多进程并发也不会交错）
+
+        Returns:
+            是否写入成功（未设置 path 时也返回 True）；写入失败不影响草稿
+        """
+        if not self.path or not self.records:
+            return True
+        common = {
+            "time": datetime.now().isoformat(timespec="seconds"),
+            "pid": os.getpid(),
+            "folder": self.folder,
+            "draft": self.draft,
+        }
+        lines = "".join(json.dumps(dict(common, **record), ensure_ascii=False) + "\n"
+                        for record in self.records)
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, lines.encode("utf-8"))
+            finally:
+                os.close(fd)
+        except OSError:
+            return False
+        return True
+
+
+@contextlib.contextmanager
+def profiled(profiler, output_base, logger=None):
+    """
+    在性能分析器中运行 with 块
+
+    Args:
+        profiler: None / "cprofile" / "pyinstrument"（未安装 pyinstrument 时回退到 cProfile）
+        output_base: 输出文件路径（不含扩展名），cProfile 写 .prof，pyinstrument 写 .html
+        logger: 日志对象，记录输出位置
+    """
+    if not profiler:
+        yield
+        return
+
+    if profiler == PROFILER_PYINSTRUMENT and not PYINSTRUMENT_AVAILABLE:
+        if logger:
+            logger.warning("⚠️  pyinstrument 未安装，改用 cProfile（pip3 install pyinstrument）")
+        profiler = PROFILER_CPROFILE
+    os.makedirs(os.path.dirname(output_base), exist_ok=True)
+
+    if profiler == PROFILER_PYINSTRUMENT:
+        from pyinstrument import Profiler
+        instrument = Profiler()
+        instrument.start()
+        try:
+            yield
+        finally:
+            instrument.stop()
+            output_path = output_base + ".html"
+            with open(output_path, 'w', encoding='utf-8') as f:
+                f.write(instrument.output_html())
+    else:
+        import cProfile
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            output_path = output_base + ".prof"
+            profile.dump_stats(output_path)
+    if logger:
+        logger.info(f"📈 性能分析: {output_path}")
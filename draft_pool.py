@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+两阶段流水线进程池
+功能：
+1. 每个任务依次经过 CPU 阶段（音频分段）和 I/O 阶段（复制模板、导入素材、写 JSON）
+2. 两个阶段各有独立的并发上限：一个项目在导入素材时，下一个项目已经在分段
+3. 每个阶段在独立子进程中运行：某个文件导致崩溃或卡死，只影响这一个任务
+4. 每个任务有总超时，超时的子进程直接终止，批量处理继续
+5. 子进程不是 daemon 进程，阶段函数内部可以再开进程池（ProcessPoolExecutor）；
+   每个子进程自成一个进程组，终止时连同它开的进程一起结束
+"""
+
+import os
+import time
+import signal
+import traceback
+import multiprocessing
+from collections import deque
+from multiprocessing.connection import wait
+
+# 任务结果状态
+RESULT_OK = "ok"
+RESULT_ERROR = "error"
+RESULT_TIMEOUT = "timeout"
+
+# 阶段名称
+STAGE_CPU = "cpu"
+STAGE_IO = "io"
+
+
+def _child_main(conn, func, args):
+    """子进程入口：执行 func(*args)，通过管道返回结果或异常"""
+    if hasattr(os, "setpgrp"):
+        # 独立进程组：超时终止时用 killpg 一并结束阶段函数开的子进程
+        os.setpgrp()
+    try:
+        result = func(*args)
+        conn.send((RESULT_OK, result))
+    except BaseException as e:
+        conn.send((RESULT_ERROR, f"{type(e).__name__}: {e}\n{traceback.format_exc()}"))
+    finally:
+        conn.close()
+
+
+class _Running:
+    """正在运行的阶段"""
+
+    def __init__(self, key, stage, process, conn):
+        self.key = key
+        self.stage = stage
+        self.process = process
+        self.conn = conn
+
+
+def _signal_group(process, sig):
+    """向子进程所在的进程组发送信号（不支持进程组的平台只发给子进程本身）"""
+    if hasattr(os, "killpg"):
+        try:
+            os.killpg(process.pid, sig)
+            return
+        except OSError:
+            pass
+    if sig == signal.SIGTERM:
+        process.terminate()
+    else:
+        process.kill()
+
+
+def _stop(process):
+    """终止子进程及其进程组，并等待子进程退出"""
+    _signal_group(process, signal.SIGTERM)
+    process.join(1)
+    if process.is_alive():
+        _signal_group(process, getattr(signal, "SIGKILL", signal.SIGTERM))
+        process.join()
+
+
+def run_pipeline(tasks, cpu_stage, io_stage, cpu_workers=2, io_workers=2, timeout=None,
+                 on_finish=None):
+    """
+    运行两阶段流水线
+
+    Args:
+        tasks: [(key, cpu_args, io_args), ...]；cpu_args 为 None 表示跳过 CPU 阶段
+        cpu_stage: CPU 阶段函数 f(*cpu_args) -> 中间结果（需可被子进程导入）
+        io_stage: I/O 阶段函数 f(*io_args, 中间结果) -> 最终结果
+        cpu_workers: CPU 阶段并发进程数
+        io_workers: I/O 阶段并发进程数
+        timeout: 每个任务（两个阶段合计）的超时秒数，None 表示不限
+        on_finish: 每个任务结束时的回调 f(key, status, stage, value)
+
+    Returns:
+        {key: (status, stage, value)}，status 为 RESULT_OK / RESULT_ERROR / RESULT_TIMEOUT，
+        stage 为结束时所在的阶段，value 为结果或错误信息
+    """
+    ctx = multiprocessing.get_context()
+    cpu_queue = deque()
+    io_queue = deque()
+    io_args = {}
+    deadlines = {}
+    results = {}
+    running = []
+
+    for key, cpu_args, args in tasks:
+        io_args[key] = args
+        if cpu_args is None:
+            io_queue.append((key, None))
+        else:
+            cpu_queue.append((key, cpu_args))
+
+    def start(key, stage, func, args):
+        parent_conn, child_conn = ctx.Pipe(duplex=False)
+        # 非 daemon：daemon 进程不能再创建子进程（ProcessPoolExecutor 会断言失败）
+        process = ctx.Process(target=_child_main, args=(child_conn, func, args))
+        process.start()
+        child_conn.close()
+        deadlines.setdefault(key, None if timeout is None else time.monotonic() + timeout)
+        running.append(_Running(key, stage, process, parent_conn))
+
+    def finish(key, status, stage, value):
+        results[key] = (status, stage, value)
+        if on_finish:
+            on_finish(key, status, stage, value)
+
+    try:
+        while cpu_queue or io_queue or running:
+            # I/O 阶段优先启动，尽快释放已完成分段的项目
+            while io_queue and sum(r.stage == STAGE_IO for r in running) < io_workers:
+                key, intermediate = io_queue.popleft()
+                if deadlines.get(key) is not None and time.monotonic() >= deadlines[key]:
+                    finish(key, RESULT_TIMEOUT, STAGE_IO, f"超过 {timeout} 秒未完成")
+                    continue
+                start(key, STAGE_IO, io_stage, tuple(io_args[key]) + (intermediate,))
+            while cpu_queue and sum(r.stage == STAGE_CPU for r in running) < cpu_workers:
+                key, args = cpu_queue.popleft()
+                start(key, STAGE_CPU, cpu_stage, tuple(args))
+            if not running:
+                continue
+
+            pending = [d for d in (deadlines[r.key] for r in running) if d is not None]
+            wait_time = max(0.0, min(pending) - time.monotonic()) if pending else None
+            ready = wait([r.conn for r in running], wait_time)
+
+            now = time.monotonic()
+            for job in list(running):
+                if job.conn in ready:
+                    try:
+                        status, value = job.conn.recv()
+                    except EOFError:
+                        job.process.join()
+                        status, value = RESULT_ERROR, f"子进程异常退出（exit code {job.process.exitcode}）"
+                    job.conn.close()
+                    job.process.join()
+                    running.remove(job)
+                    if status == RESULT_OK and job.stage == STAGE_CPU:
+                        io_queue.append((job.key, value))
+                    else:
+                        finish(job.key, status, job.stage, value)
+                elif deadlines[job.key] is not None and now >= deadlines[job.key]:
+                    _stop(job.process)
+                    job.conn.close()
+                    running.remove(job)
+                    finish(job.key, RESULT_TIMEOUT, job.stage, f"超过 {timeout} 秒未完成")
+    finally:
+        for job in running:
+            _stop(job.process)
+            job.conn.close()
+
+    return results
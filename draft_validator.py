@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+草稿完整性检查
+功能：
+1. 为 materials.* 中所有材料建立 ID 索引（同时发现重复 ID）
+2. 检查 tracks[].segments 的 material_id 与 extra_material_refs 是否都能找到对应材料
+3. 检查每条轨道的 target_timerange 是否连续、不重叠、不超出 draft['duration']，
+   多片段轨道的时长之和是否等于 draft['duration']
+4. 每个材料、每个片段只访问一次（线性时间），可在每次生成后直接运行
+5. watch_draft(): 流式写入草稿时边写边检查，只保留材料 ID，不需要写完后再读回整个 JSON
+
+用法：
+    python draft_validator.py <草稿文件夹或 JSON 文件> [...]
+"""
+
+import os
+import sys
+import json
+
+# 依次查找的草稿 JSON 文件名（auto_capcut_draft_enhanced / zidongjianji）
+DRAFT_JSON_NAMES = ("draft_info.json", "draft_content.json")
+
+# 打印问题时每类最多显示的条数
+MAX_PRINTED_ISSUES = 20
+
+
+class DraftReport:
+    """
+    检查结果
+
+    Attributes:
+        errors: 会导致 CapCut 打不开或显示错乱的问题
+        warnings: 可疑但不影响打开的问题（如轨道中间有空隙）
+        material_count: 已索引的材料数
+        segment_count: 已检查的片段数
+    """
+
+    def __init__(self, source=""):
+        self.source = source
+        self.errors = []
+        self.warnings = []
+        self.material_count = 0
+        self.segment_count = 0
+
+    @property
+    def ok(self):
+        return not self.errors
+
+    def summary(self):
+        status = "✅ 通过" if self.ok else "❌ 未通过"
+        return (f"{status}: {self.material_count} 个材料, {self.segment_count} 个片段, "
+                f"{len(self.errors)} 个错误, {len(self.warnings)} 个警告")
+
+    def lines(self, limit=MAX_PRINTED_ISSUES):
+        """逐行返回可打印的问题列表（每类最多 limit 条）"""
+        for title, issues in (("错误", self.errors), ("警告", self.warnings)):
+            for issue in issues[:limit]:
+                yield f"  [{title}] {issue}"
+            if len(issues) > limit:
+                yield f"  [{title}] ... 另有 {len(issues) - limit} 条"
+
+
+class DraftChecker:
+    """
+    逐个接收材料和片段的检查器
+
+    材料只记录 ID（{id: 列表名}），片段检查完即丢弃，可在流式写入草稿时边写边检查，
+    不需要把整棵草稿树留在内存里或写完后再读回来。
+    片段引用的材料尚未出现时先记下，finish() 时再确认。
+
+    Args:
+        duration: 草稿总时长（微秒）
+        source: 来源说明（文件路径），用于报告
+    """
+
+    def __init__(self, duration, source=""):
+        self.report = DraftReport(source)
+        self.index = {}
+        self._pending = []
+        if not isinstance(duration, int) or duration <= 0:
+            self.report.errors.append(f"草稿总时长无效: {duration}")
+            duration = None
+        self.duration = duration
+        self.timeline_end = 0
+        self._track_no = 0
+
+    def material(self, list_name, item):
+        """登记 materials[list_name] 中的一个材料（同时发现重复 ID）"""
+        if not isinstance(item, dict) or "id" not in item:
+            return
+        material_id = item["id"]
+        if material_id in self.index:
+            self.report.errors.append(
+                f"重复的材料 ID {material_id}（{self.index[material_id]} 与 {list_name}）")
+        else:
+            self.index[material_id] = list_name
+        self.report.material_count += 1
+
+    def begin_track(self, track):
+        self._track_no += 1
+        self._label = f"轨道 {self._track_no}（{track.get('type', '?')}）"
+        self._seg_no = 0
+        self._prev_end = None
+        self._total = 0
+
+    def segment(self, segment):
+        """检查当前轨道的下一个片段"""
+        report = self.report
+        self.report.segment_count += 1
+        self._seg_no += 1
+        where = f"{self._label} 片段 {self._seg_no}"
+
+        material_id = segment.get("material_id")
+        if material_id and material_id not in self.index:
+            self._pending.append((where, "material_id", [material_id]))
+        missing = [ref for ref in segment.get("extra_material_refs") or [] if ref not in self.index]
+        if missing:
+            self._pending.append((where, "extra_material_refs", missing))
+
+        timerange = segment.get("target_timerange")
+        if not timerange:
+            report.errors.append(f"{where}: 缺少 target_timerange")
+            return
+        start = timerange.get("start", 0)
+        length = timerange.get("duration", 0)
+        if length <= 0:
+            report.errors.append(f"{where}: 时长 {length} 无效")
+        prev_end = self._prev_end
+        if prev_end is not None:
+            if start < prev_end:
+                report.errors.append(f"{where}: 与上一片段重叠 {prev_end - start} 微秒")
+            elif start > prev_end:
+                report.warnings.append(f"{where}: 与上一片段之间空隙 {start - prev_end} 微秒")
+        end = start + length
+        if self.duration is not None and end > self.duration:
+            report.errors.append(f"{where}: 结束于 {end}，超出草稿总时长 {self.duration}")
+        self._prev_end = end if prev_end is None else max(prev_end, end)
+        self._total += length
+
+    def end_track(self):
+        if self._seg_no > 1 and self.duration is not None and self._total != self.duration:
+            self.report.errors.append(f"{self._label}: 片段时长之和 {self._total} ≠ 草稿总时长 {self.duration}")
+        self.timeline_end = max(self.timeline_end, self._prev_end or 0)
+
+    def check_track(self, track):
+        self.begin_track(track)
+        for segment in track.get("segments") or []:
+            self.segment(segment)
+        self.end_track()
+
+    def finish(self):
+        """确认延后的引用、检查时间线结束时间，返回 DraftReport"""
+        report = self.report
+        for where, field, refs in self._pending:
+            missing = [ref for ref in refs if ref not in self.index]
+            if not missing:
+                continue
+            if field == "material_id":
+                report.errors.append(f"{where}: material_id {missing[0]} 不存在")
+            else:
+                report.errors.append(f"{where}: extra_material_refs 中 {len(missing)} 个引用不存在"
+                                     f"（{', '.join(missing[:3])}{' ...' if len(missing) > 3 else ''}）")
+        self._pending = []
+        if self.duration is not None and self.timeline_end and self.timeline_end != self.duration:
+            report.errors.append(f"时间线结束于 {self.timeline_end}，与草稿总时长 {self.duration} 不一致")
+        return report
+
+
+def validate_draft(draft, source=""):
+    """
+    检查草稿字典
+
+    Args:
+        draft: 草稿 JSON 内容
+        source: 来源说明（文件路径），用于报告
+
+    Returns:
+        DraftReport
+    """
+    checker = DraftChecker(draft.get("duration"), source)
+    for list_name, items in (draft.get("materials") or {}).items():
+        if isinstance(items, list):
+            for item in items:
+                checker.material(list_name, item)
+    for track in draft.get("tracks") or []:
+        checker.check_track(track)
+    return checker.finish()
+
+
+def watch_draft(draft, source="", wrap=list):
+    """
+    写入前把草稿的材料列表和轨道片段换成"写到哪里检查到哪里"的序列
+
+    Args:
+        draft: 草稿字典（材料、片段可以是生成器包装的 StreamedArray）
+        source: 来源说明（文件路径），用于报告
+        wrap: 序列的包装方式；传入 draft_writer.StreamedArray 则写入 JSON 时逐个检查
+
+    Returns:
+        DraftChecker，写入完成后调用 finish() 取得 DraftReport
+    """
+    checker = DraftChecker(draft.get("duration"), source)
+
+    def watch_materials(list_name, items):
+        for item in items:
+            checker.material(list_name, item)
+            yield item
+
+    def watch_segments(track, segments):
+        checker.begin_track(track)
+        for segment in segments:
+            checker.segment(segment)
+            yield segment
+        checker.end_track()
+
+    materials = draft.get("materials") or {}
+    for list_name, items in list(materials.items()):
+        if isinstance(items, (list, wrap)):
+            materials[list_name] = wrap(watch_materials(list_name, items))
+    for track in draft.get("tracks") or []:
+        track["segments"] = wrap(watch_segments(track, track.get("segments") or []))
+    return checker
+
+
+def find_draft_json(path):
+    """草稿文件夹 → 其中的草稿 JSON；本身是文件则原样返回"""
+    if os.path.isdir(path):
+        for name in DRAFT_JSON_NAMES:
+            candidate = os.path.join(path, name)
+            if os.path.exists(candidate):
+                return candidate
+        return None
+    return path
+
+
+def validate_draft_file(path):
+    """
+    读取并检查草稿文件
+
+    Args:
+        path: 草稿文件夹或草稿 JSON 文件
+
+    Returns:
+        DraftReport
+    """
+    json_path = find_draft_json(path)
+    if not json_path or not os.path.exists(json_path):
+        report = DraftReport(path)
+        report.errors.append(f"找不到草稿文件（{' / '.join(DRAFT_JSON_NAMES)}）")
+        return report
+    try:
+        with open(json_path, 'r', encoding='utf-8') as f:
+            draft = json.load(f)
+    except (OSError, ValueError) as e:
+        report = DraftReport(json_path)
+        report.errors.append(f"无法读取草稿 JSON: {e}")
+        return report
+    return validate_draft(draft, source=json_path)
+
+
+def main():
+    """命令行入口：检查一个或多个草稿，有错误时返回 1"""
+    paths = sys.argv[1:]
+    if not paths:
+        print("用法: python draft_validator.py <草稿文件夹或 JSON 文件> [...]")
+        return 2
+
+    failed = 0
+    for path in paths:
+        report = validate_draft_file(path)
+        print(f"{report.source}: {report.summary()}")
+        for line in report.lines():
+            print(line)
+        if not report.ok:
+            failed += 1
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
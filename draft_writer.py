@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+草稿 JSON 流式写入
+功能：
+1. materials / tracks 中的大数组可以用 StreamedArray 包装生成器，
+   写入时逐个生成、逐个序列化，不在内存中保留整棵草稿树
+2. 输出与 json.dump(draft, f, ensure_ascii=False, indent=2) 逐字节一致；
+   indent=None 时输出无空白的紧凑格式（与 separators=(",", ":") 一致），体积小约三分之一
+3. 先写临时文件再替换，中断时不会留下半个 draft_info.json；备份文件直接复制，不再序列化第二次
+"""
+
+import os
+import json
+import shutil
+
+INDENT = "  "
+
+# 紧凑格式（indent=None）的分隔符
+COMPACT_SEPARATORS = (",", ":")
+
+
+class StreamedArray:
+    """
+    写入时才展开的 JSON 数组
+
+    Args:
+        iterable: 生成数组元素的可迭代对象（通常是生成器，只能写入一次）
+
+    Attributes:
+        count: 已写入的元素个数（写入完成后即数组长度）
+    """
+
+    def __init__(self, iterable):
+        self._iterable = iterable
+        self.count = 0
+
+    def __iter__(self):
+        for item in self._iterable:
+            self.count += 1
+            yield item
+
+
+def _has_stream(value):
+    """value 内部（任意深度）是否含有 StreamedArray"""
+    if isinstance(value, StreamedArray):
+        return True
+    if isinstance(value, dict):
+        return any(_has_stream(v) for v in value.values())
+    if isinstance(value, list):
+        return any(_has_stream(v) for v in value)
+    return False
+
+
+def _write_value(write, value, level, indent=INDENT):
+    if not _has_stream(value):
+        # 普通子树交给 C 实现的 json.dumps，只需把换行缩进补到当前层级
+        if indent is None:
+            write(json.dumps(value, ensure_ascii=False, separators=COMPACT_SEPARATORS))
+            return
+        text = json.dumps(value, ensure_ascii=False, indent=len(indent))
+        if level and "\n" in text:
+            text = text.replace("\n", "\n" + indent * level)
+        write(text)
+        return
+
+    if indent is None:
+        inner = outer = ""
+        key_separator = COMPACT_SEPARATORS[1]
+    else:
+        inner = "\n" + indent * (level + 1)
+        outer = "\n" + indent * level
+        key_separator = ": "
+    if isinstance(value, dict):
+        if not value:
+            write("{}")
+            return
+        write("{")
+        first = True
+        for key, item in value.items():
+            write(inner if first else "," + inner)
+            first = False
+            write(json.dumps(str(key), ensure_ascii=False))
+            write(key_separator)
+            _write_value(write, item, level + 1, indent)
+        write(outer + "}")
+        return
+
+    # list 或 StreamedArray
+    first = True
+    for item in value:
+        write("[" + inner if first else "," + inner)
+        first = False
+        _write_value(write, item, level + 1, indent)
+    write("[]" if first else outer + "]")
+
+
+def dump_streaming(obj, f, indent=len(INDENT)):
+    """
+    把 obj 写入文本文件 f，StreamedArray 在写入过程中才展开
+
+    Args:
+        obj: 草稿字典（可嵌套 StreamedArray）
+        f: 以文本模式打开的文件
+        indent: 缩进空格数（None = 紧凑格式）
+    """
+    _write_value(f.write, obj, 0, None if indent is None else " " * indent)
+
+
+def write_draft_json(path, draft, backup_path=None, indent=len(INDENT)):
+    """
+    流式写入草稿 JSON（临时文件 + 替换）
+
+    Args:
+        path: 目标文件（如 draft_info.json）
+        draft: 草稿字典
+        backup_path: 备份文件路径（如 draft_info.json.bak），写入完成后直接复制
+        indent: 缩进空格数（None = 紧凑格式，见 draft_builder.PROFILE_JSON_INDENT）
+    """
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        dump_streaming(draft, f, indent)
+    os.replace(tmp_path, path)
+    if backup_path:
+        shutil.copyfile(path, backup_path)
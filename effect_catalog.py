@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+特效 / 动画资源目录
+功能：
+1. 从 effect_catalog.json 读取特效和动画的元数据（每个进程只读一次）
+2. 资源路径按当前电脑解析：CapCut / 剪映的缓存目录 + effect_id/资源哈希；
+   缓存中只有其它版本时使用实际存在的版本，没有缓存时仍给出本机路径（打开草稿时按 resource_id 重新下载）
+3. 每个条目在加载时预先生成冻结的材料模板（dict → MappingProxyType，list → tuple），
+   生成材料时只复制字典节点并填入 ID，列表直接共用，不再每份草稿重建整段字面量
+
+用法：
+    catalog = load_catalog()
+    material = catalog.effect("shake", material_id, request_id, effects_adjust_intensity=0.05)
+    material = catalog.animation("431662", material_id, request_id)
+"""
+
+import os
+import json
+import types
+import functools
+
+CATALOG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "effect_catalog.json")
+
+# 动画分类
+_CATEGORY_NAMES = {"in": "入场", "out": "出场", "group": "组合"}
+
+
+def _freeze(value):
+    """dict → 只读映射，list → tuple（tuple 可直接写入 JSON，多份草稿共用也不会被修改）"""
+    if isinstance(value, dict):
+        return types.MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def thaw(template, **fields):
+    """
+    冻结模板 → 可修改的材料字典（只复制字典节点；字段顺序与模板一致）
+
+    Args:
+        template: _freeze() 的结果
+        fields: 覆盖顶层字段（如 id、request_id）
+    """
+    material = {key: _thaw_value(item) for key, item in template.items()}
+    material.update(fields)
+    return material
+
+
+def _thaw_value(value):
+    if isinstance(value, types.MappingProxyType):
+        return thaw(value)
+    # 含字典的列表需要复制（字典可能被修改）；其余 tuple 原样共用
+    if isinstance(value, tuple) and any(isinstance(item, types.MappingProxyType) for item in value):
+        return [_thaw_value(item) for item in value]
+    return value
+
+
+class EffectCatalog:
+    """
+    特效与动画目录
+
+    Args:
+        path: 目录文件（effect_catalog.json）
+    """
+
+    def __init__(self, path=CATALOG_FILE):
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        self.path = path
+        self.cache_roots = {app: os.path.expanduser(root) for app, root in data["cache_roots"].items()}
+
+        self._effects = {}
+        for key, entry in data.get("effects", {}).items():
+            material = dict(entry["material"])
+            material["path"] = self.resource_path(entry["app"], material["effect_id"], entry["resource"])
+            self._effects[key] = _freeze(material)
+
+        self._animations = {}
+        for effect_id, entry in data.get("animations", {}).items():
+            self._animations[effect_id] = _freeze(self._animation_template(effect_id, entry))
+        self._groups = {name: tuple(ids) for name, ids in data.get("animation_groups", {}).items()}
+
+    def resource_path(self, app, effect_id, resource):
+        """
+        资源在本机缓存中的路径
+
+        Args:
+            app: "capcut" / "jianying"
+            effect_id: 缓存目录中的特效编号
+            resource: 资源哈希（制作模板时的版本）
+
+        Returns:
+            本机存在的版本路径；缓存中没有时返回本机上该版本应在的位置
+        """
+        folder = os.path.join(self.cache_roots[app], effect_id)
+        path = os.path.join(folder, resource)
+        if os.path.isdir(path):
+            return path
+        try:
+            versions = sorted(name for name in os.listdir(folder) if not name.startswith("."))
+        except OSError:
+            versions = []
+        return os.path.join(folder, versions[-1]) if versions else path
+
+    def _animation_template(self, effect_id, entry):
+        category = entry.get("category", "in")
+        return {
+            "animations": [{
+                "anim_adjust_params": None,
+                "category_id": category,
+                "category_name": _CATEGORY_NAMES.get(category, category),
+                "duration": entry["duration"],
+                "id": effect_id,
+                "material_type": "video",
+                "name": entry["name"],
+                "panel": "video",
+                "path": self.resource_path(entry["app"], effect_id, entry["resource"]),
+                "platform": "all",
+                "request_id": "",
+                "resource_id": entry["resource_id"],
+                "start": 0,
+                "type": category
+            }],
+            "id": "",
+            "multi_language_current": "none",
+            "type": "sticker_animation"
+        }
+
+    def effect(self, key, material_id, request_id, **adjust):
+        """
+        特效材料（video_effects）
+
+        Args:
+            key: 目录中的特效名（如 "shake"）
+            material_id / request_id: 材料 ID、请求 ID
+            adjust: 调节参数，如 effects_adjust_intensity=0.05（JSON 值，未给出的保持目录中的值）
+        """
+        material = thaw(self._effects[key], id=material_id, request_id=request_id)
+        for param in material["adjust_params"]:
+            if param["name"] in adjust:
+                param["value"] = adjust[param["name"]]
+        return material
+
+    def animation(self, effect_id, material_id, request_id):
+        """动画材料（material_animations）"""
+        material = thaw(self._animations[effect_id], id=material_id)
+        material["animations"][0]["request_id"] = request_id
+        return material
+
+    def animation_name(self, effect_id):
+        return self._animations[effect_id]["animations"][0]["name"]
+
+    def animation_group(self, name):
+        """动画组中的 effect_id 列表（如 "intro" = 入场动画）"""
+        return self._groups[name]
+
+
+@functools.lru_cache(maxsize=None)
+def load_catalog(path=CATALOG_FILE):
+    """读取目录（同一进程只读一次）"""
+    return EffectCatalog(path)
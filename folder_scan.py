@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+素材文件夹扫描
+功能：
+1. 每个文件夹只读一次目录（os.scandir），按扩展名把条目分成音频 / 图片 / 子文件夹
+2. 结果按文件夹缓存，目录修改时间（st_mtime_ns）变化时自动失效
+   菜单统计与之后的素材查找共用同一次扫描，网络盘上也只需一次目录读取
+"""
+
+import os
+import time
+import threading
+
+# 支持的扩展名（不区分大小写）
+AUDIO_EXTENSIONS = (".mp3", ".wav", ".m4a", ".aac")
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg")
+
+# 目录在扫描前这么短时间内被修改过时不复用缓存：
+# 网络盘的修改时间精度可能只有 1-2 秒，同一时间片内新增的文件不会改变 mtime
+_RACY_WINDOW_NS = 2 * 1000000000
+
+
+class FolderScan:
+    """
+    单个文件夹的扫描结果
+
+    Attributes:
+        path: 文件夹路径
+        mtime_ns: 扫描时的目录修改时间
+        audio_files: 音频文件完整路径（已排序）
+        image_files: 图片文件完整路径（已排序）
+        folders: 子文件夹名（已排序）
+    """
+
+    def __init__(self, path, mtime_ns, audio_files, image_files, folders, scanned_ns=0):
+        self.path = path
+        self.mtime_ns = mtime_ns
+        self.scanned_ns = scanned_ns
+        self.audio_files = audio_files
+        self.image_files = image_files
+        self.folders = folders
+
+    @property
+    def is_valid(self):
+        """同时有音频和图片"""
+        return bool(self.audio_files) and bool(self.image_files)
+
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def _scan(path, mtime_ns):
+    scanned_ns = time.time_ns()
+    audio_files, image_files, folders = [], [], []
+    with os.scandir(path) as entries:
+        for entry in entries:
+            name = entry.name
+            if name.startswith("."):
+                continue  # 与 glob("*") 一致，忽略隐藏文件（含 macOS 的 ._ 文件）
+            try:
+                if entry.is_dir():
+                    folders.append(name)
+                    continue
+                if not entry.is_file():
+                    continue
+            except OSError:
+                continue
+            ext = os.path.splitext(name)[1].lower()
+            if ext in AUDIO_EXTENSIONS:
+                audio_files.append(entry.path)
+            elif ext in IMAGE_EXTENSIONS:
+                image_files.append(entry.path)
+    audio_files.sort()
+    image_files.sort()
+    folders.sort()
+    return FolderScan(path, mtime_ns, audio_files, image_files, folders, scanned_ns)
+
+
+def scan_folder(path, use_cache=True):
+    """
+    扫描文件夹（带缓存）
+
+    Args:
+        path: 文件夹路径
+        use_cache: 是否使用缓存；目录修改时间不变时直接返回上次结果
+
+    Returns:
+        FolderScan；文件夹不存在时返回 None
+    """
+    try:
+        mtime_ns = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+    if use_cache:
+        cached = _cache.get(path)
+        if (cached is not None and cached.mtime_ns == mtime_ns
+                and cached.scanned_ns - mtime_ns > _RACY_WINDOW_NS):
+            return cached
+
+    try:
+        result = _scan(path, mtime_ns)
+    except OSError:
+        return None
+    with _cache_lock:
+        _cache[path] = result
+    return result
+
+
+def clear_cache():
+    """清空扫描缓存"""
+    with _cache_lock:
+        _cache.clear()
@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+图片预缩放与模糊背景预渲染（需要 Pillow，未安装时不处理）
+功能：
+1. prescale_images(): 大于画布的图片缩小到画布内的尺寸（等比，不放大），
+   剪映预览和导出时不再逐帧解码大图再缩小
+2. render_backdrops(): 为每张图片预先渲染一张画布大小的模糊背景（铺满画布后居中裁切），
+   先缩小 BACKDROP_DOWNSCALE 倍再模糊、最后放大回画布，代替剪映逐帧实时计算的 canvas_blur
+3. 进程池并行处理；JPEG 用 Image.draft 在解码时直接按 1/2、1/4、1/8 缩小，
+   其它格式由 resize 的 reducing_gap 先用 reduce() 整数倍缩小，再做重采样
+4. 结果按源文件内容哈希缓存在 cache/prescaled/，同一张图片（即使改名或换文件夹）只处理一次；
+   内容哈希按 路径 + 大小 + 修改时间 记录，未变化的文件不再重新读取
+
+输出：预缩放的图片有透明通道时保存为 PNG，其余保存为 JPEG（保留原图 EXIF，方向信息不变，
+按 EXIF 旋转后的显示方向缩放到画布内）；
+模糊背景始终为 JPEG（已按 EXIF 方向旋转，与剪映中显示的图片方向一致）
+"""
+
+import os
+import json
+import hashlib
+import threading
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from lazy_imports import module_available
+from image_probe import probe_images
+
+PIL_AVAILABLE = module_available("PIL")
+
+# 缓存文件夹（与 image_meta.json 同在 cache/ 下）
+DEFAULT_CACHE_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "cache", "prescaled"
+)
+HASH_INDEX_FILENAME = "index.json"
+
+# 并行缩放进程数（解码/重采样是 CPU 密集型）
+DEFAULT_PRESCALE_WORKERS = min(4, os.cpu_count() or 1)
+
+# JPEG 输出质量
+DEFAULT_JPEG_QUALITY = 90
+# 预缩放方式变化时加 1（写入缓存文件名，旧版本缩放的缓存不再复用）
+PRESCALE_RENDER_VERSION = 2
+
+# 模糊背景：先缩小的倍数、模糊强度 1.0 对应的模糊半径（画布像素）、JPEG 质量
+# 背景是模糊的，缩小 8 倍后再放大看不出差别，模糊只需处理 1/64 的像素
+BACKDROP_DOWNSCALE = 8
+BACKDROP_BLUR_RADIUS = 120
+BACKDROP_JPEG_QUALITY = 85
+# 背景渲染方式变化时加 1（写入缓存文件名，旧版本渲染的缓存不再复用）
+BACKDROP_RENDER_VERSION = 2
+
+# EXIF 方向标签；5-8 表示显示时需要旋转 90°
+_EXIF_ORIENTATION = 0x0112
+
+# 读取内容哈希的块大小
+_HASH_CHUNK = 1024 * 1024
+
+# 预缩放结果：缓存中的文件、缩放后的宽高与格式、是否直接使用了已有缓存
+PrescaledImage = namedtuple("PrescaledImage", "path width height format cached")
+
+
+def fit_size(width, height, box_width, box_height):
+    """
+    等比缩小到 box 内的尺寸
+
+    Returns:
+        (width, height)；图片已在 box 内时返回 None（不放大）
+    """
+    if width <= box_width and height <= box_height:
+        return None
+    scale = min(box_width / width, box_height / height)
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def content_hash(path):
+    """文件内容的 BLAKE2b 哈希（十六进制，32 位）"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class _HashIndex:
+    """内容哈希的持久化索引（键为绝对路径，大小或修改时间变化时重新计算）"""
+
+    def __init__(self, path):
+        self.path = path
+        self._entries = {}
+        self._dirty = False
+        self._lock = threading.Lock()
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                self._entries = json.load(f)
+        except (OSError, ValueError):
+            self._entries = {}
+
+    def hash_for(self, path):
+        abs_path = os.path.abspath(path)
+        st = os.stat(abs_path)
+        entry = self._entries.get(abs_path)
+        if entry and entry.get("size") == st.st_size and entry.get("mtime_ns") == st.st_mtime_ns:
+            return entry["hash"]
+        value = content_hash(abs_path)
+        with self._lock:
+            self._entries[abs_path] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "hash": value}
+            self._dirty = True
+        return value
+
+    def save(self):
+        """写回索引（临时文件 + 替换）"""
+        if not self._dirty:
+            return
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with self._lock:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+
+
+def _rotated(img):
+    """EXIF 方向是否表示显示时需要旋转 90°（宽高互换）"""
+    return img.getexif().get(_EXIF_ORIENTATION, 1) in (5, 6, 7, 8)
+
+
+def _has_alpha(img):
+    return img.mode in ("RGBA", "LA", "PA") or (img.mode == "P" and "transparency" in img.info)
+
+
+def _prescale_file(src, dst_base, box, quality):
+    """
+    缩放单张图片（进程池中执行）
+
+    Args:
+        src: 源图片
+        dst_base: 缓存文件路径（不含扩展名）
+        box: (宽, 高) 画布尺寸
+        quality: JPEG 质量
+
+    Returns:
+        (输出路径, 宽, 高, 格式)；图片已在画布内时返回 None
+    """
+    from PIL import Image
+
+    with Image.open(src) as img:
+        # 按显示方向缩放到画布内；输出保留 EXIF，像素仍按存储方向保存
+        if _rotated(img):
+            fitted = fit_size(img.height, img.width, *box)
+            target = fitted and (fitted[1], fitted[0])
+        else:
+            target = fit_size(img.width, img.height, *box)
+        if target is None:
+            return None
+        # JPEG：解码时直接按 DCT 缩放（尺寸不小于 target），其它格式无操作
+        img.draft("RGB", target)
+        exif = img.info.get("exif")
+        if _has_alpha(img):
+            img, fmt, ext = img.convert("RGBA"), "PNG", ".png"
+            options = {"optimize": True}
+        else:
+            img, fmt, ext = img.convert("L" if img.mode == "L" else "RGB"), "JPEG", ".jpg"
+            options = {"quality": quality, "optimize": True}
+        if exif:
+            options["exif"] = exif
+        scaled = img.resize(target, Image.LANCZOS, reducing_gap=3.0)
+
+    dst = dst_base + ext
+    tmp_path = f"{dst}.{os.getpid()}.tmp"
+    scaled.save(tmp_path, fmt, **options)
+    os.replace(tmp_path, dst)
+    return dst, scaled.width, scaled.height, fmt
+
+
+def _render_backdrop(src, dst_base, canvas, blur):
+    """
+    渲染单张模糊背景（进程池中执行）
+
+    Args:
+        src: 源图片
+        dst_base: 缓存文件路径（不含扩展名）
+        canvas: (宽, 高) 画布尺寸
+        blur: 模糊强度（0-1，与 canvas_blur 相同）
+
+    Returns:
+        (输出路径, 宽, 高, 格式)
+    """
+    from PIL import Image, ImageFilter, ImageOps
+
+    small = (max(1, canvas[0] // BACKDROP_DOWNSCALE), max(1, canvas[1] // BACKDROP_DOWNSCALE))
+    with Image.open(src) as img:
+        # 按显示方向（EXIF 旋转后）铺满缩小后的画布（cover），再居中裁切
+        rotated = _rotated(img)
+        width, height = (img.height, img.width) if rotated else img.size
+        scale = max(small[0] / width, small[1] / height)
+        cover = (max(small[0], round(width * scale)), max(small[1], round(height * scale)))
+        # draft 按存储方向缩小解码
+        img.draft("RGB", (cover[1], cover[0]) if rotated else cover)
+        upright = ImageOps.exif_transpose(img)
+        reduced = upright.convert("RGB").resize(cover, Image.BILINEAR, reducing_gap=2.0)
+
+    left = (cover[0] - small[0]) // 2
+    top = (cover[1] - small[1]) // 2
+    reduced = reduced.crop((left, top, left + small[0], top + small[1]))
+    radius = blur * BACKDROP_BLUR_RADIUS / BACKDROP_DOWNSCALE
+    if radius > 0:
+        reduced = reduced.filter(ImageFilter.GaussianBlur(radius))
+    backdrop = reduced.resize(canvas, Image.BILINEAR)
+
+    dst = dst_base + ".jpg"
+    tmp_path = f"{dst}.{os.getpid()}.tmp"
+    backdrop.save(tmp_path, "JPEG", quality=BACKDROP_JPEG_QUALITY, optimize=True)
+    os.replace(tmp_path, dst)
+    return dst, backdrop.width, backdrop.height, "JPEG"
+
+
+def _run_job(job):
+    """进程池入口：单张图片出错时返回 None（调用方使用原图 / 实时模糊）"""
+    func, args = job
+    try:
+        return func(*args)
+    except Exception:
+        return None
+
+
+def _cached_result(dst_base):
+    """已有缓存文件时读取其尺寸"""
+    for ext, fmt in ((".jpg", "JPEG"), (".png", "PNG")):
+        path = dst_base + ext
+        if os.path.exists(path):
+            meta = probe_images([path]).get(path)
+            if meta:
+                return PrescaledImage(path, meta[0], meta[1], fmt, True)
+    return None
+
+
+def _render_cached(paths, cache_dir, name_suffix, func, func_args, workers):
+    """
+    按内容哈希查找缓存，未命中的交给进程池渲染
+
+    Args:
+        paths: 需要处理的图片
+        name_suffix: 缓存文件名中哈希之后的部分（区分尺寸、参数）
+        func: 渲染函数 func(src, dst_base, *func_args) → (路径, 宽, 高, 格式) 或 None
+        workers: 进程数（1 = 在当前进程中逐个处理）
+
+    Returns:
+        字典 {路径: PrescaledImage}，不含出错或无需处理的图片
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    index = _HashIndex(os.path.join(cache_dir, HASH_INDEX_FILENAME))
+    results = {}
+    jobs = []
+    for path in paths:
+        try:
+            source_hash = index.hash_for(path)
+        except OSError:
+            continue
+        dst_base = os.path.join(cache_dir, f"{source_hash}_{name_suffix}")
+        cached = _cached_result(dst_base)
+        if cached is not None:
+            results[path] = cached
+        else:
+            jobs.append((path, (func, (path, dst_base) + tuple(func_args))))
+    index.save()
+
+    if jobs:
+        args = [job for _, job in jobs]
+        if workers > 1 and len(jobs) > 1:
+            with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+                outputs = list(pool.map(_run_job, args))
+        else:
+            outputs = [_run_job(job) for job in args]
+        for (path, _), output in zip(jobs, outputs):
+            if output is not None:
+                results[path] = PrescaledImage(*output, cached=False)
+
+    return results
+
+
+def prescale_images(paths, box, workers=DEFAULT_PRESCALE_WORKERS,
+                    quality=DEFAULT_JPEG_QUALITY, cache_dir=DEFAULT_CACHE_DIR):
+    """
+    把大于画布的图片缩小到画布内（结果缓存，重复运行直接复用）
+
+    Args:
+        paths: 图片路径列表
+        box: (宽, 高) 画布尺寸
+        workers: 进程数（1 = 在当前进程中逐个处理）
+        quality: JPEG 质量
+        cache_dir: 缓存文件夹
+
+    Returns:
+        字典 {路径: PrescaledImage}，只包含实际缩放的图片；
+        已在画布内、无法读取或 Pillow 未安装的图片不在结果中（使用原图）
+    """
+    if not PIL_AVAILABLE or not paths:
+        return {}
+
+    box = (int(box[0]), int(box[1]))
+    meta = probe_images(paths)
+    # 文件头中的尺寸是存储方向：两个方向都在画布内才能确定无需缩放（EXIF 方向在缩放时判断）
+    candidates = [path for path in paths
+                  if meta.get(path) and (fit_size(meta[path][0], meta[path][1], *box) is not None
+                                         or fit_size(meta[path][1], meta[path][0], *box) is not None)]
+    if not candidates:
+        return {}
+    return _render_cached(candidates, cache_dir, f"{box[0]}x{box[1]}_q{quality}_v{PRESCALE_RENDER_VERSION}",
+                          _prescale_file, (box, quality), workers)
+
+
+def render_backdrops(paths, canvas, blur, workers=DEFAULT_PRESCALE_WORKERS,
+                     cache_dir=DEFAULT_CACHE_DIR):
+    """
+    为每张图片渲染画布大小的模糊背景（结果缓存，重复运行直接复用）
+
+    Args:
+        paths: 图片路径列表
+        canvas: (宽, 高) 画布尺寸
+        blur: 模糊强度（0-1，与 canvas_blur 相同）
+        workers: 进程数（1 = 在当前进程中逐个处理）
+        cache_dir: 缓存文件夹
+
+    Returns:
+        字典 {路径: PrescaledImage}；出错或 Pillow 未安装的图片不在结果中
+    """
+    if not PIL_AVAILABLE or not paths:
+        return {}
+
+    canvas = (int(canvas[0]), int(canvas[1]))
+    suffix = (f"backdrop_{canvas[0]}x{canvas[1]}_b{round(blur * 1000)}"
+              f"_d{BACKDROP_DOWNSCALE}_r{BACKDROP_BLUR_RADIUS}_q{BACKDROP_JPEG_QUALITY}"
+              f"_v{BACKDROP_RENDER_VERSION}")
+    return _render_cached(list(dict.fromkeys(paths)), cache_dir, suffix,
+                          _render_backdrop, (canvas, blur), workers)
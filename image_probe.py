@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+图片元数据探测
+功能：
+1. 只读取 PNG / JPEG / GIF / BMP / WebP 文件头获取 (宽, 高, 格式)，不创建解码器
+2. 线程池并行探测
+3. 持久化缓存：以 路径 + 文件大小 + 修改时间 为键，重复运行无需再次读取文件
+"""
+
+import os
+import json
+import struct
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# 默认缓存文件（与脚本同目录，auto_capcut_draft_enhanced 与 zidongjianji 共用）
+DEFAULT_CACHE_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "cache", "image_meta.json"
+)
+
+# 并行探测线程数（探测是纯 I/O，网络盘上线程多一些更快）
+DEFAULT_PROBE_WORKERS = 8
+
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+# JPEG 中携带尺寸的 SOF 标记（排除 DHT=C4、JPG=C8、DAC=CC）
+_JPEG_SOF_MARKERS = {
+    0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7,
+    0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF,
+}
+
+
+def _probe_png(f, head):
+    # IHDR 紧跟在签名之后：长度(4) + "IHDR"(4) + 宽(4) + 高(4)
+    if len(head) >= 24 and head[12:16] == b"IHDR":
+        width, height = struct.unpack(">II", head[16:24])
+        return width, height, "PNG"
+    return None
+
+
+def _probe_jpeg(f, head):
+    # 逐个跳过段，直到遇到 SOF 段，只读取段头
+    f.seek(2)
+    while True:
+        byte = f.read(1)
+        while byte and byte != b"\xFF":
+            byte = f.read(1)
+        while byte == b"\xFF":
+            byte = f.read(1)
+        if not byte:
+            return None
+
+        marker = byte[0]
+        if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7:
+            continue  # 无长度字段的标记
+        if marker == 0xD9:
+            return None
+
+        length_bytes = f.read(2)
+        if len(length_bytes) < 2:
+            return None
+        length = struct.unpack(">H", length_bytes)[0]
+
+        if marker in _JPEG_SOF_MARKERS:
+            data = f.read(5)
+            if len(data) < 5:
+                return None
+            height, width = struct.unpack(">HH", data[1:5])
+            return width, height, "JPEG"
+
+        f.seek(length - 2, os.SEEK_CUR)
+
+
+def _probe_gif(f, head):
+    if len(head) >= 10:
+        width, height = struct.unpack("<HH", head[6:10])
+        return width, height, "GIF"
+    return None
+
+
+def _probe_bmp(f, head):
+    if len(head) >= 26:
+        header_size = struct.unpack("<I", head[14:18])[0]
+        if header_size == 12:
+            width, height = struct.unpack("<HH", head[18:22])
+        else:
+            width, height = struct.unpack("<ii", head[18:26])
+        return abs(width), abs(height), "BMP"
+    return None
+
+
+def _probe_webp(f, head):
+    if len(head) < 30:
+        return None
+    chunk = head[12:16]
+    if chunk == b"VP8 ":
+        width, height = struct.unpack("<HH", head[26:30])
+        return width & 0x3FFF, height & 0x3FFF, "WEBP"
+    if chunk == b"VP8L":
+        bits = struct.unpack("<I", head[21:25])[0]
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1, "WEBP"
+    if chunk == b"VP8X":
+        width = int.from_bytes(head[24:27], "little") + 1
+        height = int.from_bytes(head[27:30], "little") + 1
+        return width, height, "WEBP"
+    return None
+
+
+def _probe_with_pil(path):
+    """文件头无法识别时的兜底（PIL 只解析文件头，不解码像素）"""
+    try:
+        from PIL import Image
+    except ImportError:
+        return None
+    try:
+        with Image.open(path) as img:
+            width, height = img.size
+            return width, height, img.format or ""
+    except Exception:
+        return None
+
+
+def probe_image(path):
+    """
+    只读取文件头获取图片尺寸
+
+    Args:
+        path: 图片路径
+
+    Returns:
+        (width, height, format) 元组，无法识别时返回 None
+    """
+    try:
+        with open(path, "rb") as f:
+            head = f.read(32)
+            result = None
+            if head.startswith(_PNG_SIGNATURE):
+                result = _probe_png(f, head)
+            elif head[:2] == b"\xFF\xD8":
+                result = _probe_jpeg(f, head)
+            elif head[:6] in (b"GIF87a", b"GIF89a"):
+                result = _probe_gif(f, head)
+            elif head[:2] == b"BM":
+                result = _probe_bmp(f, head)
+            elif head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+                result = _probe_webp(f, head)
+    except (OSError, struct.error):
+        return None
+
+    if result is None:
+        result = _probe_with_pil(path)
+    return result
+
+
+class ImageMetaCache:
+    """
+    图片元数据持久化缓存
+
+    键为绝对路径，值记录 size / mtime_ns / width / height / format，
+    文件大小或修改时间变化时自动失效。
+    """
+
+    def __init__(self, cache_path=DEFAULT_CACHE_PATH):
+        self.cache_path = cache_path
+        self._entries = {}
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                self._entries = json.load(f)
+        except (OSError, ValueError):
+            self._entries = {}
+
+    def get(self, path, stat_result):
+        entry = self._entries.get(path)
+        if (entry
+                and entry.get("size") == stat_result.st_size
+                and entry.get("mtime_ns") == stat_result.st_mtime_ns):
+            return entry["width"], entry["height"], entry["format"]
+        return None
+
+    def put(self, path, stat_result, meta):
+        width, height, fmt = meta
+        with self._lock:
+            self._entries[path] = {
+                "size": stat_result.st_size,
+                "mtime_ns": stat_result.st_mtime_ns,
+                "width": width,
+                "height": height,
+                "format": fmt,
+            }
+            self._dirty = True
+
+    def save(self):
+        """写回缓存文件（先写临时文件再替换，避免中断导致文件损坏）"""
+        if not self.cache_path or not self._dirty:
+            return
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        tmp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+        with self._lock:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f, ensure_ascii=False)
+            os.replace(tmp_path, self.cache_path)
+            self._dirty = False
+
+
+_default_cache = None
+
+
+def get_default_cache():
+    """进程内共享的默认缓存实例"""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = ImageMetaCache()
+    return _default_cache
+
+
+def probe_images(paths, max_workers=DEFAULT_PROBE_WORKERS, cache=None):
+    """
+    并行探测多张图片的尺寸
+
+    Args:
+        paths: 图片路径列表
+        max_workers: 线程数
+        cache: ImageMetaCache 实例，默认使用共享缓存
+
+    Returns:
+        字典 {路径: (width, height, format) 或 None}，键与传入的路径一致
+    """
+    if cache is None:
+        cache = get_default_cache()
+
+    results = {}
+    pending = []
+    for path in paths:
+        abs_path = os.path.abspath(path)
+        try:
+            st = os.stat(abs_path)
+        except OSError:
+            results[path] = None
+            continue
+        cached = cache.get(abs_path, st)
+        if cached is not None:
+            results[path] = cached
+        else:
+            pending.append((path, abs_path, st))
+
+    if pending:
+        workers = max(1, min(max_workers, len(pending)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            metas = executor.map(lambda item: probe_image(item[1]), pending)
+            for (path, abs_path, st), meta in zip(pending, metas):
+                results[path] = meta
+                if meta is not None:
+                    cache.put(abs_path, st, meta)
+        cache.save()
+
+    return results
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+延迟导入与启动耗时分析
+功能：
+1. module_available(): 只查找模块，不执行导入（用于 *_AVAILABLE 标志）
+2. lazy_import(): 返回延迟模块，第一次访问属性时才真正导入（numpy 等大模块）
+3. import_profile(): 在子进程中用 python -X importtime 导入指定模块，列出最慢的导入
+   （--profile-imports）
+
+pydub 导入时会探测 ffmpeg，numpy / PIL / mutagen 导入也要几十毫秒；
+菜单、监听进程和批量模式的每个子进程都不一定用得到它们。
+"""
+
+import os
+import sys
+import subprocess
+import importlib.util
+
+# --profile-imports 默认列出的条数
+DEFAULT_PROFILE_TOP = 15
+
+
+def module_available(name):
+    """模块是否已安装（不导入模块本身）"""
+    if name in sys.modules:
+        return True
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def lazy_import(name):
+    """
+    延迟导入模块
+
+    Returns:
+        模块对象，第一次访问属性时才执行模块代码；未安装时返回 None
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    try:
+        spec = importlib.util.find_spec(name)
+    except (ImportError, ValueError):
+        return None
+    if spec is None:
+        return None
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+def import_profile(module_name, top=DEFAULT_PROFILE_TOP):
+    """
+    测量导入 module_name 的耗时（新的子进程，结果不受当前进程已导入模块影响）
+
+    Args:
+        module_name: 要导入的模块
+        top: 列出最慢的前几个直接导入的模块
+
+    Returns:
+        (总耗时秒数, [(累计秒数, 直接导入的模块), ...], 导入过程中加载的所有顶层包)
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module_name}"],
+        cwd=here, capture_output=True, text=True,
+    )
+    # 输出按导入完成顺序排列：子模块在前，父模块在后；缩进 = 1 + 2 × 层级
+    total = 0.0
+    subtree = []
+    pending = []
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or line.count("|") != 2:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not cumulative.strip().isdigit():
+            continue
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        entry = (int(cumulative) / 1000000, depth, name.strip())
+        if depth == 0:
+            if entry[2] == module_name:
+                total, subtree = entry[0], pending
+                break
+            pending = []
+        else:
+            pending.append(entry)
+    # 直接导入的模块按耗时排序；重模块（含间接导入）另外列出
+    ranked = sorted(((seconds, name) for seconds, depth, name in subtree if depth == 1), reverse=True)
+    loaded = sorted({name.split(".")[0] for _, _, name in subtree})
+    return total, ranked[:top], loaded
+
+
+def print_import_profile(module_name, heavy=("pydub", "mutagen", "PIL", "numpy")):
+    """打印导入耗时报告，返回退出码"""
+    total, ranked, packages = import_profile(module_name)
+    print(f"⏱️  导入 {module_name}: {total * 1000:.1f} ms")
+    for seconds, name in ranked:
+        print(f"  {seconds * 1000:8.1f} ms  {name}")
+    loaded = [name for name in heavy if name in packages]
+    if loaded:
+        print(f"⚠️  启动时已导入: {', '.join(loaded)}")
+    else:
+        print(f"✅ 启动时未导入 {' / '.join(heavy)}（用到时才导入）")
+    return 0
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+素材导入（media ingestion）
+功能：
+1. 把图片、音频放入草稿的 Resources/media 文件夹
+2. 同一文件系统：优先写时复制（reflink / APFS clonefile），其次硬链接
+3. 跨设备（或文件系统不支持）时才回退到 shutil.copy2
+4. IngestPipeline: 导入、读取尺寸/时长等阻塞 I/O 交给有界线程池并发执行，
+   未完成的任务数有上限（提交时阻塞），网络盘（SMB/NFS）上延迟可以互相重叠
+"""
+
+import os
+import errno
+import shutil
+import platform
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+# 导入方式
+INGEST_REFLINK = "reflink"     # 写时复制，零拷贝且文件互相独立
+INGEST_HARDLINK = "hardlink"   # 硬链接，零拷贝，共享同一个 inode
+INGEST_COPY = "copy"           # 普通复制
+INGEST_SKIP = "skip"           # 源文件就是目标文件，无需处理
+
+# 导入线程数（I/O 等待为主，不受 CPU 核数限制）
+DEFAULT_INGEST_WORKERS = 4
+
+# Linux FICLONE ioctl（btrfs / xfs 等支持 reflink 的文件系统）
+_FICLONE = 0x40049409
+
+_clonefile = None
+_clonefile_loaded = False
+
+
+def _load_clonefile():
+    """加载 macOS 的 clonefile(2)（只加载一次）"""
+    global _clonefile, _clonefile_loaded
+    if _clonefile_loaded:
+        return _clonefile
+    _clonefile_loaded = True
+    if platform.system() != "Darwin":
+        return None
+    try:
+        import ctypes
+        import ctypes.util
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        func = libc.clonefile
+        func.argtypes = [ctypes.c_char_p, ctypes.c_char_p, ctypes.c_int]
+        func.restype = ctypes.c_int
+        _clonefile = func
+    except (OSError, AttributeError):
+        _clonefile = None
+    return _clonefile
+
+
+def _try_reflink(src, dst):
+    """尝试写时复制，成功返回 True"""
+    clonefile = _load_clonefile()
+    if clonefile is not None:
+        return clonefile(os.fsencode(src), os.fsencode(dst), 0) == 0
+
+    if platform.system() != "Linux":
+        return False
+
+    try:
+        import fcntl
+    except ImportError:
+        return False
+
+    try:
+        with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+            fcntl.ioctl(fdst.fileno(), _FICLONE, fsrc.fileno())
+    except OSError:
+        # 不支持 reflink 时会留下一个空文件
+        if os.path.exists(dst):
+            os.remove(dst)
+        return False
+
+    shutil.copystat(src, dst)
+    return True
+
+
+def _try_hardlink(src, dst):
+    """尝试硬链接，成功返回 True"""
+    try:
+        os.link(src, dst)
+        return True
+    except OSError as e:
+        if e.errno in (errno.EXDEV, errno.EPERM, errno.EMLINK, errno.ENOTSUP, errno.EACCES):
+            return False
+        raise
+
+
+def same_filesystem(src, dst_folder):
+    """判断源文件与目标文件夹是否位于同一设备"""
+    try:
+        return os.stat(src).st_dev == os.stat(dst_folder).st_dev
+    except OSError:
+        return False
+
+
+def ingest_file(src, dst, mode="link"):
+    """
+    把单个文件导入到目标路径
+
+    Args:
+        src: 源文件
+        dst: 目标文件（已存在会被替换）
+        mode: "link" = reflink → 硬链接 → 复制；"copy" = 始终复制
+
+    Returns:
+        实际使用的导入方式（INGEST_* 常量之一）
+    """
+    if os.path.exists(dst):
+        if os.path.samefile(src, dst):
+            return INGEST_SKIP
+        os.remove(dst)
+
+    if mode != "copy" and same_filesystem(src, os.path.dirname(dst) or "."):
+        if _try_reflink(src, dst):
+            return INGEST_REFLINK
+        if _try_hardlink(src, dst):
+            return INGEST_HARDLINK
+
+    shutil.copy2(src, dst)
+    return INGEST_COPY
+
+
+class IngestPipeline:
+    """
+    有界并发的 I/O 流水线
+
+    submit() / run() 立即返回 Future，任务在线程池中执行；
+    未完成的任务达到 max_pending 时提交会阻塞（背压），避免一次排入上千个复制任务。
+    任务中的异常在 Future.result() 时抛出。
+
+    Args:
+        workers: 线程数（1 = 在调用线程中直接执行，不开线程）
+        max_pending: 最多未完成的任务数，默认 workers 的 2 倍
+
+    用法：
+        with IngestPipeline(workers=4) as pipeline:
+            meta = pipeline.run(probe_images, image_files)
+            futures = [pipeline.submit(src, dst) for src, dst in pairs]
+            methods = [f.result() for f in futures]
+    """
+
+    def __init__(self, workers=DEFAULT_INGEST_WORKERS, max_pending=None):
+        self.workers = max(1, int(workers or 1))
+        self._executor = ThreadPoolExecutor(max_workers=self.workers) if self.workers > 1 else None
+        self._slots = threading.BoundedSemaphore(max_pending or self.workers * 2)
+
+    def run(self, func, *args, **kwargs):
+        """
+        提交任意阻塞任务（读取元数据、复制文件夹等）
+
+        Returns:
+            Future，result() 为 func 的返回值
+        """
+        if self._executor is None:
+            future = Future()
+            try:
+                future.set_result(func(*args, **kwargs))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+        self._slots.acquire()
+        try:
+            future = self._executor.submit(func, *args, **kwargs)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def submit(self, src, dst, mode="link"):
+        """
+        提交一次 ingest_file(src, dst, mode)
+
+        Returns:
+            Future，result() 为实际使用的导入方式（INGEST_* 常量之一）
+        """
+        return self.run(ingest_file, src, dst, mode=mode)
+
+    def close(self):
+        """等待所有已提交的任务完成"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+def summarize_methods(methods):
+    """统计导入方式，返回如 "reflink 3, 硬链接 2, 复制 1" 的简短描述"""
+    labels = [
+        (INGEST_REFLINK, "reflink"),
+        (INGEST_HARDLINK, "硬链接"),
+        (INGEST_COPY, "复制"),
+        (INGEST_SKIP, "已就位"),
+    ]
+    parts = []
+    for key, label in labels:
+        count = sum(1 for m in methods if m == key)
+        if count:
+            parts.append(f"{label} {count}")
+    return ", ".join(parts) if parts else "无"
@@ -0,0 +1,440 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+素材根目录的项目索引
+功能：
+1. 持久化（JSON）记录每个项目文件夹的音频/图片数量、素材大小、目录修改时间和最近一次生成草稿的状态
+2. 增量更新：根目录修改时间不变就不重新列目录；项目文件夹修改时间不变就不重新扫描
+3. 安装 watchdog 时可常驻监听（inotify / FSEvents），监听进程运行期间其他进程直接信任索引，启动即列出文件夹
+4. 查询还没有生成过草稿的项目
+5. 多个进程（监听、守护进程、批量生成、主程序）共用一个索引文件：写入时加文件锁，
+   先合并磁盘上其他进程记录的生成结果（last_processed 取较新的一条），不会互相覆盖
+
+用法：
+    python3 project_index.py list      # 列出所有项目
+    python3 project_index.py pending   # 列出还没有草稿的项目
+    python3 project_index.py watch     # 常驻监听，实时更新索引
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import threading
+import contextlib
+
+from folder_scan import scan_folder, _RACY_WINDOW_NS
+
+from lazy_imports import module_available
+
+# watchdog（文件系统事件监听，可选）：开始监听时才导入
+WATCHDOG_AVAILABLE = module_available("watchdog")
+
+# 跨进程文件锁：POSIX 用 fcntl，Windows 用 msvcrt，都没有时不加锁
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
+INDEX_VERSION = 1
+
+# 索引文件目录（与 image_meta.json 同在 cache/ 下，每个素材根目录一个文件）
+INDEX_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache")
+
+# 监听进程心跳间隔（秒）；心跳在 HEARTBEAT_TIMEOUT 内有效时，其他进程不再刷新索引
+HEARTBEAT_INTERVAL = 10
+HEARTBEAT_TIMEOUT = 30
+
+# 没有 watchdog 时的轮询间隔（秒）
+POLL_INTERVAL = 5
+
+
+def index_path_for(base_folder):
+    """素材根目录对应的索引文件路径"""
+    digest = hashlib.sha1(os.path.abspath(base_folder).encode("utf-8")).hexdigest()[:12]
+    return os.path.join(INDEX_FOLDER, f"project_index_{digest}.json")
+
+
+def _unchanged(mtime_ns, indexed_mtime_ns, scanned_ns):
+    """目录修改时间未变，且上次扫描不在修改时间的精度窗口内（同 folder_scan）"""
+    return mtime_ns == indexed_mtime_ns and scanned_ns - mtime_ns > _RACY_WINDOW_NS
+
+
+@contextlib.contextmanager
+def _file_lock(path):
+    """跨进程互斥锁（锁文件 path + ".lock"）"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(f"{path}.lock", "a+") as f:
+        if fcntl:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        elif msvcrt:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            elif msvcrt:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _newer_result(current, other):
+    """两条 last_processed 中较新的一条（时间相同时保留 current）"""
+    if not other:
+        return current
+    if not current or other.get("time", 0) > current.get("time", 0):
+        return other
+    return current
+
+
+def _folder_entry(folder_path, mtime_ns, previous=None):
+    """扫描一个项目文件夹，生成索引条目（保留上一次的生成状态）"""
+    scan = scan_folder(folder_path)
+    media = (scan.audio_files + scan.image_files) if scan else []
+    size_bytes = 0
+    for path in media:
+        try:
+            size_bytes += os.stat(path).st_size
+        except OSError:
+            pass
+    entry = {
+        "mtime_ns": mtime_ns,
+        "scanned_ns": scan.scanned_ns if scan else 0,
+        "audio_count": len(scan.audio_files) if scan else 0,
+        "image_count": len(scan.image_files) if scan else 0,
+        "size_bytes": size_bytes,
+        "last_processed": None,
+    }
+    if previous:
+        entry["last_processed"] = previous.get("last_processed")
+    return entry
+
+
+class ProjectIndex:
+    """
+    项目索引
+
+    Args:
+        base_folder: 素材根目录
+        path: 索引文件（None = cache/project_index_<根目录哈希>.json）
+    """
+
+    def __init__(self, base_folder, path=None):
+        self.base_folder = os.path.abspath(base_folder)
+        self.path = path or index_path_for(base_folder)
+        self.data = {"version": INDEX_VERSION, "base": self.base_folder,
+                     "base_mtime_ns": None, "base_scanned_ns": 0, "heartbeat": 0, "projects": {}}
+        self._lock = threading.RLock()
+        self._dirty = False
+        self._load()
+
+    def _read(self):
+        """读取索引文件；不存在、损坏或不是同一个素材根目录时返回 None"""
+        if not os.path.exists(self.path):
+            return None
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get("version") == INDEX_VERSION and data.get("base") == self.base_folder:
+            return data
+        return None
+
+    def _load(self):
+        data = self._read()
+        if data is not None:
+            self.data = data
+
+    def _merge_disk(self):
+        """
+        合并磁盘上其他进程写入的内容（需持有文件锁）
+
+        项目列表以本进程为准；生成结果取较新的一条，本进程还不知道的项目（文件夹仍存在）直接采用，
+        其他顶层字段本进程没有时采用。
+        """
+        data = self._read()
+        if data is None:
+            return
+        for key, value in data.items():
+            self.data.setdefault(key, value)
+        for name, disk_entry in data.get("projects", {}).items():
+            if not disk_entry:
+                continue
+            if name not in self.projects:
+                if disk_entry.get("last_processed") and os.path.isdir(os.path.join(self.base_folder, name)):
+                    self.projects[name] = disk_entry
+                continue
+            entry = self.projects[name]
+            if entry is None:
+                self.projects[name] = disk_entry
+            else:
+                entry["last_processed"] = _newer_result(entry.get("last_processed"),
+                                                        disk_entry.get("last_processed"))
+
+    @property
+    def projects(self):
+        return self.data["projects"]
+
+    @property
+    def watcher_active(self):
+        """是否有监听进程在维护这个索引"""
+        return time.time() - self.data.get("heartbeat", 0) < HEARTBEAT_TIMEOUT
+
+    # ------------------------------------------------------------------
+    # 更新
+    # ------------------------------------------------------------------
+
+    def refresh(self, force=False):
+        """
+        增量刷新索引
+
+        Args:
+            force: 忽略监听进程心跳，强制检查所有项目文件夹
+
+        Returns:
+            重新扫描的项目数
+        """
+        if not force and self.watcher_active:
+            return 0
+        try:
+            base_mtime = os.stat(self.base_folder).st_mtime_ns
+        except OSError:
+            return 0
+
+        with self._lock:
+            projects = self.projects
+            if not _unchanged(base_mtime, self.data.get("base_mtime_ns"),
+                              self.data.get("base_scanned_ns", 0)):
+                # 根目录有增删：重新列出项目文件夹
+                scan = scan_folder(self.base_folder)
+                names = set(scan.folders) if scan else set()
+                for name in list(projects):
+                    if name not in names:
+                        del projects[name]
+                for name in names:
+                    projects.setdefault(name, None)
+                self.data["base_mtime_ns"] = base_mtime
+                self.data["base_scanned_ns"] = scan.scanned_ns if scan else 0
+                self._dirty = True
+
+            rescanned = 0
+            for name in list(projects):
+                if self._refresh_folder(name):
+                    rescanned += 1
+        return rescanned
+
+    def _refresh_folder(self, name):
+        """项目文件夹修改时间变化时重新扫描，返回是否重新扫描"""
+        folder_path = os.path.join(self.base_folder, name)
+        try:
+            mtime_ns = os.stat(folder_path).st_mtime_ns
+        except OSError:
+            if self.projects.pop(name, None) is not None:
+                self._dirty = True
+            return False
+        previous = self.projects.get(name)
+        if previous and _unchanged(mtime_ns, previous.get("mtime_ns"), previous.get("scanned_ns", 0)):
+            return False
+        self.projects[name] = _folder_entry(folder_path, mtime_ns, previous)
+        self._dirty = True
+        return True
+
+    def update_folder(self, name):
+        """监听到变化后更新单个项目（文件夹被删除时移除）"""
+        with self._lock:
+            if os.path.isdir(os.path.join(self.base_folder, name)):
+                self.projects.setdefault(name, None)
+                self._refresh_folder(name)
+            elif self.projects.pop(name, None) is not None:
+                self._dirty = True
+
+    def mark_processed(self, name, draft_folder, status="ok"):
+        """记录项目最近一次生成草稿的结果"""
+        with self._lock:
+            entry = self.projects.get(name)
+            if entry is None:
+                folder_path = os.path.join(self.base_folder, name)
+                try:
+                    entry = _folder_entry(folder_path, os.stat(folder_path).st_mtime_ns)
+                except OSError:
+                    return
+                self.projects[name] = entry
+            entry["last_processed"] = {
+                "time": int(time.time()),
+                "draft_folder": draft_folder,
+                "status": status,
+                "source_mtime_ns": entry.get("mtime_ns"),
+            }
+            self._dirty = True
+
+    def save(self, heartbeat=False):
+        """
+        写入索引（文件锁内先合并磁盘上其他进程的生成结果，再临时文件 + 替换）；
+        heartbeat=True 时同时更新监听心跳
+        """
+        with self._lock:
+            if heartbeat:
+                self.data["heartbeat"] = time.time()
+            elif not self._dirty:
+                return
+            with _file_lock(self.path):
+                self._merge_disk()
+                tmp_path = f"{self.path}.{os.getpid()}.tmp"
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(self.data, f, ensure_ascii=False)
+                os.replace(tmp_path, self.path)
+            self._dirty = False
+
+    def sync(self):
+        """读入其他进程记录的生成结果（不写文件）"""
+        with self._lock, _file_lock(self.path):
+            self._merge_disk()
+
+    def release(self):
+        """监听结束：清除心跳，其他进程恢复自行刷新"""
+        with self._lock:
+            self.data["heartbeat"] = 0
+            self._dirty = True
+            self.save()
+
+    # ------------------------------------------------------------------
+    # 查询
+    # ------------------------------------------------------------------
+
+    def folder_names(self):
+        return list(self.projects)
+
+    def get(self, name):
+        return self.projects.get(name)
+
+    def pending(self):
+        """有音频和图片、但还没有成功生成过草稿的项目（按名称排序）"""
+        names = []
+        for name, entry in self.projects.items():
+            if not entry or not entry["audio_count"] or not entry["image_count"]:
+                continue
+            last = entry.get("last_processed")
+            if not last or last.get("status") != "ok":
+                names.append(name)
+        return sorted(names)
+
+    # ------------------------------------------------------------------
+    # 监听
+    # ------------------------------------------------------------------
+
+    def watch(self, stop_event=None, on_change=None):
+        """
+        常驻监听素材根目录并实时更新索引（Ctrl+C 或 stop_event 结束）
+
+        有 watchdog 时使用文件系统事件，否则每 POLL_INTERVAL 秒按修改时间轮询。
+
+        Args:
+            stop_event: threading.Event，置位后退出
+            on_change: 项目变化回调 f(项目名)
+        """
+        stop_event = stop_event or threading.Event()
+        self.refresh(force=True)
+        self.save(heartbeat=True)
+
+        changed = set()
+        changed_lock = threading.Lock()
+        observer = None
+        if WATCHDOG_AVAILABLE:
+            from watchdog.observers import Observer
+            observer = Observer()
+            observer.schedule(_IndexEventHandler(self.base_folder, changed, changed_lock),
+                              self.base_folder, recursive=True)
+            observer.start()
+
+        last_heartbeat = time.time()
+        try:
+            while not stop_event.wait(1 if observer else POLL_INTERVAL):
+                if observer:
+                    with changed_lock:
+                        names, changed = set(changed), set()
+                    for name in names:
+                        self.update_folder(name)
+                else:
+                    before = {name: (e or {}).get("mtime_ns") for name, e in self.projects.items()}
+                    self.refresh(force=True)
+                    names = {name for name, e in self.projects.items()
+                             if (e or {}).get("mtime_ns") != before.get(name)}
+                if on_change:
+                    for name in sorted(names):
+                        on_change(name)
+                if names or time.time() - last_heartbeat >= HEARTBEAT_INTERVAL:
+                    self.save(heartbeat=True)
+                    last_heartbeat = time.time()
+        finally:
+            if observer:
+                observer.stop()
+                observer.join()
+            self.release()
+
+
+class _IndexEventHandler:
+    """把文件系统事件归到对应的项目文件夹（根目录下第一层）；watchdog 对每个事件调用 dispatch()"""
+
+    def __init__(self, base_folder, changed, lock):
+        self.base_folder = base_folder
+        self.changed = changed
+        self.lock = lock
+
+    def _project_of(self, path):
+        rel = os.path.relpath(path, self.base_folder)
+        if rel.startswith(os.pardir) or rel == os.curdir:
+            return None
+        return rel.split(os.sep, 1)[0]
+
+    def dispatch(self, event):
+        paths = [event.src_path, getattr(event, "dest_path", None)]
+        with self.lock:
+            for path in paths:
+                name = self._project_of(path) if path else None
+                if name and not name.startswith("."):
+                    self.changed.add(name)
+
+
+def main():
+    """命令行入口"""
+    import auto_capcut_draft_enhanced as enhanced
+
+    command = sys.argv[1] if len(sys.argv) > 1 else "list"
+    index = ProjectIndex(enhanced.MATERIAL_BASE_FOLDER)
+
+    if command == "watch":
+        mode = "watchdog" if WATCHDOG_AVAILABLE else f"轮询（每 {POLL_INTERVAL} 秒，pip3 install watchdog 可实时监听）"
+        print(f"👀 监听 {index.base_folder}（{mode}），Ctrl+C 退出")
+        try:
+            index.watch(on_change=lambda name: print(f"🔄 {name}"))
+        except KeyboardInterrupt:
+            print("\n👋 已退出")
+        return 0
+
+    index.refresh()
+    index.save()
+    if command == "pending":
+        for name in index.pending():
+            print(name)
+        return 0
+    if command == "list":
+        for name in sorted(index.projects, reverse=True):
+            entry = index.projects[name] or {}
+            last = entry.get("last_processed") or {}
+            print(f"{name:30s}  🎵 {entry.get('audio_count', 0):3d}  🖼️  {entry.get('image_count', 0):4d}  "
+                  f"{entry.get('size_bytes', 0) / 1024 / 1024:8.1f} MB  {last.get('status', '-')}")
+        return 0
+    print(f"未知命令: {command}（可选: list / pending / watch）")
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+故事素材分组索引（zidongjianji）
+功能：
+1. 一次 os.scandir 读出文件夹中的文件名，用一个预编译的组合正则同时识别图片与音频的故事编号
+2. 分组结果（已自然排序）持久化到 cache/story_index_<文件夹哈希>.json
+3. 再次运行时文件夹修改时间不变就不读目录；变化时只读文件名，与索引比较：
+   新增 / 改名后的文件才做正则匹配，删除 / 改名前的文件直接移除，只重新排序受影响的故事
+4. 不符合命名规则的文件也记录下来，~/Downloads 中成千上万的无关文件只匹配一次
+
+命名规则：
+    图片: "1 (1).png"（格式1）或 "2-03.jpg"（格式2），扩展名 jpg / jpeg / png / bmp
+    音频: "1-1.mp3"，扩展名 mp3 / wav / m4a / aac
+"""
+
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+
+from folder_scan import _RACY_WINDOW_NS
+
+INDEX_VERSION = 1
+
+# 索引文件目录（与 image_meta.json、project_index 同在 cache/ 下）
+INDEX_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache")
+
+KIND_IMAGE = "images"
+KIND_AUDIO = "audios"
+
+# 格式1 只用于图片；格式2 的扩展名决定是图片还是音频
+_STORY_PATTERN = re.compile(
+    r'^(?P<story>\d+)(?:'
+    r'\s*\(.*\)\.(?P<image1>jpg|jpeg|png|bmp)'
+    r'|-.*\.(?:(?P<image2>jpg|jpeg|png|bmp)|(?P<audio>mp3|wav|m4a|aac))'
+    r')$',
+    re.IGNORECASE,
+)
+_DIGITS = re.compile(r'(\d+)')
+
+
+def classify(filename):
+    """
+    按命名规则识别文件
+
+    Returns:
+        (故事编号, KIND_IMAGE / KIND_AUDIO)；不符合规则时返回 None
+    """
+    match = _STORY_PATTERN.match(filename)
+    if match is None:
+        return None
+    kind = KIND_AUDIO if match.group("audio") else KIND_IMAGE
+    return match.group("story"), kind
+
+
+def natural_sort_key(filename):
+    """自然排序键，确保 1-1, 1-2, 1-3... 而不是 1-1, 1-10, 1-11..."""
+    return tuple(int(part) for part in _DIGITS.findall(filename))
+
+
+def _sort_key(filename):
+    # 数字相同（如 1 (1).png 与 1 (1).jpg）时按文件名，保证顺序稳定
+    return natural_sort_key(filename), filename
+
+
+def index_path_for(folder):
+    digest = hashlib.sha1(os.path.abspath(folder).encode("utf-8")).hexdigest()[:12]
+    return os.path.join(INDEX_FOLDER, f"story_index_{digest}.json")
+
+
+class StoryIndex:
+    """
+    单个文件夹的故事分组索引
+
+    Args:
+        folder: 素材文件夹
+        path: 索引文件（None = cache/story_index_<文件夹哈希>.json）
+    """
+
+    def __init__(self, folder, path=None):
+        self.folder = os.path.abspath(folder)
+        self.path = path or index_path_for(folder)
+        self.data = {"version": INDEX_VERSION, "folder": self.folder,
+                     "mtime_ns": None, "scanned_ns": 0, "files": {}, "groups": {}}
+        self._dirty = False
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("version") == INDEX_VERSION and data.get("folder") == self.folder:
+            self.data = data
+
+    def refresh(self):
+        """
+        按文件夹修改时间增量刷新
+
+        Returns:
+            (新增文件数, 删除文件数)；文件夹未变化时为 (0, 0)
+        """
+        try:
+            mtime_ns = os.stat(self.folder).st_mtime_ns
+        except OSError:
+            return 0, 0
+        if (mtime_ns == self.data["mtime_ns"]
+                and self.data["scanned_ns"] - mtime_ns > _RACY_WINDOW_NS):
+            return 0, 0
+
+        scanned_ns = time.time_ns()
+        names = set()
+        with os.scandir(self.folder) as entries:
+            for entry in entries:
+                if not entry.name.startswith("."):
+                    names.add(entry.name)
+
+        files = self.data["files"]
+        removed = [name for name in files if name not in names]
+        added = [name for name in names if name not in files]
+        touched = set()
+        for name in removed:
+            info = files.pop(name)
+            if info:
+                story, kind = info
+                self.data["groups"][story][kind].remove(name)
+                touched.add(story)
+        for name in added:
+            info = classify(name)
+            if info and not os.path.isfile(os.path.join(self.folder, name)):
+                info = None
+            files[name] = list(info) if info else None
+            if info:
+                story, kind = info
+                group = self.data["groups"].setdefault(story, {KIND_IMAGE: [], KIND_AUDIO: []})
+                group[kind].append(name)
+                touched.add(story)
+        for story in touched:
+            group = self.data["groups"][story]
+            if not group[KIND_IMAGE] and not group[KIND_AUDIO]:
+                del self.data["groups"][story]
+                continue
+            for kind in (KIND_IMAGE, KIND_AUDIO):
+                group[kind].sort(key=_sort_key)
+
+        self.data["mtime_ns"] = mtime_ns
+        self.data["scanned_ns"] = scanned_ns
+        self._dirty = True
+        return len(added), len(removed)
+
+    def groups(self, kind):
+        """{故事编号: [完整路径, ...]}（已自然排序）"""
+        return {story: [os.path.join(self.folder, name) for name in group[kind]]
+                for story, group in self.data["groups"].items() if group[kind]}
+
+    def save(self):
+        """写入索引（临时文件 + 替换）"""
+        if not self._dirty:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.data, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+        self._dirty = False
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def load_story_index(folder):
+    """刷新并返回文件夹的故事索引（进程内复用同一个实例；写回失败不影响分组结果）"""
+    folder = os.path.abspath(folder)
+    with _indexes_lock:
+        index = _indexes.get(folder)
+        if index is None:
+            index = _indexes[folder] = StoryIndex(folder)
+        index.refresh()
+        try:
+            index.save()
+        except OSError:
+            pass
+    return index
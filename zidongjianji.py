@@ -5,26 +5,79 @@ import json
 import os
 import uuid
 import shutil
-import glob
-import re
+import fnmatch
+import math
 import subprocess
 import random
+import io
+import time
+import contextlib
+import functools
+import tempfile
 from typing import List, Dict
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from mutagen import File as MutagenFile
+from image_probe import probe_images
+from draft_ids import DraftIdFactory
+from draft_validator import validate_draft
+from draft_layout import PairSplitPolicy
+from draft_materials import SegmentMaterialPool, JIANYING_VIDEO_KINDS, JIANYING_AUDIO_KINDS
+from draft_writer import write_draft_json
+from draft_builder import (
+    PROFILE_JIANYING, PROFILE_JSON_INDENT, build_audio_material, build_image_material,
+    iter_image_segments, iter_audio_segments, build_track, find_track
+)
+from media_ingest import ingest_file, IngestPipeline
+from draft_animations import create_animation_materials, assign_intro_animations
+from story_index import load_story_index, natural_sort_key, KIND_IMAGE, KIND_AUDIO
+
+# ID 生成模式
+# "random" = 每次生成随机 uuid4
+# "deterministic" = 由 故事编号 + 材料角色 + 序号 推导 UUIDv5，相同输入生成相同 JSON
+ID_MODE = "random"
+
+# 草稿完整性检查（生成后检查材料引用与时间线，只打印问题，不影响生成）
+VALIDATE_DRAFTS = True
+
+# 对白音频音量（线性值，10.0 = +20dB）
+DIALOGUE_VOLUME = 10.0
+
+# 并行生成的进程数（1 = 逐个生成；各故事互不依赖，JSON 解析/写入与模板复制可并行）
+STORY_WORKERS = min(4, os.cpu_count() or 1)
+
+# 先在输出文件夹内的暂存目录生成草稿，完成后改名到最终位置（同一文件系统内 rename，不复制数据）
+# 剪映不会看到写了一半的草稿；重新生成已有草稿时旧草稿在新草稿就位后才删除
+STAGE_DRAFTS = True
+STAGING_PREFIX = ".zidongjianji_staging_"
+
+# 模板素材文件夹中文件的导入方式："link" = reflink / 硬链接（跨设备时复制）；"copy" = 始终复制
+TEMPLATE_INGEST_MODE = "link"
+# 只有这些子文件夹中的素材（剪映不会改写）按 TEMPLATE_INGEST_MODE 导入；
+# 其它文件（draft_settings、draft.extra、*.json、*.tmp 等剪映会原地改写）始终复制，避免通过硬链接改到模板
+TEMPLATE_LINK_FOLDERS = ("Resources",)
+# 每个故事内读取素材元数据、导入模板文件的并发线程数（1 = 逐个执行）
+INGEST_WORKERS = 4
+
+# 模板自带素材的时长调整（按轨道类型 + 素材名匹配，不区分大小写，同一轨道类型中先匹配的规则生效）
+# (素材名模式, 调整方式, 音量)：
+#   "full" = 延长到整个视频；"tail" = 放到视频末尾，时长 TAIL_CLIP_DURATION
+#   音量为 None 时不修改
+RETIME_FULL = "full"
+RETIME_TAIL = "tail"
+TAIL_CLIP_DURATION = 5000000  # 5秒
+RETIME_RULES = {
+    "audio": [("messironaldo.mp3", RETIME_FULL, 3.16)],  # 背景音乐，+10dB
+    "video": [("*black.png*", RETIME_FULL, None),
+              ("*.mp4*", RETIME_TAIL, None)],
+}
+# 效果轨道（震动特效等）第一个片段延长到整个视频
+RETIME_EFFECT_TRACKS = True
 
 def generate_uuid() -> str:
     """生成UUID"""
     return str(uuid.uuid4()).upper()
 
-def natural_sort_key(filename: str) -> tuple:
-    """
-    自然排序键函数，确保1-1, 1-2, 1-3...而不是1-1, 1-10, 1-11...
-    """
-    # 提取文件名中的数字部分
-    parts = re.findall(r'(\d+)', filename)
-    return tuple(int(part) for part in parts)
-
 def get_audio_duration_accurate(audio_file: str) -> int:
     """
     获取音频文件的准确时长（微秒）
@@ -55,49 +108,147 @@ def get_story_groups(image_folder: str, audio_folder: str) -> Dict[str, Dict[str
     """
     story_groups = defaultdict(lambda: {'images': [], 'audios': []})
     
-    # 处理图片文件 - 支持两种格式：
-    # 格式1：数字 (数字).扩展名，如 "1 (1).png"
-    # 格式2：数字-数字.扩展名，如 "2-03.jpg"
-    if os.path.exists(image_folder):
-        for ext in ['*.jpg', '*.jpeg', '*.png', '*.bmp']:
-            image_files = glob.glob(os.path.join(image_folder, ext))
-            for image_file in image_files:
-                filename = os.path.basename(image_file)
-                story_id = None
-                
-                # 尝试匹配格式1：数字 (数字).扩展名
-                match1 = re.match(r'^(\d+)\s*\(.*\)\.(jpg|jpeg|png|bmp)$', filename, re.IGNORECASE)
-                if match1:
-                    story_id = match1.group(1)
-                else:
-                    # 尝试匹配格式2：数字-数字.扩展名
-                    match2 = re.match(r'^(\d+)-.*\.(jpg|jpeg|png|bmp)$', filename, re.IGNORECASE)
-                    if match2:
-                        story_id = match2.group(1)
-                
-                if story_id:
-                    story_groups[story_id]['images'].append(image_file)
-    
-    # 处理音频文件 - 匹配格式：数字-数字.扩展名，如 "1-1.mp3"
-    if os.path.exists(audio_folder):
-        for ext in ['*.mp3', '*.wav', '*.m4a', '*.aac']:
-            audio_files = glob.glob(os.path.join(audio_folder, ext))
-            for audio_file in audio_files:
-                filename = os.path.basename(audio_file)
-                # 匹配格式：数字-任意内容.扩展名
-                match = re.match(r'^(\d+)-.*\.(mp3|wav|m4a|aac)$', filename, re.IGNORECASE)
-                if match:
-                    story_id = match.group(1)
-                    story_groups[story_id]['audios'].append(audio_file)
-    
-    # 对每个故事的文件进行自然排序
-    for story_id in story_groups:
-        story_groups[story_id]['images'].sort(key=lambda x: natural_sort_key(os.path.basename(x)))
-        story_groups[story_id]['audios'].sort(key=lambda x: natural_sort_key(os.path.basename(x)))
+    # 一次目录读取 + 组合正则分组，结果持久化；文件夹未变化时不读目录，
+    # 有新增/删除/改名时只处理变化的文件名（见 story_index）
+    # 图片支持 "1 (1).png" 与 "2-03.jpg" 两种格式，音频为 "1-1.mp3"
+    for folder, kind in ((image_folder, KIND_IMAGE), (audio_folder, KIND_AUDIO)):
+        if os.path.exists(folder):
+            for story_id, files in load_story_index(folder).groups(kind).items():
+                story_groups[story_id][kind] = files
     
     return dict(story_groups)
 
-def create_single_story_draft(template_path: str, story_id: str, image_files: List[str], audio_files: List[str], output_folder: str):
+def _set_segment_time(segment: Dict, duration: int, start: int = None):
+    """修改片段的时间范围（target 与 source 时长同步）"""
+    if start is not None:
+        segment['target_timerange']['start'] = start
+    segment['target_timerange']['duration'] = duration
+    if segment.get('source_timerange') is not None:
+        segment['source_timerange']['duration'] = duration
+
+def retime_template_segments(draft: Dict, total_duration: int):
+    """
+    按 RETIME_RULES 调整模板自带素材的片段时长
+    
+    先建立一次 材料 ID -> 素材名 的索引，再遍历一遍所有轨道，
+    不必为每个片段扫描整个材料列表。
+    
+    Args:
+        draft: 草稿数据（原地修改）
+        total_duration: 视频总时长（微秒）
+    """
+    material_names = {}
+    for kind in ('audios', 'videos'):
+        for material in draft['materials'].get(kind, []):
+            name = material.get('material_name') or material.get('name') or ''
+            material_names[material['id']] = name
+    
+    for track in draft['tracks']:
+        if track['type'] == 'effect':
+            if RETIME_EFFECT_TRACKS and track['segments']:
+                _set_segment_time(track['segments'][0], total_duration)
+                print(f"✅ 延长效果轨道到 {total_duration/1000000:.2f}秒")
+            continue
+        
+        rules = RETIME_RULES.get(track['type'])
+        if not rules:
+            continue
+        for segment in track['segments']:
+            name = material_names.get(segment.get('material_id'))
+            if not name:
+                continue
+            for pattern, mode, volume in rules:
+                if not fnmatch.fnmatch(name.lower(), pattern):
+                    continue
+                if mode == RETIME_TAIL:
+                    start = total_duration - TAIL_CLIP_DURATION
+                    _set_segment_time(segment, TAIL_CLIP_DURATION, start)
+                    message = f"✅ 调整 {name} 到视频末尾，时长{TAIL_CLIP_DURATION/1000000:.0f}秒，开始时间 {start/1000000:.2f}秒"
+                else:
+                    _set_segment_time(segment, total_duration)
+                    message = f"✅ 延长 {name} 到 {total_duration/1000000:.2f}秒"
+                if volume is not None:
+                    segment['volume'] = volume
+                    message += f"，音量设为 {20 * math.log10(volume):+.0f}dB"
+                print(message)
+                break
+
+def _ingest_template_file(template_folder: str, src_path: str, dst_path: str):
+    """导入单个模板文件（copytree 的 copy_function）：TEMPLATE_LINK_FOLDERS 中的素材可链接，其它文件复制"""
+    top_folder = os.path.relpath(src_path, template_folder).split(os.sep, 1)[0]
+    if top_folder != os.path.basename(src_path) and top_folder in TEMPLATE_LINK_FOLDERS:
+        mode = TEMPLATE_INGEST_MODE
+    else:
+        mode = "copy"
+    ingest_file(src_path, dst_path, mode=mode)
+    return dst_path
+
+def copy_template_payload(template_folder: str, story_folder: str):
+    """把模板文件夹中除 draft_content.json 外的文件导入草稿文件夹"""
+    for item in os.listdir(template_folder):
+        if item == "draft_content.json":
+            continue
+        src_path = os.path.join(template_folder, item)
+        dst_path = os.path.join(story_folder, item)
+        
+        try:
+            if os.path.isfile(src_path):
+                _ingest_template_file(template_folder, src_path, dst_path)
+            elif os.path.isdir(src_path):
+                if os.path.exists(dst_path):
+                    shutil.rmtree(dst_path)
+                shutil.copytree(src_path, dst_path,
+                                copy_function=functools.partial(_ingest_template_file, template_folder))
+        except Exception as e:
+            print(f"复制文件时出错 {item}: {e}")
+
+def publish_story_folder(staged_folder: str, final_folder: str):
+    """
+    把暂存的草稿文件夹改名到最终位置
+    
+    已有同名草稿时先把旧草稿改名到暂存文件夹旁的新建空文件夹中，新草稿就位后才删除，
+    换位之前不删除任何文件，最终位置始终是完整的草稿（旧的或新的）。
+    """
+    if not os.path.exists(final_folder):
+        os.rename(staged_folder, final_folder)
+        return
+    aside_folder = tempfile.mkdtemp(prefix=f"{os.path.basename(staged_folder)}.old_",
+                                    dir=os.path.dirname(staged_folder))
+    old_folder = os.path.join(aside_folder, os.path.basename(final_folder))
+    os.rename(final_folder, old_folder)
+    try:
+        os.rename(staged_folder, final_folder)
+    except OSError:
+        os.rename(old_folder, final_folder)
+        os.rmdir(aside_folder)
+        raise
+    shutil.rmtree(aside_folder, ignore_errors=True)
+
+def print_layout(layout, audio_ids: List[tuple], threshold: int):
+    """按音频段打印布局引擎的图片分配结果（threshold: 短音频阈值，微秒）"""
+    placements = defaultdict(list)
+    for audio_idx, img_idx, start, duration in layout.placements():
+        placements[audio_idx].append((img_idx, duration))
+    
+    for audio_idx, (_, duration) in enumerate(audio_ids):
+        audio_duration_seconds = duration / 1000000  # 转换为秒
+        print(f"\n音频段 {audio_idx + 1}: 时长 {audio_duration_seconds:.2f}秒")
+        
+        placed = placements.get(audio_idx)
+        if not placed:
+            print(f"  警告: 音频段 {audio_idx + 1} 没有足够的图片")
+        elif len(placed) == 2:
+            (first, first_duration), (second, second_duration) = placed
+            print(f"  长音频配2张图片: 图片{first + 1}({first_duration/1000000:.2f}秒) + "
+                  f"图片{second + 1}({second_duration/1000000:.2f}秒)")
+        elif duration < threshold:
+            print(f"  短音频配1张图片: 图片{placed[0][0] + 1} (时长{audio_duration_seconds:.2f}秒)")
+            print(f"  跳过图片{placed[0][0] + 2}，不再使用")
+        else:
+            print(f"  图片不足，长音频配1张图片: 图片{placed[0][0] + 1} (时长{audio_duration_seconds:.2f}秒)")
+
+def create_single_story_draft(template_path: str, story_id: str, image_files: List[str], audio_files: List[str], output_folder: str,
+                              id_mode: str = None, staging_folder: str = None):
     """
     为单个故事创建剪映草稿
     
@@ -107,8 +258,19 @@ def create_single_story_draft(template_path: str, story_id: str, image_files: Li
         image_files: 图片文件列表
         audio_files: 音频文件列表
         output_folder: 输出文件夹路径
+        id_mode: ID 生成模式 "random" / "deterministic"（None = 使用 ID_MODE 配置）
+        staging_folder: 暂存文件夹（需与 output_folder 在同一文件系统）；
+            设置时先在其中生成，完成后改名到 output_folder
+    
+    Returns:
+        DraftReport 检查结果（VALIDATE_DRAFTS 关闭时为 None）
     """
     
+    # 按角色自动编号生成 ID（deterministic 模式下可复现，动画的随机选择也固定种子）
+    id_factory = DraftIdFactory(id_mode or ID_MODE, seed=f"story:{story_id}")
+    new_id = id_factory.next
+    rng = random.Random(f"story:{story_id}") if id_factory.deterministic else random
+    
     print(f"\n=== 创建故事 {story_id} 的草稿 ===")
     print(f"图片文件数量: {len(image_files)}")
     print(f"音频文件数量: {len(audio_files)}")
@@ -125,8 +287,14 @@ def create_single_story_draft(template_path: str, story_id: str, image_files: Li
     with open(template_path, 'r', encoding='utf-8') as f:
         draft = json.load(f)
     
-    # 创建故事专用输出文件夹
-    story_output_folder = os.path.join(output_folder, story_id)
+    # 创建故事专用输出文件夹（暂存模式下先写到暂存文件夹）
+    final_story_folder = os.path.join(output_folder, story_id)
+    if staging_folder:
+        story_output_folder = os.path.join(staging_folder, story_id)
+        if os.path.exists(story_output_folder):
+            shutil.rmtree(story_output_folder)
+    else:
+        story_output_folder = final_story_folder
     os.makedirs(story_output_folder, exist_ok=True)
     
     # 保留原有的基础材料
@@ -143,356 +311,71 @@ def create_single_story_draft(template_path: str, story_id: str, image_files: Li
             track['segments'] = []
             break
     
-    # 添加音频材料
-    audio_ids = []
-    
-    for audio_file in audio_files:
-        file_name = os.path.basename(audio_file)
-        audio_id = generate_uuid()
+    # 读取音频时长、图片尺寸和导入模板文件夹的其他文件在有界线程池中并发执行
+    # （reflink / 硬链接，不复制数据；素材在网络盘上时各文件的延迟互相重叠）
+    with IngestPipeline(workers=INGEST_WORKERS) as pipeline:
+        payload_future = pipeline.run(copy_template_payload, os.path.dirname(template_path), story_output_folder)
+        image_meta_future = pipeline.run(probe_images, image_files)
+        duration_futures = [pipeline.run(get_audio_duration_accurate, audio_file) for audio_file in audio_files]
         
-        # 获取音频文件的估算时长
-        duration = get_audio_duration_accurate(audio_file)
+        # 添加音频材料
+        audio_ids = []
         
-        audio_material = {
-            "app_id": 0,
-            "category_id": "",
-            "category_name": "",
-            "check_flag": 1,
-            "copyright_limit_type": "none",
-            "duration": duration,
-            "effect_id": "",
-            "formula_id": "",
-            "id": audio_id,
-            "intensifies_path": "",
-            "is_ai_clone_tone": False,
-            "is_text_edit_overdub": False,
-            "is_ugc": False,
-            "local_material_id": "",
-            "music_id": "",
-            "name": file_name,
-            "path": audio_file,
-            "query": "",
-            "request_id": "",
-            "resource_id": "",
-            "search_id": "",
-            "source_from": "",
-            "source_platform": 0,
-            "team_id": "",
-            "text_id": "",
-            "tone_category_id": "",
-            "tone_category_name": "",
-            "tone_effect_id": "",
-            "tone_effect_name": "",
-            "tone_platform": "",
-            "tone_second_category_id": "",
-            "tone_second_category_name": "",
-            "tone_speaker": "",
-            "tone_type": "",
-            "type": "extract_music",
-            "video_id": "",
-            "wave_points": []
-        }
-        
-        draft['materials']['audios'].append(audio_material)
-        audio_ids.append((audio_id, duration))
+        for audio_file, duration_future in zip(audio_files, duration_futures):
+            file_name = os.path.basename(audio_file)
+            audio_id = new_id("audio")
+            
+            # 获取音频文件的估算时长
+            duration = duration_future.result()
+            
+            draft['materials']['audios'].append(
+                build_audio_material(audio_id, audio_file, file_name, duration, profile=PROFILE_JIANYING))
+            audio_ids.append((audio_id, duration))
+            
+            print(f"✅ 添加音频: {file_name} (真实时长: {duration/1000000:.1f}秒)")
         
-        print(f"✅ 添加音频: {file_name} (真实时长: {duration/1000000:.1f}秒)")
+        # 图片尺寸只读文件头，与 auto_capcut_draft_enhanced 共用持久缓存
+        image_meta = image_meta_future.result()
+        payload_future.result()
     
     # 添加图片材料
     image_ids = []
     
     for image_file in image_files:
-        file_name = os.path.basename(image_file)
-        image_id = generate_uuid()
+        image_id = new_id("image")
+        image_width, image_height = (image_meta.get(image_file) or (1152, 2048, ""))[:2]
         
-        image_material = {
-            "aigc_type": "none",
-            "audio_fade": None,
-            "cartoon_path": "",
-            "category_id": "",
-            "category_name": "",
-            "check_flag": 63487,
-            "crop": {
-                "lower_left_x": 0.0,
-                "lower_left_y": 1.0,
-                "lower_right_x": 1.0,
-                "lower_right_y": 1.0,
-                "upper_left_x": 0.0,
-                "upper_left_y": 0.0,
-                "upper_right_x": 1.0,
-                "upper_right_y": 0.0
-            },
-            "crop_ratio": "free",
-            "crop_scale": 1.0,
-            "duration": 10800000000,
-            "extra_type_option": 0,
-            "formula_id": "",
-            "freeze": None,
-            "has_audio": False,
-            "height": 2048,
-            "id": image_id,
-            "intensifies_audio_path": "",
-            "intensifies_path": "",
-            "is_ai_generate_content": False,
-            "is_copyright": False,
-            "is_text_edit_overdub": False,
-            "is_unified_beauty_mode": False,
-            "local_id": "",
-            "local_material_id": "",
-            "material_id": "",
-            "material_name": file_name,
-            "material_url": "",
-            "matting": {
-                "flag": 0,
-                "has_use_quick_brush": False,
-                "has_use_quick_eraser": False,
-                "interactiveTime": [],
-                "path": "",
-                "strokes": []
-            },
-            "media_path": "",
-            "object_locked": None,
-            "origin_material_id": "",
-            "path": image_file,
-            "picture_from": "none",
-            "picture_set_category_id": "",
-            "picture_set_category_name": "",
-            "request_id": "",
-            "reverse_intensifies_path": "",
-            "reverse_path": "",
-            "smart_motion": None,
-            "source": 0,
-            "source_platform": 0,
-            "stable": {
-                "matrix_path": "",
-                "stable_level": 0,
-                "time_range": {
-                    "duration": 0,
-                    "start": 0
-                }
-            },
-            "team_id": "",
-            "type": "photo",
-            "video_algorithm": {
-                "algorithms": [],
-                "complement_frame_config": None,
-                "deflicker": None,
-                "gameplay_configs": [],
-                "motion_blur_config": None,
-                "noise_reduction": None,
-                "path": "",
-                "quality_enhance": None,
-                "time_range": None
-            },
-            "width": 1152
-        }
-        
-        draft['materials']['videos'].append(image_material)
+        draft['materials']['videos'].append(
+            build_image_material(image_id, "", image_file, image_width, image_height, profile=PROFILE_JIANYING))
         image_ids.append(image_id)
         
-        print(f"✅ 添加图片: {file_name}")
+        print(f"✅ 添加图片: {os.path.basename(image_file)}")
     
     # 创建图片轨道片段
     if image_ids and audio_ids:
         # 找到第一个视频轨道
-        video_track = None
-        for track in draft['tracks']:
-            if track['type'] == 'video' and track.get('flag', 0) == 0:
-                video_track = track
-                break
+        video_track = find_track(draft, 'video')
         
         if video_track:
-            current_time = 0
-            image_index = 0  # 当前使用的图片索引
-            
             print(f"\n=== 开始分配图片到音频 ===")
             
-            # 遍历每个音频段
-            for audio_idx, (audio_id, duration) in enumerate(audio_ids):
-                audio_duration_seconds = duration / 1000000  # 转换为秒
-                
-                print(f"\n音频段 {audio_idx + 1}: 时长 {audio_duration_seconds:.2f}秒")
-                
-                # 判断音频时长是否不足1.5秒
-                if audio_duration_seconds < 1.5:
-                    # 短音频：只配一张图片，跳过下一张图片
-                    if image_index < len(image_ids):
-                        image_id = image_ids[image_index]
-                        segment_id = generate_uuid()
-                        
-                        segment = {
-                            "caption_info": None,
-                            "cartoon": False,
-                            "clip": {
-                                "alpha": 1.0,
-                                "flip": {"horizontal": False, "vertical": False},
-                                "rotation": 0.0,
-                                "scale": {"x": 1.0, "y": 1.0},
-                                "transform": {"x": 0.0, "y": 0.0}
-                            },
-                            "common_keyframes": [],
-                            "enable_adjust": True,
-                            "enable_color_curves": True,
-                            "enable_color_match_adjust": False,
-                            "enable_color_wheels": True,
-                            "enable_lut": True,
-                            "enable_smart_color_adjust": False,
-                            "extra_material_refs": [generate_uuid() for _ in range(5)],
-                            "group_id": "",
-                            "hdr_settings": {"intensity": 1.0, "mode": 1, "nits": 1000},
-                            "id": segment_id,
-                            "intensifies_audio": False,
-                            "is_placeholder": False,
-                            "is_tone_modify": False,
-                            "keyframe_refs": [],
-                            "last_nonzero_volume": 1.0,
-                            "material_id": image_id,
-                            "render_index": len(video_track['segments']) + 1,
-                            "responsive_layout": {
-                                "enable": False,
-                                "horizontal_pos_layout": 0,
-                                "size_layout": 0,
-                                "target_follow": "",
-                                "vertical_pos_layout": 0
-                            },
-                            "reverse": False,
-                            "source_timerange": {"duration": duration, "start": 0},
-                            "speed": 1.0,
-                            "target_timerange": {"duration": duration, "start": current_time},
-                            "template_id": "",
-                            "template_scene": "default",
-                            "track_attribute": 0,
-                            "track_render_index": 1,
-                            "uniform_scale": {"on": True, "value": 1.0},
-                            "visible": True,
-                            "volume": 1.0
-                        }
-                        
-                        video_track['segments'].append(segment)
-                        print(f"  短音频配1张图片: 图片{image_index + 1} (时长{audio_duration_seconds:.2f}秒)")
-                        print(f"  跳过图片{image_index + 2}，不再使用")
-                        image_index += 2  # 跳过下一张图片，永远不再使用
-                    else:
-                        print(f"  警告: 音频段 {audio_idx + 1} 没有足够的图片")
-                else:
-                    # 长音频：配两张图片，平均分配时间
-                    if image_index + 1 < len(image_ids):
-                        # 第一张图片
-                        first_image_id = image_ids[image_index]
-                        first_segment_id = generate_uuid()
-                        half_duration = duration // 2
-                        
-                        first_segment = {
-                            "caption_info": None,
-                            "cartoon": False,
-                            "clip": {
-                                "alpha": 1.0,
-                                "flip": {"horizontal": False, "vertical": False},
-                                "rotation": 0.0,
-                                "scale": {"x": 1.0, "y": 1.0},
-                                "transform": {"x": 0.0, "y": 0.0}
-                            },
-                            "common_keyframes": [],
-                            "enable_adjust": True,
-                            "enable_color_curves": True,
-                            "enable_color_match_adjust": False,
-                            "enable_color_wheels": True,
-                            "enable_lut": True,
-                            "enable_smart_color_adjust": False,
-                            "extra_material_refs": [generate_uuid() for _ in range(5)],
-                            "group_id": "",
-                            "hdr_settings": {"intensity": 1.0, "mode": 1, "nits": 1000},
-                            "id": first_segment_id,
-                            "intensifies_audio": False,
-                            "is_placeholder": False,
-                            "is_tone_modify": False,
-                            "keyframe_refs": [],
-                            "last_nonzero_volume": 1.0,
-                            "material_id": first_image_id,
-                            "render_index": len(video_track['segments']) + 1,
-                            "responsive_layout": {
-                                "enable": False,
-                                "horizontal_pos_layout": 0,
-                                "size_layout": 0,
-                                "target_follow": "",
-                                "vertical_pos_layout": 0
-                            },
-                            "reverse": False,
-                            "source_timerange": {"duration": half_duration, "start": 0},
-                            "speed": 1.0,
-                            "target_timerange": {"duration": half_duration, "start": current_time},
-                            "template_id": "",
-                            "template_scene": "default",
-                            "track_attribute": 0,
-                            "track_render_index": 1,
-                            "uniform_scale": {"on": True, "value": 1.0},
-                            "visible": True,
-                            "volume": 1.0
-                        }
-                        
-                        # 第二张图片
-                        second_image_id = image_ids[image_index + 1]
-                        second_segment_id = generate_uuid()
-                        remaining_duration = duration - half_duration
-                        
-                        second_segment = {
-                            "caption_info": None,
-                            "cartoon": False,
-                            "clip": {
-                                "alpha": 1.0,
-                                "flip": {"horizontal": False, "vertical": False},
-                                "rotation": 0.0,
-                                "scale": {"x": 1.0, "y": 1.0},
-                                "transform": {"x": 0.0, "y": 0.0}
-                            },
-                            "common_keyframes": [],
-                            "enable_adjust": True,
-                            "enable_color_curves": True,
-                            "enable_color_match_adjust": False,
-                            "enable_color_wheels": True,
-                            "enable_lut": True,
-                            "enable_smart_color_adjust": False,
-                            "extra_material_refs": [generate_uuid() for _ in range(5)],
-                            "group_id": "",
-                            "hdr_settings": {"intensity": 1.0, "mode": 1, "nits": 1000},
-                            "id": second_segment_id,
-                            "intensifies_audio": False,
-                            "is_placeholder": False,
-                            "is_tone_modify": False,
-                            "keyframe_refs": [],
-                            "last_nonzero_volume": 1.0,
-                            "material_id": second_image_id,
-                            "render_index": len(video_track['segments']) + 2,
-                            "responsive_layout": {
-                                "enable": False,
-                                "horizontal_pos_layout": 0,
-                                "size_layout": 0,
-                                "target_follow": "",
-                                "vertical_pos_layout": 0
-                            },
-                            "reverse": False,
-                            "source_timerange": {"duration": remaining_duration, "start": 0},
-                            "speed": 1.0,
-                            "target_timerange": {"duration": remaining_duration, "start": current_time + half_duration},
-                            "template_id": "",
-                            "template_scene": "default",
-                            "track_attribute": 0,
-                            "track_render_index": 1,
-                            "uniform_scale": {"on": True, "value": 1.0},
-                            "visible": True,
-                            "volume": 1.0
-                        }
-                        
-                        video_track['segments'].append(first_segment)
-                        video_track['segments'].append(second_segment)
-                        print(f"  长音频配2张图片: 图片{image_index + 1}({half_duration/1000000:.2f}秒) + 图片{image_index + 2}({remaining_duration/1000000:.2f}秒)")
-                        image_index += 2
-                    else:
-                        print(f"  警告: 音频段 {audio_idx + 1} 没有足够的图片配对")
-                
-                current_time += duration
+            # 布局引擎一次算出所有图片片段（与 auto_capcut_draft_enhanced 的 "pair" 策略相同）：
+            # 短音频（< 1.5秒）配1张图片并跳过下一张，长音频配2张图片平分时长
+            policy = PairSplitPolicy()
+            layout = policy.layout([duration for _, duration in audio_ids], len(image_ids))
+            print_layout(layout, audio_ids, policy.threshold_micro)
+            
+            # 片段引用的辅助材料（速度、画布、声道等）：可共享的类型整份草稿一份，其余按片段生成
+            video_materials = SegmentMaterialPool(id_factory, kinds=JIANYING_VIDEO_KINDS, key_prefix="video:")
+            video_materials.attach(draft['materials'], len(layout))
+            video_track['segments'] = list(iter_image_segments(
+                layout, image_ids,
+                segment_id=lambda k, image_id: new_id("video_segment"),
+                extra_refs=video_materials.segment_refs
+            ))
             
             # 计算实际使用的图片数量（不包括跳过的）
+            image_index = layout.images_consumed
             used_images = len(video_track['segments'])
             skipped_images = image_index - used_images
             
@@ -512,135 +395,20 @@ def create_single_story_draft(template_path: str, story_id: str, image_files: Li
             if 'material_animations' not in draft['materials']:
                 draft['materials']['material_animations'] = []
             
-            # 创建四种入场动画效果
-            animations = []
-            
-            # 创建动感放大动画
-            zoom_in_animation = {
-                'animations': [{
-                'anim_adjust_params': None,
-                'category_id': 'in',
-                'category_name': '入场',
-                'duration': 200000,  # 0.2秒
-                'id': '431662',
-                'material_type': 'video',
-                'name': '动感放大',
-                'panel': 'video',
-                'path': '/Users/a47/Library/Containers/com.lemon.lvpro/Data/Movies/JianyingPro/User Data/Cache/effect/431662/8fb560c01e4ccffbc4dc084f9c418838',
-                'platform': 'all',
-                'request_id': str(uuid.uuid4()),
-                'resource_id': '6740867832570974733',
-                'start': 0,
-                'type': 'in'
-                }],
-                'id': str(uuid.uuid4()).upper(),
-                'multi_language_current': 'none',
-                'type': 'sticker_animation'
-            }
-            draft['materials']['material_animations'].append(zoom_in_animation)
-            animations.append(zoom_in_animation)
-            print(f"✅ 创建动感放大动画: {zoom_in_animation['id']}")
-            
-            # 创建轻微抖动动画
-            gentle_shake_animation = {
-                'animations': [{
-                'anim_adjust_params': None,
-                'category_id': 'in',
-                'category_name': '入场',
-                'duration': 200000,  # 0.2秒
-                'id': '431664',
-                'material_type': 'video',
-                'name': '轻微抖动',
-                'panel': 'video',
-                'path': '/Users/a47/Library/Containers/com.lemon.lvpro/Data/Movies/JianyingPro/User Data/Cache/effect/431664/944c5561f3d23baa068cee2bba4f15f5',
-                'platform': 'all',
-                'request_id': str(uuid.uuid4()),
-                'resource_id': '6739418227031413256',
-                'start': 0,
-                'type': 'in'
-                }],
-                'id': str(uuid.uuid4()).upper(),
-                'multi_language_current': 'none',
-                'type': 'sticker_animation'
-            }
-            draft['materials']['material_animations'].append(gentle_shake_animation)
-            animations.append(gentle_shake_animation)
-            print(f"✅ 创建轻微抖动动画: {gentle_shake_animation['id']}")
+            # 按动画目录创建入场动画（每种一个材料，所有片段共用）
+            animations = create_animation_materials(new_id)
+            draft['materials']['material_animations'].extend(animations)
+            for animation in animations:
+                print(f"✅ 创建{animation['animations'][0]['name']}动画: {animation['id']}")
             
-            # 创建向右甩入动画
-            swipe_right_animation = {
-                'animations': [{
-                'anim_adjust_params': None,
-                'category_id': 'in',
-                'category_name': '入场',
-                'duration': 200000,  # 0.2秒
-                'id': '431636',
-                'material_type': 'video',
-                'name': '向右甩入',
-                'panel': 'video',
-                'path': '/Users/a47/Library/Containers/com.lemon.lvpro/Data/Movies/JianyingPro/User Data/Cache/effect/431636/c83f7d144853d115a9e8572e667c6bfe',
-                'platform': 'all',
-                'request_id': str(uuid.uuid4()),
-                'resource_id': '6739338727866241539',
-                'start': 0,
-                'type': 'in'
-                }],
-                'id': str(uuid.uuid4()).upper(),
-                'multi_language_current': 'none',
-                'type': 'sticker_animation'
-            }
-            draft['materials']['material_animations'].append(swipe_right_animation)
-            animations.append(swipe_right_animation)
-            print(f"✅ 创建向右甩入动画: {swipe_right_animation['id']}")
-            
-            # 创建左右抖动动画
-            shake_animation = {
-                'animations': [{
-                'anim_adjust_params': None,
-                'category_id': 'in',
-                'category_name': '入场',
-                'duration': 200000,  # 0.2秒
-                'id': '431654',
-                'material_type': 'video',
-                'name': '左右抖动',
-                'panel': 'video',
-                'path': '/Users/a47/Library/Containers/com.lemon.lvpro/Data/Movies/JianyingPro/User Data/Cache/effect/431654/267653b22765bd8348dda092f8de3cfe',
-                'platform': 'all',
-                'request_id': str(uuid.uuid4()),
-                'resource_id': '6739418540421419524',
-                'start': 0,
-                'type': 'in'
-                }],
-                'id': str(uuid.uuid4()).upper(),
-                'multi_language_current': 'none',
-                'type': 'sticker_animation'
-            }
-            draft['materials']['material_animations'].append(shake_animation)
-            animations.append(shake_animation)
-            print(f"✅ 创建左右抖动动画: {shake_animation['id']}")
-            
-            # 定义一个函数，随机选择一个动画，但不会连续选择相同的动画
-            last_animation = None
-            def get_random_animation():
-                nonlocal last_animation
-                available_animations = [anim for anim in animations if anim != last_animation]
-                if not available_animations:  # 如果没有可用的动画，使用所有动画
-                    available_animations = animations
-                selected_animation = random.choice(available_animations)
-                last_animation = selected_animation
-                return selected_animation
-            
-            # 应用入场动画效果到除第一张图片外的所有图片上
+            # 一次生成整段动画序列（第一张图片不加动画，相邻图片不重复）
+            assignments = assign_intro_animations(animations, len(video_track['segments']), rng)
             animation_count = 0
-            for i, segment in enumerate(video_track['segments']):
-                # 跳过第一个图片片段
-                if i == 0:
+            for i, (segment, animation_to_apply) in enumerate(zip(video_track['segments'], assignments)):
+                if animation_to_apply is None:
                     print(f"跳过第一张图片，不应用动画效果")
                     continue
                 
-                # 随机选择一个动画效果，但不会连续选择相同的动画
-                animation_to_apply = get_random_animation()
-                
                 # 确保 extra_material_refs 存在
                 if 'extra_material_refs' not in segment:
                     segment['extra_material_refs'] = []
@@ -655,70 +423,17 @@ def create_single_story_draft(template_path: str, story_id: str, image_files: Li
     
     # 创建音频轨道
     if audio_ids:
-        audio_track_id = generate_uuid()
-        segments = []
-        current_time = 0
-        
-        for i, (audio_id, duration) in enumerate(audio_ids):
-            segment_id = generate_uuid()
-            
-            segment = {
-                "caption_info": None,
-                "cartoon": False,
-                "clip": None,
-                "common_keyframes": [],
-                "enable_adjust": False,
-                "enable_color_curves": True,
-                "enable_color_match_adjust": False,
-                "enable_color_wheels": True,
-                "enable_lut": False,
-                "enable_smart_color_adjust": False,
-                "extra_material_refs": [generate_uuid() for _ in range(4)],
-                "group_id": "",
-                "hdr_settings": None,
-                "id": segment_id,
-                "intensifies_audio": False,
-                "is_placeholder": False,
-                "is_tone_modify": False,
-                "keyframe_refs": [],
-                "last_nonzero_volume": 1.0,
-                "material_id": audio_id,
-                "render_index": i,
-                "responsive_layout": {
-                    "enable": False,
-                    "horizontal_pos_layout": 0,
-                    "size_layout": 0,
-                    "target_follow": "",
-                    "vertical_pos_layout": 0
-                },
-                "reverse": False,
-                "source_timerange": {"duration": duration, "start": 0},  # 使用完整时长
-                "speed": 1.0,
-                "target_timerange": {"duration": duration, "start": current_time},
-                "template_id": "",
-                "template_scene": "default",
-                "track_attribute": 0,
-                "track_render_index": 0,
-                "uniform_scale": None,
-                "visible": True,
-                "volume": 10.0  # +20dB 对白音量
-            }
-            
-            segments.append(segment)
-            current_time += duration
-        
-        # 创建音频轨道
-        audio_track = {
-            "attribute": 0,
-            "flag": 0,
-            "id": audio_track_id,
-            "is_default_name": True,
-            "name": "",
-            "segments": segments,
-            "type": "audio"
-        }
-        
-        draft['tracks'].append(audio_track)
+        audio_track_id = new_id("audio_track")
+        audio_materials = SegmentMaterialPool(id_factory, kinds=JIANYING_AUDIO_KINDS, key_prefix="audio:")
+        audio_materials.attach(draft['materials'], len(audio_ids))
+        segments = list(iter_audio_segments(
+            audio_ids,
+            segment_id=lambda i, audio_id: new_id("audio_segment"),
+            volume=DIALOGUE_VOLUME,
+            extra_refs=audio_materials.segment_refs,
+            profile=PROFILE_JIANYING
+        ))
+        draft['tracks'].append(build_track(audio_track_id, "audio", segments, name=""))
         
         # 更新总时长
         total_audio_duration = sum(duration for _, duration in audio_ids)
@@ -726,93 +441,90 @@ def create_single_story_draft(template_path: str, story_id: str, image_files: Li
         
         print(f"✅ 创建音频轨道，包含 {len(audio_ids)} 个片段，总音频时长 {total_audio_duration/1000000:.1f}秒")
     
-    # 修改背景音乐messironaldo.MP3的时长和音量
-    total_video_duration = draft['duration']  # 使用视频总时长
-    
-    for track in draft['tracks']:
-        if track['type'] == 'audio':
-            for segment in track['segments']:
-                if 'material_id' in segment:
-                    # 查找对应的音频材料
-                    for audio_material in draft['materials']['audios']:
-                        if (audio_material['id'] == segment['material_id'] and 
-                            audio_material['name'] == 'messironaldo.MP3'):
-                            # 延长背景音乐到整个视频时长
-                            segment['target_timerange']['duration'] = total_video_duration
-                            if 'source_timerange' in segment and segment['source_timerange'] is not None:
-                                segment['source_timerange']['duration'] = total_video_duration
-                            # 设置背景音乐音量为+10dB
-                            segment['volume'] = 3.16  # +10dB 背景音乐音量
-                            print(f"✅ 延长背景音乐 messironaldo.MP3 到 {total_video_duration/1000000:.2f}秒，音量设为 +10dB")
-                            break
-    
-    # 调整black.png和MP4片段的时长
-    for track in draft['tracks']:
-        if track['type'] == 'video':
-            for segment in track['segments']:
-                if 'material_id' in segment:
-                    # 查找对应的视频材料
-                    for video_material in draft['materials']['videos']:
-                        if video_material['id'] == segment['material_id']:
-                            material_name = video_material.get('material_name', '') or video_material.get('name', '')
-                            
-                            # 调整black.png时长到整个视频
-                            if 'black.png' in material_name.lower():
-                                segment['target_timerange']['duration'] = total_video_duration
-                                if 'source_timerange' in segment and segment['source_timerange'] is not None:
-                                    segment['source_timerange']['duration'] = total_video_duration
-                                print(f"✅ 延长 black.png 到 {total_video_duration/1000000:.2f}秒")
-                            
-                            # 调整MP4片段到视频末尾（最后5秒）
-                            elif '.mp4' in material_name.lower():
-                                mp4_duration = 5000000  # 5秒
-                                mp4_start = total_video_duration - mp4_duration
-                                segment['target_timerange']['start'] = mp4_start
-                                segment['target_timerange']['duration'] = mp4_duration
-                                if 'source_timerange' in segment and segment['source_timerange'] is not None:
-                                    segment['source_timerange']['duration'] = mp4_duration
-                                print(f"✅ 调整 MP4 片段到视频末尾，时长5秒，开始时间 {mp4_start/1000000:.2f}秒")
-                            break
-    
-    # 调整轨道2（效果轨道）的时长
-    for track in draft['tracks']:
-        if track['type'] == 'effect':
-            for segment in track['segments']:
-                segment['target_timerange']['duration'] = total_video_duration
-                if 'source_timerange' in segment and segment['source_timerange'] is not None:
-                    segment['source_timerange']['duration'] = total_video_duration
-                print(f"✅ 延长效果轨道到 {total_video_duration/1000000:.2f}秒")
-                break
+    # 背景音乐、black.png、MP4 片头片尾和效果轨道按总时长调整
+    retime_template_segments(draft, draft['duration'])
     
     # 保存草稿文件
     output_draft_path = os.path.join(story_output_folder, "draft_content.json")
-    with open(output_draft_path, 'w', encoding='utf-8') as f:
-        json.dump(draft, f, ensure_ascii=False)
+    write_draft_json(output_draft_path, draft, indent=PROFILE_JSON_INDENT[PROFILE_JIANYING])
     
-    # 复制模板文件夹的其他文件
-    template_folder = os.path.dirname(template_path)
-    for item in os.listdir(template_folder):
-        if item != "draft_content.json":
-            src_path = os.path.join(template_folder, item)
-            dst_path = os.path.join(story_output_folder, item)
-            
-            try:
-                if os.path.isfile(src_path):
-                    shutil.copy2(src_path, dst_path)
-                elif os.path.isdir(src_path):
-                    if os.path.exists(dst_path):
-                        shutil.rmtree(dst_path)
-                    shutil.copytree(src_path, dst_path)
-            except Exception as e:
-                print(f"复制文件时出错 {item}: {e}")
+    if staging_folder:
+        publish_story_folder(story_output_folder, final_story_folder)
+        story_output_folder = final_story_folder
+        output_draft_path = os.path.join(final_story_folder, "draft_content.json")
     
     print(f"✅ 故事 {story_id} 草稿生成完成！")
     print(f"📁 输出文件夹: {story_output_folder}")
     print(f"🎵 音频片段: {len(audio_ids)}")
     print(f"🖼️  图片片段: {len(image_ids)}")
     print(f"⏱️  总时长: {draft['duration']/1000000:.2f}秒")
+    
+    # 完整性检查：材料引用、时间线连续性、总时长
+    report = None
+    if VALIDATE_DRAFTS:
+        report = validate_draft(draft, source=output_draft_path)
+        print(f"🔍 草稿检查 {report.summary()}")
+        for line in report.lines():
+            print(line)
+    return report
+
+def _create_story_draft_captured(template_path: str, story_id: str, image_files: List[str],
+                                 audio_files: List[str], output_folder: str, id_mode: str = None,
+                                 staging_folder: str = None):
+    """
+    并行模式的工作进程：生成单个故事，输出收集到字符串（避免多个故事的输出交错）
+    
+    Returns:
+        (story_id, DraftReport 或 None, 输出文本, 耗时秒数, 错误信息或 None)
+    """
+    buffer = io.StringIO()
+    started = time.time()
+    report, error = None, None
+    with contextlib.redirect_stdout(buffer):
+        try:
+            report = create_single_story_draft(template_path, story_id, image_files, audio_files,
+                                               output_folder, id_mode=id_mode,
+                                               staging_folder=staging_folder)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+    return story_id, report, buffer.getvalue(), time.time() - started, error
+
+def _create_drafts_parallel(template_path: str, story_ids: List[str], story_groups: Dict,
+                            output_base_folder: str, id_mode: str, workers: int,
+                            staging_folder: str = None) -> Dict[str, tuple]:
+    """
+    用进程池并行生成故事草稿，每完成一个故事打印一行进度
+    
+    Returns:
+        {story_id: (report, 输出文本, 耗时, 错误)}
+    """
+    # 先在主进程中探测全部图片尺寸并写入持久缓存，工作进程直接命中缓存
+    probe_images([path for story_id in story_ids for path in story_groups[story_id]['images']])
+    
+    results = {}
+    started = time.time()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(_create_story_draft_captured, template_path, story_id,
+                        story_groups[story_id]['images'], story_groups[story_id]['audios'],
+                        output_base_folder, id_mode, staging_folder)
+            for story_id in story_ids
+        ]
+        for future in as_completed(futures):
+            story_id, report, output, seconds, error = future.result()
+            results[story_id] = (report, output, seconds, error)
+            if error:
+                status = f"❌ {error}"
+            elif report is not None and not report.ok:
+                status = "⚠️  检查未通过"
+            else:
+                status = "✅"
+            print(f"[{len(results)}/{len(story_ids)}] 故事 {story_id} {status} ({seconds:.1f}秒，"
+                  f"已用 {time.time() - started:.1f}秒)")
+    return results
 
-def batch_create_drafts(template_path: str, image_folder: str, audio_folder: str, output_base_folder: str):
+def batch_create_drafts(template_path: str, image_folder: str, audio_folder: str, output_base_folder: str,
+                        id_mode: str = None, workers: int = None):
     """
     批量创建多个故事的剪映草稿
     
@@ -821,6 +533,8 @@ def batch_create_drafts(template_path: str, image_folder: str, audio_folder: str
         image_folder: 图片文件夹路径
         audio_folder: 音频文件夹路径
         output_base_folder: 输出基础文件夹路径
+        id_mode: ID 生成模式 "random" / "deterministic"（None = 使用 ID_MODE 配置）
+        workers: 并行进程数（None = 使用 STORY_WORKERS 配置，1 = 逐个生成）
     """
     
     print("=== 剪映草稿批量生成器（最终版）===")
@@ -856,25 +570,70 @@ def batch_create_drafts(template_path: str, image_folder: str, audio_folder: str
     # 确保输出文件夹存在
     os.makedirs(output_base_folder, exist_ok=True)
     
-    # 为每个故事创建草稿
+    # 为每个故事创建草稿（只有当故事有图片或音频文件时才创建）
+    story_ids = []
     for story_id in sorted(story_groups.keys(), key=int):
         story_data = story_groups[story_id]
-        
-        # 只有当故事有图片或音频文件时才创建草稿
         if story_data['images'] or story_data['audios']:
-            create_single_story_draft(
-                template_path=template_path,
-                story_id=story_id,
-                image_files=story_data['images'],
-                audio_files=story_data['audios'],
-                output_folder=output_base_folder
-            )
+            story_ids.append(story_id)
         else:
             print(f"⚠️  故事 {story_id} 没有找到任何文件，跳过")
     
+    # 暂存文件夹放在输出文件夹内，保证与最终位置在同一文件系统（改名即可就位）
+    staging_folder = None
+    if STAGE_DRAFTS:
+        staging_folder = os.path.join(output_base_folder, f"{STAGING_PREFIX}{os.getpid()}")
+        os.makedirs(staging_folder, exist_ok=True)
+    
+    workers = STORY_WORKERS if workers is None else workers
+    failed_checks = []
+    failed_stories = []
+    try:
+        if workers > 1 and len(story_ids) > 1:
+            print(f"\n⚡ 并行生成 {len(story_ids)} 个故事（{workers} 个进程）")
+            results = _create_drafts_parallel(template_path, story_ids, story_groups,
+                                              output_base_folder, id_mode, workers, staging_folder)
+            # 按故事编号顺序输出各故事的详细信息，结果与逐个生成一致
+            for story_id in story_ids:
+                report, output, seconds, error = results[story_id]
+                print(output, end="")
+                if error:
+                    print(f"❌ 故事 {story_id} 生成失败: {error}")
+                    failed_stories.append(story_id)
+                elif report is not None and not report.ok:
+                    failed_checks.append(story_id)
+        else:
+            for story_id in story_ids:
+                story_data = story_groups[story_id]
+                # 与并行模式一致：单个故事出错只记录失败，继续生成其余故事
+                try:
+                    report = create_single_story_draft(
+                        template_path=template_path,
+                        story_id=story_id,
+                        image_files=story_data['images'],
+                        audio_files=story_data['audios'],
+                        output_folder=output_base_folder,
+                        id_mode=id_mode,
+                        staging_folder=staging_folder
+                    )
+                except Exception as e:
+                    print(f"❌ 故事 {story_id} 生成失败: {type(e).__name__}: {e}")
+                    failed_stories.append(story_id)
+                    continue
+                if report is not None and not report.ok:
+                    failed_checks.append(story_id)
+    finally:
+        # 生成失败或被中断的故事留在暂存文件夹中，一并删除
+        if staging_folder:
+            shutil.rmtree(staging_folder, ignore_errors=True)
+    
     print(f"\n🎉 批量生成完成！")
     print(f"📁 所有草稿保存在: {output_base_folder}")
-    print(f"📊 总共生成了 {len([s for s in story_groups.values() if s['images'] or s['audios']])} 个草稿")
+    print(f"📊 总共生成了 {len(story_ids) - len(failed_stories)} 个草稿")
+    if failed_stories:
+        print(f"❌ 生成失败: 故事 {', '.join(failed_stories)}")
+    if failed_checks:
+        print(f"🔍 草稿检查未通过: 故事 {', '.join(failed_checks)}（详见上方各故事的检查结果）")
 
 def main():
     """主函数"""
@@ -883,13 +642,13 @@ def main():
     template_path = "/Users/47rc/Desktop/纯净99/draft_content.json"  # 模板草稿文件
     image_folder = "/Users/47rc/Downloads"  # 图片文件夹
     audio_folder = "/Users/47rc/Downloads"  # 音频文件夹
-    output_base_folder = "/Users/47rc/Desktop/58jianying"  # 临时输出文件夹
     final_destination = "/Users/47rc/Desktop/Youtube/剪映draft/JianyingPro Drafts"  # 最终目标文件夹
     adjust_script_path = "/Users/47rc/Desktop/AutoAI/adjust_draft_images两张图一段语音.py"  # 调整脚本路径
     
-    print("=== 第一步：批量生成草稿 ===")
-    # 批量生成草稿
-    batch_create_drafts(template_path, image_folder, audio_folder, output_base_folder)
+    print("=== 批量生成草稿 ===")
+    # 直接生成到剪映草稿目录：每个故事先写入其中的暂存文件夹，完成后改名就位
+    # （不再经过临时输出文件夹再移动，跨磁盘时每个字节只写一次）
+    batch_create_drafts(template_path, image_folder, audio_folder, final_destination)
     
     print("\n=== 跳过调整脚本，使用新的短音频逻辑 ===")
     print("短音频（< 1.5秒）只配1张图片，长音频（≥ 1.5秒）配2张图片")
@@ -913,47 +672,6 @@ def main():
     # except Exception as e:
     #     print(f"❌ 运行调整脚本时出错: {e}")
     #     return
-    
-    print("\n=== 第二步：移动草稿到最终目录 ===")
-    # 确保最终目标目录存在
-    os.makedirs(final_destination, exist_ok=True)
-    
-    # 获取所有生成的草稿文件夹
-    if os.path.exists(output_base_folder):
-        draft_folders = [f for f in os.listdir(output_base_folder) 
-                        if os.path.isdir(os.path.join(output_base_folder, f))]
-        
-        moved_count = 0
-        for folder_name in draft_folders:
-            src_path = os.path.join(output_base_folder, folder_name)
-            dst_path = os.path.join(final_destination, folder_name)
-            
-            try:
-                # 如果目标文件夹已存在，先删除
-                if os.path.exists(dst_path):
-                    shutil.rmtree(dst_path)
-                
-                # 移动文件夹
-                shutil.move(src_path, dst_path)
-                print(f"✅ 已移动草稿: {folder_name}")
-                moved_count += 1
-                
-            except Exception as e:
-                print(f"❌ 移动草稿 {folder_name} 时出错: {e}")
-        
-        print(f"\n🎉 处理完成！")
-        print(f"📊 总共处理了 {moved_count} 个草稿")
-        print(f"📁 所有草稿已保存到: {final_destination}")
-        
-        # 清理临时文件夹
-        try:
-            if os.path.exists(output_base_folder) and not os.listdir(output_base_folder):
-                os.rmdir(output_base_folder)
-                print(f"🧹 已清理临时文件夹: {output_base_folder}")
-        except Exception as e:
-            print(f"⚠️  清理临时文件夹时出错: {e}")
-    else:
-        print("❌ 未找到生成的草稿文件夹")
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file